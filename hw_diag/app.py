@@ -1,6 +1,5 @@
 import logging
 import os
-import uuid
 import traceback
 from datetime import datetime
 from functools import partial
@@ -13,10 +12,12 @@ from flask_apscheduler import APScheduler
 from hm_pyhelper.logger import get_logger
 
 from hw_diag.cache import cache
-from hw_diag.tasks import perform_hw_diagnostics
+from hw_diag.utilities.dbus_proxy.property_cache import dbus_property_cache
+from hw_diag.utilities.diagnostics_snapshot import diagnostics_snapshot
+from hw_diag.utilities.lora_status import lora_status_watcher
 from hw_diag.utilities.dashboard_registration import register_third_party_miner
-from hw_diag.utilities.event_streamer import DiagEvent
 from hw_diag.utilities.network_watchdog import NetworkWatchdog
+from hw_diag.utilities.watchdog_schedule import AdaptiveSchedule
 from hw_diag.utilities.balena_migration \
     import attempt_device_migration, unmount_boot_partition
 from hw_diag.utilities.sentry import init_sentry
@@ -33,6 +34,7 @@ from hw_diag.database import get_db_session
 from hw_diag.database.migrations import run_migrations
 from hw_diag.utilities.network import setup_hostname
 from hw_diag.utilities.manufacturing_mode import device_in_manufacturing
+from hw_diag.utilities.process_lock import file_lock, scheduler_leader, shared_secret
 
 SENTRY_DSN = os.getenv('SENTRY_DIAG')
 DIAGNOSTICS_VERSION = os.getenv('DIAGNOSTICS_VERSION')
@@ -40,7 +42,10 @@ BALENA_ID = os.getenv('BALENA_DEVICE_UUID')
 BALENA_APP = os.getenv('BALENA_APP_NAME')
 HEARTBEAT_INTERVAL_HOURS = float(os.getenv('HEARTBEAT_INTERVAL_HOURS', 24))
 SHIP_DIAG_INTERVAL_HOURS = float(os.getenv('SHIP_DIAG_INTERVAL_HOURS', 1))
+DIAG_SNAPSHOT_INTERVAL_MINUTES = float(os.getenv('DIAG_SNAPSHOT_INTERVAL_MINUTES', 5))
 NETWORK_WATCHDOG_INTERVAL_HOURS = float(os.getenv('NETWORK_WATCHDOG_INTERVAL_HOURS', 1))
+NETWORK_WATCHDOG_MAX_INTERVAL_HOURS = float(os.getenv('NETWORK_WATCHDOG_MAX_INTERVAL_HOURS', 4))
+NETWORK_WATCHDOG_RECOVERY_MINUTES = float(os.getenv('NETWORK_WATCHDOG_RECOVERY_MINUTES', 2))
 NEBRAOS_MIGRATION_INTERVAL_HOURS = float(os.getenv('NEBRAOS_MIGRATION_INTERVAL_HOURS', 24))
 MIGRATION_TASK_DISABLED = os.getenv('NEBRA_CLOUD_MIGRATION_DISABLED', 'false').lower() == 'true'
 
@@ -61,7 +66,14 @@ if DEBUG:
 
 
 def run_ship_diagnostics_task():
-    perform_hw_diagnostics(ship=True)
+    diagnostics_snapshot.refresh(ship=True)
+
+
+def run_diagnostics_snapshot_task():
+    try:
+        diagnostics_snapshot.refresh()
+    except Exception as e:
+        logging.error(f'Unknown error while refreshing the diagnostics snapshot: {e}')
 
 
 def run_balena_migration_task():
@@ -89,13 +101,14 @@ def run_quectel_health_task():
         logging.error(traceback.format_exc())
 
 
-def run_network_watchdog_task(watchdog, scheduler):
+def run_network_watchdog_task(watchdog, scheduler, schedule):
     try:
         network_state_event = watchdog.ensure_network_connection()
-        if network_state_event == DiagEvent.NETWORK_DISCONNECTED:
-            # accelerate the check for network connectivity
-            watchdog_job = scheduler.get_job('network_watchdog')
-            watchdog_job.modify(next_run_time=datetime.now() + timedelta(minutes=15))
+        # check again soon while recovering, less and less often while connected
+        interval = schedule.next_interval(network_state_event)
+        log.info(f"Next network check in {interval}")
+        watchdog_job = scheduler.get_job('network_watchdog')
+        watchdog_job.modify(next_run_time=datetime.now() + interval)
     except Exception as e:
         logging.warning(f'Unknown error while checking the network connectivity : {e}')
 
@@ -127,12 +140,20 @@ def init_scheduled_tasks(app) -> None:
     scheduler.add_job(id='ship_diagnostics', func=run_ship_diagnostics_task,
                       trigger='interval', hours=SHIP_DIAG_INTERVAL_HOURS, jitter=300)
 
+    scheduler.add_job(id='diagnostics_snapshot', func=run_diagnostics_snapshot_task,
+                      trigger='interval', minutes=DIAG_SNAPSHOT_INTERVAL_MINUTES,
+                      next_run_time=datetime.now())
+
     scheduler.add_job(id='quectel_repeating', func=run_quectel_health_task,
                       trigger='interval', hours=1)
 
     watchdog = NetworkWatchdog()
+    watchdog_schedule = AdaptiveSchedule(base_interval=timedelta(hours=NETWORK_WATCHDOG_INTERVAL_HOURS),
+                                         max_interval=timedelta(hours=NETWORK_WATCHDOG_MAX_INTERVAL_HOURS),
+                                         recovery_interval=timedelta(minutes=NETWORK_WATCHDOG_RECOVERY_MINUTES))
+    # every run sets the next one, the interval only applies if a run fails
     scheduler.add_job(id='network_watchdog',
-                      func=partial(run_network_watchdog_task, watchdog, scheduler),
+                      func=partial(run_network_watchdog_task, watchdog, scheduler, watchdog_schedule),
                       trigger='interval', hours=NETWORK_WATCHDOG_INTERVAL_HOURS, jitter=300)
 
     scheduler.add_job(id='emit_heartbeat', func=partial(run_heartbeat_task, watchdog),
@@ -162,13 +183,25 @@ def get_app(name, lean_initializations=device_in_manufacturing()):
                 template_folder='templates')
     cache.init_app(app)
 
+    # Needed in manufacturing too, /initFile.txt reports the LoRa status
+    lora_status_watcher.start()
+    # BT, LTE and network state are read from memory once its signals arrive
+    dbus_property_cache.start()
+
     if not lean_initializations:
-        # Run database migrations on start...
-        run_migrations('/opt/migrations/migrations', DB_URL)
+        # Every gunicorn worker gets here, the first one migrates the DB and
+        # sets the hostname while the others wait.
+        with file_lock('startup'):
+            run_migrations('/opt/migrations/migrations', DB_URL)
+            setup_hostname()
+            # Random for every start, so with reboot / update etc... users will
+            # need to reauthenticate, but the same in all workers or sessions
+            # would only be valid on the worker that logged them in.
+            app.secret_key = shared_secret('session_key')
 
         # not in manufacturing, all initialization will be performed.
-        init_scheduled_tasks(app)
-        setup_hostname()
+        # The scheduled tasks run in one worker only, another takes over if it dies.
+        scheduler_leader.run_when_leader(partial(init_scheduled_tasks, app))
 
         # Setup DB Session
         @app.before_request
@@ -183,10 +216,6 @@ def get_app(name, lean_initializations=device_in_manufacturing()):
                 pass
             return resp
 
-        # Use a random UUID for session key, this will change each time the app
-        # starts, so with reboot / update etc... users will need to reauthenticate.
-        app.secret_key = str(uuid.uuid4())
-
         # Register Blueprints
         app.register_blueprint(AUTH)
         app.register_blueprint(MYST)
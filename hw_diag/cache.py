@@ -1,3 +1,94 @@
+import functools
+import logging
+import threading
+import time
+
+from flask import current_app
 from flask_caching import Cache
 
-cache = Cache(config={'CACHE_TYPE': 'SimpleCache'})
+from hw_diag.utilities.sqlite_cache import DEFAULT_CACHE_PATH
+
+
+log = logging.getLogger()
+
+# Shared by all gunicorn workers, see SQLiteCache
+cache = Cache(config={
+    'CACHE_TYPE': 'hw_diag.utilities.sqlite_cache.SQLiteCache',
+    'CACHE_SQLITE_PATH': DEFAULT_CACHE_PATH
+})
+
+# Upper bound of a background refresh, after which another worker may retry
+REVALIDATE_LOCK_TIMEOUT = 120
+# How often a worker waiting for another one's cold computation checks for it
+COLD_POLL_SECONDS = 0.1
+
+
+def _store(key, value, timeout, stale_timeout):
+    cache.set(key, (value, time.time() + timeout), timeout=timeout + stale_timeout)
+
+
+def _revalidate(app, key, f, args, kwargs, timeout, stale_timeout):
+    try:
+        with app.app_context():
+            _store(key, f(*args, **kwargs), timeout, stale_timeout)
+    except Exception as e:
+        log.error(f"failed to revalidate {key}: {e}")
+    finally:
+        cache.delete(key + ':revalidating')
+
+
+def _compute_once(key, f, args, kwargs, timeout, stale_timeout):
+    '''
+    computes a missing value, unless another worker or thread already does in
+    which case its result is awaited
+    '''
+    lock_key = key + ':revalidating'
+    deadline = time.monotonic() + REVALIDATE_LOCK_TIMEOUT
+    locked = cache.add(lock_key, True, timeout=REVALIDATE_LOCK_TIMEOUT)
+    while not locked and time.monotonic() < deadline:
+        time.sleep(COLD_POLL_SECONDS)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+        locked = cache.add(lock_key, True, timeout=REVALIDATE_LOCK_TIMEOUT)
+
+    try:
+        # the previous holder may have stored it just before letting go
+        entry = cache.get(key) if locked else None
+        if entry is not None:
+            return entry[0]
+        value = f(*args, **kwargs)
+        _store(key, value, timeout, stale_timeout)
+        return value
+    finally:
+        if locked:
+            cache.delete(lock_key)
+
+
+def cached_stale_while_revalidate(timeout, stale_timeout, key=None):
+    '''
+    Caches the result of a view for timeout seconds. For stale_timeout seconds
+    after that the stale result is still returned straight away, while a
+    single background refresh across all workers replaces it. Concurrent
+    misses are computed once as well.
+    '''
+    def decorator(f):
+        cache_key = key or 'swr:%s.%s' % (f.__module__, f.__name__)
+
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            entry = cache.get(cache_key)
+            if entry is None:
+                return _compute_once(cache_key, f, args, kwargs, timeout, stale_timeout)
+
+            value, fresh_until = entry
+            if time.time() >= fresh_until and \
+                    cache.add(cache_key + ':revalidating', True, timeout=REVALIDATE_LOCK_TIMEOUT):
+                threading.Thread(target=_revalidate,
+                                 args=(current_app._get_current_object(), cache_key, f,
+                                       args, kwargs, timeout, stale_timeout),
+                                 name='revalidate-' + f.__name__,
+                                 daemon=True).start()
+            return value
+        return wrapper
+    return decorator
@@ -0,0 +1,39 @@
+from sqlalchemy import Column
+from sqlalchemy import Integer
+from sqlalchemy import Boolean
+from sqlalchemy import DateTime
+from sqlalchemy import Text
+
+
+from hw_diag.database import BASE
+
+
+class DiagnosticsHistory(BASE):
+    __tablename__ = 'diagnostics_history'
+
+    id = Column(
+        Integer,
+        nullable=False,
+        primary_key=True,
+        autoincrement=True
+    )
+    dt = Column(
+        DateTime(),
+        nullable=False,
+        index=True
+    )
+    # Keyframes hold the full snapshot, other rows only the keys that changed
+    # since the previous row.
+    keyframe = Column(
+        Boolean(),
+        nullable=False,
+        default=False
+    )
+    data = Column(
+        Text(),
+        nullable=False
+    )
+    removed = Column(
+        Text(),
+        nullable=True
+    )
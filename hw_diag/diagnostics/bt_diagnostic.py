@@ -3,6 +3,8 @@ from hm_pyhelper.diagnostics import DiagnosticsReport
 
 from hm_pyhelper.diagnostics.diagnostic import Diagnostic
 from hm_pyhelper.logger import get_logger
+from hw_diag.utilities.diagnostic_cache import Volatility
+from hw_diag.utilities.hardware_inventory import hardware_inventory
 
 LOGGER = get_logger(__name__)
 
@@ -11,6 +13,7 @@ class BtDiagnostic(Diagnostic):
     # Diagnostics keys
     KEY = 'BT'
     FRIENDLY_NAME = "bluetooth"
+    VOLATILITY = Volatility.SLOW
 
     # D-Bus constants
     DBUS_PROPERTIES = 'org.freedesktop.DBus.Properties'
@@ -48,30 +51,7 @@ class BtDiagnostic(Diagnostic):
             diagnostics_report.record_failure(self.NO_BT_DEVICES_MSG, self)
 
     def get_bt_devices(self) -> list:
-        bt_devices = []
-        bus = dbus.SystemBus()
-        if self.DBUS_BLUEZ_SERVICE_NAME not in dbus.SystemBus().list_names():
+        if not hardware_inventory.bluetooth_present():
             LOGGER.info("Bluetooth support not present")
             return []
-        proxy_object = bus.get_object(self.DBUS_BLUEZ_SERVICE_NAME, "/")
-        dbus_obj_mgr = dbus.Interface(proxy_object, self.DBUS_OBJECTMANAGER)
-        dbus_objs = dbus_obj_mgr.GetManagedObjects()
-        for path, interfaces in dbus_objs.items():
-            self.append_bt_devices_from_interfaces(bt_devices, interfaces)
-
-        return bt_devices
-
-    def append_bt_devices_from_interfaces(self, bt_devices: list, dbus_interfaces: list) -> list:
-        adapter = dbus_interfaces.get(self.DBUS_ADAPTER_IFACE)
-
-        if adapter:
-            bt_devices.append({
-                "Address": str(adapter.get("Address")),
-                "Name": str(adapter.get("Name")),
-                "Powered": str(adapter.get("Powered")),
-                "Discoverable": str(adapter.get("Discoverable")),
-                "Pairable": str(adapter.get("Pairable")),
-                "Discovering": str(adapter.get("Discovering")),
-            })
-
-        return bt_devices
+        return [adapter.as_device() for adapter in hardware_inventory.bt_adapters()]
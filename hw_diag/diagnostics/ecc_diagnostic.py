@@ -3,16 +3,19 @@ import re
 
 from hm_pyhelper.diagnostics import DiagnosticsReport
 from hm_pyhelper.lock_singleton import ResourceBusyError
-from hm_pyhelper.miner_param import LOGGER, get_ecc_location, get_gateway_mfr_test_result
+from hm_pyhelper.miner_param import LOGGER, get_ecc_location
 from hm_pyhelper.diagnostics.diagnostic import Diagnostic
 from hm_pyhelper.exceptions import ECCMalfunctionException,\
     GatewayMFRFileNotFoundException, UnknownVariantException
+from hw_diag.utilities.diagnostic_cache import Volatility
+from hw_diag.utilities.ecc_broker import ecc_broker
 
 
 class EccDiagnostic(Diagnostic):
     # Diagnostics keys
     KEY = 'ECC'
     FRIENDLY_NAME = "ECC"
+    VOLATILITY = Volatility.SLOW
 
     def __init__(self):
         super(EccDiagnostic, self).__init__(self.KEY, self.FRIENDLY_NAME)
@@ -48,7 +51,7 @@ class EccDiagnostic(Diagnostic):
 
     def perform_test(self, diagnostics_report: DiagnosticsReport) -> None:
         try:
-            ecc_tests = get_gateway_mfr_test_result()
+            ecc_tests = ecc_broker.get_gateway_mfr_test_result()
 
             if ecc_tests['result'] == 'pass':
                 diagnostics_report.record_result(True, self)
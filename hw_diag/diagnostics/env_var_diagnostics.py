@@ -2,6 +2,9 @@ import os
 
 from hm_pyhelper.diagnostics import DiagnosticsReport
 from hm_pyhelper.diagnostics.diagnostic import Diagnostic
+from hw_diag.utilities.diagnostic_cache import Volatility
+from hw_diag.utilities.shell import get_environment_var, ENVIRONMENT_KEYS, \
+    OPTIONAL_ENVIRONMENT_VARS
 
 
 class EnvVarDiagnostic(Diagnostic):
@@ -40,14 +43,30 @@ class EnvVarDiagnostics():
         'ENV_VAR': 'FIRMWARE_SHORT_HASH',
         'DIAGNOSTIC_KEY': 'firmware_short_hash'
     }]
+    KEYS = [mapping['DIAGNOSTIC_KEY'] for mapping in ENV_VARS_MAPPING]
+    VOLATILITY = Volatility.STATIC
 
     def __init__(self):
         def get_diagnostic_for_env_var(env_var_mapping: dict) -> Diagnostic:
             return EnvVarDiagnostic(env_var_mapping['DIAGNOSTIC_KEY'],
                                     env_var_mapping['ENV_VAR'])
 
-        self.env_var_diagnostics = map(get_diagnostic_for_env_var, self.ENV_VARS_MAPPING)
+        self.env_var_diagnostics = list(map(get_diagnostic_for_env_var, self.ENV_VARS_MAPPING))
 
     def perform_test(self, diagnostics_report: DiagnosticsReport) -> None:
         for env_var_diagnostic in self.env_var_diagnostics:
             env_var_diagnostic.perform_test(diagnostics_report)
+
+
+class EnvironmentDiagnostics():
+    """
+    The environment as the periodic snapshot has always reported it: the
+    EnvVarDiagnostics keys and the component versions, None where a
+    variable isn't set rather than a failure.
+    """
+    KEYS = ENVIRONMENT_KEYS
+    EXTRA_KEYS = list(OPTIONAL_ENVIRONMENT_VARS.values())
+    VOLATILITY = Volatility.STATIC
+
+    def perform_test(self, diagnostics_report: DiagnosticsReport) -> None:
+        get_environment_var(diagnostics_report)
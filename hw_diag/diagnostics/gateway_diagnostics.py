@@ -4,6 +4,7 @@ from hm_pyhelper.gateway_grpc.client import GatewayClient, decode_pub_key
 from hm_pyhelper.miner_param import LOGGER
 from hm_pyhelper.constants import diagnostics as DIAG_CONSTS
 import grpc
+from hw_diag.utilities.diagnostic_cache import Volatility
 
 
 class DiagnosticKeyInfo:
@@ -81,6 +82,8 @@ class GatewayDiagnostics(Diagnostic):
                           short_key=DIAG_CONSTS.GATEWAY_REGION_SHORT_KEY,
                           grpc_method_name='get_region'),
     ]
+    KEYS = [keyinfo.short_key for keyinfo in SUPPORTED_GATEWAY_ATTRIBUTES]
+    VOLATILITY = Volatility.SLOW
 
     def __init__(self):
         self.gateway_diagnostics = []
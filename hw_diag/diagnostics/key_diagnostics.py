@@ -1,8 +1,9 @@
 from hm_pyhelper.diagnostics import DiagnosticsReport
 from hm_pyhelper.exceptions import ECCMalfunctionException
 from hm_pyhelper.lock_singleton import ResourceBusyError
-from hm_pyhelper.miner_param import get_public_keys_rust
 from hm_pyhelper.diagnostics.diagnostic import Diagnostic
+from hw_diag.utilities.ecc_broker import ecc_broker
+from hw_diag.utilities.diagnostic_cache import Volatility
 
 
 class KeyDiagnostic(Diagnostic):
@@ -13,7 +14,7 @@ class KeyDiagnostic(Diagnostic):
     def perform_test(self, diagnostics_report: DiagnosticsReport) -> None:
         # Try to get key, but there may be ECC lock or other failure
         try:
-            public_keys = get_public_keys_rust()
+            public_keys = ecc_broker.get_public_keys()
         except ECCMalfunctionException as e:
             diagnostics_report.record_failure(e, self)
             return
@@ -51,6 +52,8 @@ class KeyDiagnostics:
             'key_path': 'key'
         }
     ]
+    KEYS = [mapping['key'] for mapping in KEY_MAPPINGS]
+    VOLATILITY = Volatility.STATIC
 
     def __init__(self):
         def get_diagnostic_for_key(key_mapping: dict) -> Diagnostic:
@@ -59,7 +62,7 @@ class KeyDiagnostics:
               key_mapping['friendly_key'],
               key_mapping['key_path'])
 
-        self.key_diagnostics = map(get_diagnostic_for_key, self.KEY_MAPPINGS)
+        self.key_diagnostics = list(map(get_diagnostic_for_key, self.KEY_MAPPINGS))
 
     def perform_test(self, diagnostics_report: DiagnosticsReport) -> None:
         for key_diagnostic in self.key_diagnostics:
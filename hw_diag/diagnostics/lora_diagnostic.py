@@ -1,18 +1,23 @@
 from hm_pyhelper.diagnostics import DiagnosticsReport
 from hm_pyhelper.diagnostics.diagnostic import Diagnostic
-from hw_diag.utilities.hardware import lora_module_test
+from hw_diag.utilities.lora_status import lora_status_watcher
 
 
 class LoraDiagnostic(Diagnostic):
     # Diagnostics keys
     KEY = 'LOR'
     FRIENDLY_NAME = "lora"
+    STATUS_KEY = 'lora_status'
+    EXTRA_KEYS = [STATUS_KEY]
 
     def __init__(self):
         super(LoraDiagnostic, self).__init__(self.KEY, self.FRIENDLY_NAME)
 
     def perform_test(self, diagnostics_report: DiagnosticsReport) -> None:
-        if lora_module_test():
+        # Never waits for pktfwd, an unknown status is reported as a failure
+        status = lora_status_watcher.get_status()
+        diagnostics_report[self.STATUS_KEY] = lora_status_watcher.describe()
+        if status:
             diagnostics_report.record_result(True, self)
         else:
             diagnostics_report.record_failure(False, self)
@@ -3,7 +3,8 @@ from hm_pyhelper.diagnostics import DiagnosticsReport
 
 from hm_pyhelper.diagnostics.diagnostic import Diagnostic
 from hm_pyhelper.logger import get_logger
-from hw_diag.utilities.dbus_proxy.dbus_ids import DBusIds
+from hw_diag.utilities.diagnostic_cache import Volatility
+from hw_diag.utilities.hardware_inventory import hardware_inventory
 
 LOGGER = get_logger(__name__)
 
@@ -12,16 +13,7 @@ class LteDiagnostic(Diagnostic):
     # Diagnostics keys
     KEY = 'LTE'
     FRIENDLY_NAME = "lte"
-
-    MM_MODEM_CAPABILITY = {
-        'NONE': 0,
-        'POTS': 1 << 0,
-        'CDMA_EVDO': 1 << 1,
-        'GSM_UMTS': 1 << 2,
-        'LTE': 1 << 3,
-        'ADVANCED': 1 << 4,
-        'IRIDIUM': 1 << 5,
-        'ANY': 0xFFFFFFFF}
+    VOLATILITY = Volatility.SLOW
 
     NO_LTE_DEVICES_MSG = "ModemManager is working but, no LTE devices detected."
 
@@ -51,37 +43,6 @@ class LteDiagnostic(Diagnostic):
             diagnostics_report.record_failure(self.NO_LTE_DEVICES_MSG, self)
 
     def get_lte_devices(self) -> list:
-        lte_devices = []
-        system_bus = dbus.SystemBus()
-        proxy = system_bus.get_object(DBusIds.DBUS_MM1_SERVICE, DBusIds.DBUS_MM1_PATH)
-        manager = dbus.Interface(proxy, DBusIds.DBUS_OBJECTMANAGER_IF)
-        modems = manager.GetManagedObjects()
-
-        for modem in modems:
-            self.append_lte_device_from_modem(lte_devices, modem, system_bus)
-
+        lte_devices = [modem.as_device() for modem in hardware_inventory.lte_modems()]
         LOGGER.info(f"Found the following LTE Devices: {lte_devices}")
         return lte_devices
-
-    def append_lte_device_from_modem(self, lte_devices: list, modem: object,
-                                     system_bus: object) -> list:
-        modem_proxy = system_bus.get_object(DBusIds.DBUS_MM1_SERVICE, modem)
-        props_iface = dbus.Interface(modem_proxy, DBusIds.DBUS_PROPERTIES_IF)
-        props = props_iface.GetAll(DBusIds.DBUS_MM1_MODEM_IF)
-
-        model = props.get("Model")
-        manufacturer = props.get("Manufacturer")
-        capabilities = props.get("CurrentCapabilities")
-        equipment_id = props.get("EquipmentIdentifier")
-
-        is_lte = capabilities & self.MM_MODEM_CAPABILITY['LTE'] or \
-            capabilities & self.MM_MODEM_CAPABILITY['LTE_ADVANCED']
-
-        if is_lte:
-            lte_devices.append({
-                "Model": str(model),
-                "Manufacturer": str(manufacturer),
-                "EquipmentIdentifier": str(equipment_id)
-            })
-
-        return lte_devices
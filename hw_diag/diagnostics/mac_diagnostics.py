@@ -1,6 +1,7 @@
 from hm_pyhelper.diagnostics import DiagnosticsReport
 from hm_pyhelper.miner_param import get_mac_address
 from hm_pyhelper.diagnostics.diagnostic import Diagnostic
+from hw_diag.utilities.diagnostic_cache import Volatility
 
 
 class MacDiagnostic(Diagnostic):
@@ -29,6 +30,8 @@ class MacDiagnostics():
             'mac_filepath': '/sys/class/net/wlan0/address'
         }
     ]
+    KEYS = [mapping['key'] for mapping in INTERFACE_MAPPINGS]
+    VOLATILITY = Volatility.STATIC
 
     def __init__(self):
         def get_diagnostic_for_interface(interface_info: dict) -> Diagnostic:
@@ -37,7 +40,7 @@ class MacDiagnostics():
               interface_info['friendly_key'],
               interface_info['mac_filepath'])
 
-        self.mac_diagnostics = map(get_diagnostic_for_interface, self.INTERFACE_MAPPINGS)
+        self.mac_diagnostics = list(map(get_diagnostic_for_interface, self.INTERFACE_MAPPINGS))
 
     def perform_test(self, diagnostics_report: DiagnosticsReport) -> None:
         for mac_diagnostic in self.mac_diagnostics:
@@ -8,14 +8,17 @@ class PfDiagnostic(Diagnostic):
     FRIENDLY_NAME = "legacy_pass_fail"
 
     CHECK_KEYS = ["ECC", "E0", "BT", "LOR"]
+    DEPENDS_ON = CHECK_KEYS
 
     def __init__(self):
         super(PfDiagnostic, self).__init__(self.KEY, self.FRIENDLY_NAME)
 
     def perform_test(self, diagnostics_report: DiagnosticsReport) -> None:
         def get_result(key) -> bool:
+            # failed diagnostics record their (truthy) error message as the value
             return key in diagnostics_report and \
-                   diagnostics_report[key]
+                   diagnostics_report[key] and \
+                   not diagnostics_report.has_errors([key])
 
         all_passed = all(map(get_result, self.CHECK_KEYS))
 
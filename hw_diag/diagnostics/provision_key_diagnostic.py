@@ -1,7 +1,7 @@
 from hm_pyhelper.diagnostics import DiagnosticsReport
-from hm_pyhelper.miner_param import provision_key
 
 from hw_diag.diagnostics.pgp_signed_json_diagnostic import PgpSignedJsonDiagnostic
+from hw_diag.utilities.ecc_broker import ecc_broker
 from hw_diag.utilities.security import GnuPG
 
 KEY_PROVISIONING_KEY = 'provision_key'
@@ -26,7 +26,7 @@ class ProvisionKeyDiagnostic(PgpSignedJsonDiagnostic):
         slot = self.verified_json['slot']
         force = self.verified_json['force']
 
-        success, result = provision_key(slot=slot, force=force)
+        success, result = ecc_broker.provision_key(slot=slot, force=force)
         if success:
             diagnostics_report.record_result(result, self)
         else:
@@ -0,0 +1,126 @@
+"""
+Single list of the hardware diagnostics and of the consumers running them.
+
+/initFile.txt and the periodic snapshot (perform_hw_diagnostics) both build
+their diagnostics from here and run them through ConcurrentDiagnosticsReport.
+Results are cached per diagnostic in diagnostic_cache, so within its
+freshness window a probe made for one consumer serves the other as well,
+and concurrent runs for the same consumer are coalesced into one.
+"""
+from hm_pyhelper.diagnostics.diagnostic import Diagnostic
+
+from hw_diag.diagnostics.bt_diagnostic import BtDiagnostic
+from hw_diag.diagnostics.device_status_diagnostic import DeviceStatusDiagnostic
+from hw_diag.diagnostics.ecc_diagnostic import EccDiagnostic
+from hw_diag.diagnostics.env_var_diagnostics import EnvVarDiagnostics, EnvironmentDiagnostics
+from hw_diag.diagnostics.gateway_diagnostics import GatewayDiagnostics
+from hw_diag.diagnostics.key_diagnostics import KeyDiagnostics
+from hw_diag.diagnostics.lora_diagnostic import LoraDiagnostic
+from hw_diag.diagnostics.lte_diagnostic import LteDiagnostic
+from hw_diag.diagnostics.mac_diagnostics import MacDiagnostics
+from hw_diag.diagnostics.pf_diagnostic import PfDiagnostic
+from hw_diag.diagnostics.serial_number_diagnostic import SerialNumberDiagnostic, \
+    SbcSerialNumberDiagnostic
+from hw_diag.utilities.concurrent_diagnostics import ConcurrentDiagnosticsReport, \
+    get_diagnostic_keys, get_diagnostic_dependencies
+from hw_diag.utilities.single_flight import single_flight
+
+# Consumers
+INIT_FILE = 'init_file'
+SNAPSHOT = 'snapshot'
+
+DIAGNOSTICS_REGISTRY = [
+    (SerialNumberDiagnostic, {INIT_FILE}),
+    # The snapshot keeps its own serial and environment semantics: a cpuinfo
+    # fallback for the serial, None for unset variables and the versions.
+    (SbcSerialNumberDiagnostic, {SNAPSHOT}),
+    (EccDiagnostic, {INIT_FILE, SNAPSHOT}),
+    (MacDiagnostics, {INIT_FILE, SNAPSHOT}),
+    (EnvVarDiagnostics, {INIT_FILE}),
+    (EnvironmentDiagnostics, {SNAPSHOT}),
+    (BtDiagnostic, {INIT_FILE, SNAPSHOT}),
+    (LteDiagnostic, {INIT_FILE, SNAPSHOT}),
+    (LoraDiagnostic, {INIT_FILE, SNAPSHOT}),
+    (KeyDiagnostics, {INIT_FILE, SNAPSHOT}),
+    (DeviceStatusDiagnostic, {INIT_FILE}),
+    # The manufacturing tool runs without a gateway, keep it out of its verdict
+    (GatewayDiagnostics, {SNAPSHOT}),
+    (PfDiagnostic, {INIT_FILE, SNAPSHOT}),
+]
+
+
+def get_diagnostics(consumer: str) -> list:
+    return [diagnostic_class() for diagnostic_class, consumers in DIAGNOSTICS_REGISTRY
+            if consumer in consumers]
+
+
+def _run_diagnostics(consumer: str) -> ConcurrentDiagnosticsReport:
+    diagnostics_report = ConcurrentDiagnosticsReport(get_diagnostics(consumer))
+    diagnostics_report.perform_diagnostics()
+    return diagnostics_report
+
+
+def run_diagnostics(consumer: str) -> ConcurrentDiagnosticsReport:
+    """
+    Callers arriving while a run for the same consumer is in progress share
+    its report, which must therefore be treated as read only.
+    """
+    return single_flight.do('diagnostics:' + consumer, _run_diagnostics, consumer)
+
+
+def get_diagnostic_fields(diagnostic) -> list:
+    """
+    Every report key a diagnostic writes: its keys, the friendly keys of the
+    Diagnostic objects behind them and any EXTRA_KEYS it sets directly.
+    """
+    fields = get_diagnostic_keys(diagnostic) + list(getattr(diagnostic, 'EXTRA_KEYS', []))
+    fields.append(getattr(diagnostic, 'friendly_key', None))
+    # Composites keep the Diagnostic objects they wrap in a list attribute
+    for attribute in vars(diagnostic).values():
+        if isinstance(attribute, list):
+            fields += [sub.friendly_key for sub in attribute if isinstance(sub, Diagnostic)]
+    return list(dict.fromkeys(field for field in fields if field))
+
+
+def get_diagnostics_for_fields(fields: list) -> tuple:
+    """
+    Diagnostics producing the given report fields, along with the diagnostics
+    they depend on, and the fields no diagnostic produces.
+    """
+    diagnostics = [diagnostic_class() for diagnostic_class, _ in DIAGNOSTICS_REGISTRY]
+    producers = {}
+    for diagnostic in diagnostics:
+        for field in get_diagnostic_fields(diagnostic):
+            producers.setdefault(field, diagnostic)
+
+    needed = []
+    pending = list(fields)
+    unknown = []
+    while pending:
+        field = pending.pop(0)
+        producer = producers.get(field)
+        if producer is None:
+            unknown.append(field)
+        elif producer not in needed:
+            needed.append(producer)
+            pending += get_diagnostic_dependencies(producer)
+
+    # Keep the registry order
+    return [diagnostic for diagnostic in diagnostics if diagnostic in needed], unknown
+
+
+def _run_selected_diagnostics(diagnostics: list) -> ConcurrentDiagnosticsReport:
+    diagnostics_report = ConcurrentDiagnosticsReport(diagnostics)
+    diagnostics_report.perform_diagnostics()
+    return diagnostics_report
+
+
+def run_diagnostics_for_fields(fields: list) -> ConcurrentDiagnosticsReport:
+    """
+    Runs only what is needed to produce fields, unknown fields are ignored.
+    Concurrent runs of the same selection are coalesced like run_diagnostics.
+    """
+    diagnostics, _ = get_diagnostics_for_fields(fields)
+    selection = ','.join(type(diagnostic).__name__ for diagnostic in diagnostics)
+    return single_flight.do('diagnostics:fields:' + selection,
+                            _run_selected_diagnostics, diagnostics)
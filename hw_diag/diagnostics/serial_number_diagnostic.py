@@ -1,11 +1,14 @@
 from hm_pyhelper.diagnostics import DiagnosticsReport
 from hm_pyhelper.diagnostics.diagnostic import Diagnostic
+from hw_diag.utilities.diagnostic_cache import Volatility
+from hw_diag.utilities.hardware import fetch_serial_number, SERIAL_NOT_FOUND
 
 
 class SerialNumberDiagnostic(Diagnostic):
     # Diagnostics keys
     KEY = 'serial_number'
     FRIENDLY_NAME = "serial_number"
+    VOLATILITY = Volatility.STATIC
 
     SERIAL_FILEPATH = "/proc/device-tree/serial-number"
 
@@ -22,3 +25,18 @@ class SerialNumberDiagnostic(Diagnostic):
 
         except PermissionError as e:
             diagnostics_report.record_failure(e, self)
+
+
+class SbcSerialNumberDiagnostic(SerialNumberDiagnostic):
+    """
+    serial_number as the periodic snapshot and the rest of the app report it,
+    see hardware.get_serial_number: the device tree serial, or the
+    /proc/cpuinfo one where the device tree has no valid serial.
+    """
+
+    def perform_test(self, diagnostics_report: DiagnosticsReport) -> None:
+        serial_number = fetch_serial_number()
+        if serial_number == SERIAL_NOT_FOUND:
+            diagnostics_report.record_failure(serial_number, self)
+        else:
+            diagnostics_report.record_result(serial_number, self)
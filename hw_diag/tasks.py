@@ -1,19 +1,14 @@
 import logging
 import datetime
-import json
 
 from hm_pyhelper.hardware_definitions import variant_definitions
-from hm_pyhelper.miner_param import get_ethernet_addresses
 from hm_pyhelper.constants.diagnostics import GATEWAY_REGION_KEY
-from hw_diag.utilities.hardware import detect_ecc
-from hw_diag.utilities.hardware import get_serial_number
-from hw_diag.utilities.hardware import lora_module_test
-from hw_diag.utilities.hardware import set_diagnostics_bt_lte
 from hw_diag.utilities.hardware import get_public_keys_and_ignore_errors
-from hw_diag.utilities.shell import get_environment_var
 from hw_diag.utilities.gcs_shipper import upload_diagnostics
-from hw_diag.diagnostics.gateway_diagnostics import GatewayDiagnostics
-from hm_pyhelper.diagnostics import DiagnosticsReport
+from hw_diag.utilities.lora_status import lora_status_watcher
+from hw_diag.utilities.snapshot_store import snapshot_store
+from hw_diag.utilities.diagnostics_history import diagnostics_history
+from hw_diag.diagnostics.registry import run_diagnostics, SNAPSHOT
 from hm_pyhelper.sbc import is_commercial_fleet, is_nebra_fleet
 
 
@@ -21,17 +16,23 @@ log = logging.getLogger()
 log.setLevel(logging.DEBUG)
 
 
-def perform_hw_diagnostics(ship=False):  # noqa: C901
-    log.info('Running periodic hardware diagnostics')
+def get_result(diagnostics_report, key, default=None):
+    """
+    Value recorded for key, or default if the diagnostic failed and recorded
+    an error message in its place.
+    """
+    if key not in diagnostics_report or diagnostics_report.has_errors([key]):
+        return default
+    return diagnostics_report[key]
 
-    diagnostics = [
-        GatewayDiagnostics()
-    ]
 
-    diagnostics_report = DiagnosticsReport(diagnostics)
-    diagnostics_report.perform_diagnostics()
+def perform_hw_diagnostics(ship=False):
+    log.info('Running periodic hardware diagnostics')
 
-    diagnostics = diagnostics_report
+    # Same diagnostics and result cache as /initFile.txt, see diagnostics.registry
+    diagnostics_report = run_diagnostics(SNAPSHOT)
+    # The report may be shared with concurrent callers, don't modify it
+    diagnostics = dict(diagnostics_report)
 
     if diagnostics_report.has_errors([GATEWAY_REGION_KEY]):
         # No region found, put a dummy region in
@@ -40,35 +41,26 @@ def perform_hw_diagnostics(ship=False):  # noqa: C901
     now = datetime.datetime.utcnow()
     diagnostics['last_updated'] = now.strftime("%H:%M UTC %d %b %Y")
 
-    get_ethernet_addresses(diagnostics)
-    get_environment_var(diagnostics)
-    get_serial_number(diagnostics)
-    detect_ecc(diagnostics)
-    public_keys = get_public_keys_and_ignore_errors()
-
-    diagnostics['LOR'] = lora_module_test()
-    diagnostics['OK'] = public_keys['key']
-    diagnostics['PK'] = public_keys['key']
-    diagnostics['AN'] = public_keys['name']
+    # The snapshot keeps its historical types (booleans, None for a missing
+    # key) where the diagnostics record device lists or error messages.
+    # ECC and PF are the registry's verdicts, the same as /initFile.txt reports:
+    # ECC is the gateway_mfr test passing, not just the chip answering on i2c,
+    # and PF is PfDiagnostic's, which doesn't check W0. See README.md.
+    diagnostics['E0'] = get_result(diagnostics_report, 'E0', False)
+    diagnostics['W0'] = get_result(diagnostics_report, 'W0', False)
+    diagnostics['ECC'] = get_result(diagnostics_report, 'ECC') is True
+    diagnostics['BT'] = bool(get_result(diagnostics_report, 'BT'))
+    diagnostics['LTE'] = bool(get_result(diagnostics_report, 'LTE'))
+    diagnostics['LOR'] = get_result(diagnostics_report, 'LOR') is True
+    diagnostics['PF'] = get_result(diagnostics_report, 'PF') is True
+    diagnostics['OK'] = get_result(diagnostics_report, 'OK')
+    diagnostics['PK'] = get_result(diagnostics_report, 'PK')
+    diagnostics['lora_status'] = lora_status_watcher.describe()
+    # served from the ECC broker cache, KeyDiagnostics has just read the keys
+    diagnostics['AN'] = get_public_keys_and_ignore_errors()['name']
     diagnostics['commercial_fleet'] = is_commercial_fleet()
     diagnostics['nebra_fleet'] = is_nebra_fleet()
 
-    set_diagnostics_bt_lte(diagnostics)
-
-    # Check the basics if they're fine and set an overall value
-    # Basics are: ECC valid, Mac addresses aren't FF, BT Is present,
-    # and LoRa hasn't failed
-    if (
-            diagnostics["ECC"] is True
-            and diagnostics["E0"] is not None
-            and diagnostics["W0"] is not None
-            and diagnostics["BT"] is True
-            and diagnostics["LOR"] is True
-    ):
-        diagnostics["PF"] = True
-    else:
-        diagnostics["PF"] = False
-
     # Add variant variables into diagnostics
     # These are variables from the hardware definitions file
     try:
@@ -77,9 +69,14 @@ def perform_hw_diagnostics(ship=False):  # noqa: C901
     except KeyError:
         pass
 
-    with open('diagnostic_data.json', 'w') as f:
-        json.dump(diagnostics, f)
+    # Atomic, and a no-op if nothing but the timestamp changed
+    snapshot_store.write(diagnostics)
+    try:
+        diagnostics_history.record(diagnostics)
+    except Exception as e:
+        log.error(f"Failed to record diagnostics history: {e}")
 
     upload_diagnostics(diagnostics, ship)
 
     log.info('Diagnostics complete')
+    return diagnostics
@@ -6,10 +6,15 @@ from hm_pyhelper.diagnostics.diagnostics_report import \
     DIAGNOSTICS_PASSED_KEY, DIAGNOSTICS_ERRORS_KEY, DiagnosticsReport
 
 from hw_diag.diagnostics.bt_diagnostic import BtDiagnostic
+from hw_diag.utilities.dbus_proxy.connection import dbus_connection
 
 
 class TestBtDiagnostic(unittest.TestCase):
 
+    def setUp(self):
+        # proxies cached by other tests hold on to their dbus mocks
+        dbus_connection.reset()
+
     @patch('dbus.SystemBus')
     @patch('dbus.Interface')
     def test_success(self, mock_interface, mock_sys_bus):
@@ -7,11 +7,18 @@ from hw_diag.diagnostics.ecc_diagnostic import EccDiagnostic
 from hm_pyhelper.exceptions import ECCMalfunctionException,\
     GatewayMFRFileNotFoundException
 from hm_pyhelper.lock_singleton import ResourceBusyError
+from hw_diag.utilities.ecc_broker import EccBroker
 
 
 class TestECCDiagnostic(unittest.TestCase):
+    def setUp(self):
+        # a fresh broker so results cached by other tests aren't reused
+        patcher = patch('hw_diag.diagnostics.ecc_diagnostic.ecc_broker', EccBroker())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
     @patch(
-      "hw_diag.diagnostics.ecc_diagnostic.get_gateway_mfr_test_result",
+      "hw_diag.utilities.ecc_broker.get_gateway_mfr_test_result",
       return_value={'result': 'pass'})
     def test_success(self, mock):
         diagnostic = EccDiagnostic()
@@ -25,7 +32,7 @@ class TestECCDiagnostic(unittest.TestCase):
         })
 
     @patch(
-      "hw_diag.diagnostics.ecc_diagnostic.get_gateway_mfr_test_result",
+      "hw_diag.utilities.ecc_broker.get_gateway_mfr_test_result",
       return_value={'result': 'fail'})
     def test_failure(self, mock):
         diagnostic = EccDiagnostic()
@@ -39,7 +46,7 @@ class TestECCDiagnostic(unittest.TestCase):
         })
 
     @patch(
-      "hw_diag.diagnostics.ecc_diagnostic.get_gateway_mfr_test_result",
+      "hw_diag.utilities.ecc_broker.get_gateway_mfr_test_result",
       return_value={
         'result': 'pass',
         'tests': {
@@ -63,7 +70,7 @@ class TestECCDiagnostic(unittest.TestCase):
         })
 
     @patch(
-        "hw_diag.diagnostics.ecc_diagnostic.get_gateway_mfr_test_result",
+        "hw_diag.utilities.ecc_broker.get_gateway_mfr_test_result",
         side_effect=ECCMalfunctionException("ECC Malfunctioned"))
     def test_ecc_exception(self, mock):
         diagnostic = EccDiagnostic()
@@ -77,7 +84,7 @@ class TestECCDiagnostic(unittest.TestCase):
         })
 
     @patch(
-        "hw_diag.diagnostics.ecc_diagnostic.get_gateway_mfr_test_result",
+        "hw_diag.utilities.ecc_broker.get_gateway_mfr_test_result",
         side_effect=GatewayMFRFileNotFoundException
         ("Gateway MFR File Not Found"))
     def test_gateway_exception(self, mock):
@@ -92,7 +99,7 @@ class TestECCDiagnostic(unittest.TestCase):
         })
 
     @patch(
-        "hw_diag.diagnostics.ecc_diagnostic.get_gateway_mfr_test_result",
+        "hw_diag.utilities.ecc_broker.get_gateway_mfr_test_result",
         side_effect=ResourceBusyError("Resource Busy Error"))
     def test_resourcebusy_exception(self, mock):
         diagnostic = EccDiagnostic()
@@ -106,7 +113,7 @@ class TestECCDiagnostic(unittest.TestCase):
         })
 
     @patch(
-        "hw_diag.diagnostics.ecc_diagnostic.get_gateway_mfr_test_result",
+        "hw_diag.utilities.ecc_broker.get_gateway_mfr_test_result",
         side_effect=UnboundLocalError("Unbound Local Error"))
     def test_unboundlocalerror_exception(self, mock):
         diagnostic = EccDiagnostic()
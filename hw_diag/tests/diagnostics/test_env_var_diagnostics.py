@@ -1,10 +1,11 @@
 import unittest
 import os
+from unittest.mock import patch
 from hm_pyhelper.diagnostics.diagnostics_report import \
     DIAGNOSTICS_PASSED_KEY, DIAGNOSTICS_ERRORS_KEY, DiagnosticsReport
 
 from hw_diag.diagnostics.env_var_diagnostics import \
-    EnvVarDiagnostic, EnvVarDiagnostics
+    EnvVarDiagnostic, EnvVarDiagnostics, EnvironmentDiagnostics
 
 
 class TestEnvVarDiagnostics(unittest.TestCase):
@@ -63,3 +64,17 @@ class TestEnvVarDiagnostics(unittest.TestCase):
             'FIRMWARE_SHORT_HASH': 'foo',
             'firmware_short_hash': 'foo'
         })
+
+
+class TestEnvironmentDiagnostics(unittest.TestCase):
+    @patch.dict(os.environ, {'VARIANT': 'NEBHNT-OUT1', 'MYST_VERSION': '1.2'}, clear=True)
+    def test_unset_variables_are_none(self):
+        diagnostics_report = DiagnosticsReport([EnvironmentDiagnostics()])
+        diagnostics_report.perform_diagnostics()
+
+        self.assertEqual(diagnostics_report['VA'], 'NEBHNT-OUT1')
+        self.assertEqual(diagnostics_report['myst_version'], '1.2')
+        self.assertIsNone(diagnostics_report['FW'])
+        self.assertIsNone(diagnostics_report['gatewayrs_version'])
+        self.assertNotIn('thingsix_version', diagnostics_report)
+        self.assertEqual(diagnostics_report[DIAGNOSTICS_ERRORS_KEY], [])
@@ -7,11 +7,18 @@ from hm_pyhelper.exceptions import ECCMalfunctionException
 from hm_pyhelper.lock_singleton import ResourceBusyError
 import pytest
 from hw_diag.diagnostics.key_diagnostics import KeyDiagnostic, KeyDiagnostics
+from hw_diag.utilities.ecc_broker import EccBroker
 
 
 class TestKeyDiagnostics(unittest.TestCase):
+    def setUp(self):
+        # a fresh broker so results cached by other tests aren't reused
+        patcher = patch('hw_diag.diagnostics.key_diagnostics.ecc_broker', EccBroker())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
     @patch(
-      "hw_diag.diagnostics.key_diagnostics.get_public_keys_rust",
+      "hw_diag.utilities.ecc_broker.get_public_keys_rust",
       return_value={'key_location': '123'})
     def test_success(self, mock):
         diagnostic = KeyDiagnostic('KK', 'test_key', 'key_location')
@@ -26,7 +33,7 @@ class TestKeyDiagnostics(unittest.TestCase):
         })
 
     @patch(
-      "hw_diag.diagnostics.key_diagnostics.get_public_keys_rust",
+      "hw_diag.utilities.ecc_broker.get_public_keys_rust",
       return_value={'different_location': '123'})
     def test_failure(self, mock):
         diagnostic = KeyDiagnostic('KK', 'test_key', 'key_location')
@@ -41,7 +48,7 @@ class TestKeyDiagnostics(unittest.TestCase):
         })
 
     @patch(
-      "hw_diag.diagnostics.key_diagnostics.get_public_keys_rust",
+      "hw_diag.utilities.ecc_broker.get_public_keys_rust",
       return_value={'key': '123'})
     def test_keys_success(self, mock):
         diagnostic = KeyDiagnostics()
@@ -4,35 +4,56 @@ from unittest.mock import patch
 from hm_pyhelper.diagnostics.diagnostics_report import \
     DIAGNOSTICS_PASSED_KEY, DIAGNOSTICS_ERRORS_KEY, DiagnosticsReport
 from hw_diag.diagnostics.lora_diagnostic import LoraDiagnostic
+from hw_diag.utilities.lora_status import LoraStatusWatcher
 
 
 class TestLoraDiagnostic(unittest.TestCase):
-    @patch(
-      "hw_diag.diagnostics.lora_diagnostic.lora_module_test",
-      return_value=True)
-    def test_success(self, mock):
-        diagnostic = LoraDiagnostic()
-        diagnostics_report = DiagnosticsReport([diagnostic])
-        diagnostics_report.perform_diagnostics()
+    def watcher_with_status(self, status):
+        watcher = LoraStatusWatcher('/nonexistent/diagnostics')
+        watcher._set_status(status)
+        return watcher
+
+    def test_success(self):
+        with patch("hw_diag.diagnostics.lora_diagnostic.lora_status_watcher",
+                   self.watcher_with_status(True)):
+            diagnostic = LoraDiagnostic()
+            diagnostics_report = DiagnosticsReport([diagnostic])
+            diagnostics_report.perform_diagnostics()
 
         self.assertDictEqual(diagnostics_report, {
             DIAGNOSTICS_PASSED_KEY: True,
             DIAGNOSTICS_ERRORS_KEY: [],
             'LOR': True,
-            'lora': True
+            'lora': True,
+            'lora_status': 'ok'
+        })
+
+    def test_failure(self):
+        with patch("hw_diag.diagnostics.lora_diagnostic.lora_status_watcher",
+                   self.watcher_with_status(False)):
+            diagnostic = LoraDiagnostic()
+            diagnostics_report = DiagnosticsReport([diagnostic])
+            diagnostics_report.perform_diagnostics()
+
+        self.assertDictEqual(diagnostics_report, {
+            DIAGNOSTICS_PASSED_KEY: False,
+            DIAGNOSTICS_ERRORS_KEY: ['LOR', 'lora'],
+            'LOR': False,
+            'lora': False,
+            'lora_status': 'failed'
         })
 
-    @patch(
-      "hw_diag.diagnostics.lora_diagnostic.lora_module_test",
-      return_value=False)
-    def test_failure(self, mock):
-        diagnostic = LoraDiagnostic()
-        diagnostics_report = DiagnosticsReport([diagnostic])
-        diagnostics_report.perform_diagnostics()
+    def test_pktfwd_not_started(self):
+        with patch("hw_diag.diagnostics.lora_diagnostic.lora_status_watcher",
+                   self.watcher_with_status(None)):
+            diagnostic = LoraDiagnostic()
+            diagnostics_report = DiagnosticsReport([diagnostic])
+            diagnostics_report.perform_diagnostics()
 
         self.assertDictEqual(diagnostics_report, {
             DIAGNOSTICS_PASSED_KEY: False,
             DIAGNOSTICS_ERRORS_KEY: ['LOR', 'lora'],
             'LOR': False,
-            'lora': False
+            'lora': False,
+            'lora_status': 'unknown (pktfwd not started)'
         })
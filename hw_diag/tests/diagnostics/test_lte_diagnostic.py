@@ -1,22 +1,23 @@
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 from dbus import DBusException
 
 from hm_pyhelper.diagnostics.diagnostics_report import \
     DIAGNOSTICS_PASSED_KEY, DIAGNOSTICS_ERRORS_KEY, DiagnosticsReport
 
 from hw_diag.diagnostics.lte_diagnostic import LteDiagnostic
+from hw_diag.utilities.dbus_proxy.connection import dbus_connection
 
 
 class TestLteDiagnostics(unittest.TestCase):
 
+    def setUp(self):
+        # proxies cached by other tests hold on to their dbus mocks
+        dbus_connection.reset()
+
     @patch('dbus.SystemBus')
     @patch('dbus.Interface')
     def test_success(self, mock_interface, mock_sys_bus):
-        # Make mocked modems
-        modem0 = MagicMock()
-        mock_modems = [modem0]
-
         # Properties of a mocked modem with LTE capability
         mock_modem0_properties = {
             'Model': 'QUECTEL Mobile Broadband Module',
@@ -27,8 +28,11 @@ class TestLteDiagnostics(unittest.TestCase):
 
         # Set mocked modems and their properties in dbus
         mock_interface = mock_interface.return_value
-        mock_interface.GetManagedObjects.return_value = mock_modems
-        mock_interface.GetAll.return_value = mock_modem0_properties
+        mock_interface.GetManagedObjects.return_value = {
+            '/org/freedesktop/ModemManager1/Modem/0': {
+                'org.freedesktop.ModemManager1.Modem': mock_modem0_properties
+            }
+        }
 
         diagnostic = LteDiagnostic()
         diagnostics_report = DiagnosticsReport([diagnostic])
@@ -50,12 +54,9 @@ class TestLteDiagnostics(unittest.TestCase):
     @patch('dbus.SystemBus')
     @patch('dbus.Interface')
     def test_failure_no_devices(self, mock_interface, mock_sys_bus):
-        # Make mocked modems
-        mocked_modems = []
-
         # Set mocked modems in dbus
         mocked_interface = mock_interface.return_value
-        mocked_interface.GetManagedObjects.return_value = mocked_modems
+        mocked_interface.GetManagedObjects.return_value = {}
 
         diagnostic = LteDiagnostic()
         diagnostics_report = DiagnosticsReport([diagnostic])
@@ -71,12 +72,9 @@ class TestLteDiagnostics(unittest.TestCase):
     @patch('dbus.SystemBus')
     @patch('dbus.Interface', side_effect=DBusException('Not authorized'))
     def test_failure_exception(self, mock_interface, mock_sys_bus):
-        # Make mocked modems
-        mocked_modems = []
-
         # Set mocked modems in dbus
         mocked_interface = mock_interface.return_value
-        mocked_interface.GetManagedObjects.return_value = mocked_modems
+        mocked_interface.GetManagedObjects.return_value = {}
 
         diagnostic = LteDiagnostic()
         diagnostics_report = DiagnosticsReport([diagnostic])
@@ -36,3 +36,14 @@ class TestPfDiagnostic(unittest.TestCase):
             'PF': False,
             'legacy_pass_fail': False,
         })
+
+    def test_failed_diagnostic_message_is_not_a_pass(self):
+        diagnostic = PfDiagnostic()
+        diagnostics_report = DiagnosticsReport([diagnostic])
+        for key in PfDiagnostic.CHECK_KEYS:
+            diagnostics_report[key] = True
+        diagnostics_report['ECC'] = 'gateway_mfr test finished with error'
+        diagnostics_report.append_error('ECC')
+        diagnostics_report.perform_diagnostics()
+
+        self.assertFalse(diagnostics_report['PF'])
@@ -0,0 +1,110 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from hm_pyhelper.diagnostics.diagnostic import Diagnostic
+
+from hw_diag.diagnostics.gateway_diagnostics import GatewayDiagnostics
+from hw_diag.diagnostics.pf_diagnostic import PfDiagnostic
+from hw_diag.diagnostics.env_var_diagnostics import EnvVarDiagnostics, EnvironmentDiagnostics
+from hw_diag.diagnostics.serial_number_diagnostic import SerialNumberDiagnostic, \
+    SbcSerialNumberDiagnostic
+from hw_diag.diagnostics.bt_diagnostic import BtDiagnostic
+from hw_diag.diagnostics.ecc_diagnostic import EccDiagnostic
+from hw_diag.diagnostics.lora_diagnostic import LoraDiagnostic
+from hw_diag.diagnostics.mac_diagnostics import MacDiagnostics
+from hw_diag.diagnostics.registry import get_diagnostics, run_diagnostics, \
+    get_diagnostics_for_fields, run_diagnostics_for_fields, INIT_FILE, SNAPSHOT
+from hw_diag.utilities.concurrent_diagnostics import ConcurrentDiagnosticsReport
+from hw_diag.utilities.diagnostic_cache import DiagnosticResultCache, Volatility
+
+
+class CountingDiagnostic(Diagnostic):
+    VOLATILITY = Volatility.SLOW
+    calls = 0
+
+    def __init__(self):
+        super(CountingDiagnostic, self).__init__('ECC', 'ECC')
+
+    def perform_test(self, diagnostics_report):
+        CountingDiagnostic.calls += 1
+        diagnostics_report.record_result(True, self)
+
+
+class TestDiagnosticsRegistry(unittest.TestCase):
+
+    def test_consumers(self):
+        init_file = [type(diagnostic) for diagnostic in get_diagnostics(INIT_FILE)]
+        snapshot = [type(diagnostic) for diagnostic in get_diagnostics(SNAPSHOT)]
+
+        self.assertNotIn(GatewayDiagnostics, init_file)
+        self.assertIn(GatewayDiagnostics, snapshot)
+        self.assertIn(PfDiagnostic, init_file)
+        self.assertIn(PfDiagnostic, snapshot)
+        self.assertIn(SerialNumberDiagnostic, init_file)
+        self.assertIn(SbcSerialNumberDiagnostic, snapshot)
+        self.assertIn(EnvVarDiagnostics, init_file)
+        self.assertIn(EnvironmentDiagnostics, snapshot)
+
+    def test_fresh_instances(self):
+        first = get_diagnostics(INIT_FILE)
+        second = get_diagnostics(INIT_FILE)
+        self.assertFalse(any(a is b for a, b in zip(first, second)))
+
+    def test_probe_is_shared_between_consumers(self):
+        CountingDiagnostic.calls = 0
+        registry = [(CountingDiagnostic, {INIT_FILE, SNAPSHOT})]
+
+        with patch('hw_diag.diagnostics.registry.DIAGNOSTICS_REGISTRY', registry), \
+                patch.object(ConcurrentDiagnosticsReport, 'result_cache', DiagnosticResultCache()):
+            init_file_report = run_diagnostics(INIT_FILE)
+            snapshot_report = run_diagnostics(SNAPSHOT)
+
+        self.assertTrue(init_file_report['ECC'])
+        self.assertTrue(snapshot_report['ECC'])
+        self.assertEqual(CountingDiagnostic.calls, 1)
+
+    def test_concurrent_runs_are_coalesced(self):
+        runs = []
+
+        def slow_run(consumer):
+            runs.append(consumer)
+            time.sleep(0.2)
+            return {'consumer': consumer}
+
+        results = []
+        with patch('hw_diag.diagnostics.registry._run_diagnostics', slow_run):
+            threads = [threading.Thread(target=lambda: results.append(run_diagnostics(INIT_FILE)))
+                       for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(runs, [INIT_FILE])
+        self.assertEqual(results, [{'consumer': INIT_FILE}] * 3)
+
+    def test_diagnostics_for_fields(self):
+        diagnostics, unknown = get_diagnostics_for_fields(['bluetooth', 'lora_status', 'foo'])
+        self.assertEqual([type(diagnostic) for diagnostic in diagnostics],
+                         [BtDiagnostic, LoraDiagnostic])
+        self.assertEqual(unknown, ['foo'])
+
+    def test_diagnostics_for_fields_include_dependencies(self):
+        diagnostics, unknown = get_diagnostics_for_fields(['PF'])
+        self.assertEqual([type(diagnostic) for diagnostic in diagnostics],
+                         [EccDiagnostic, MacDiagnostics, BtDiagnostic, LoraDiagnostic, PfDiagnostic])
+        self.assertEqual(unknown, [])
+
+    def test_run_diagnostics_for_fields(self):
+        CountingDiagnostic.calls = 0
+        registry = [(CountingDiagnostic, {INIT_FILE}), (GatewayDiagnostics, {SNAPSHOT})]
+
+        with patch('hw_diag.diagnostics.registry.DIAGNOSTICS_REGISTRY', registry), \
+                patch.object(ConcurrentDiagnosticsReport, 'result_cache', DiagnosticResultCache()):
+            report = run_diagnostics_for_fields(['ECC'])
+
+        self.assertTrue(report['ECC'])
+        self.assertNotIn('RE', report)
+        self.assertEqual(CountingDiagnostic.calls, 1)
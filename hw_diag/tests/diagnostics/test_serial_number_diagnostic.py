@@ -3,7 +3,8 @@ from unittest.mock import patch, mock_open
 
 from hm_pyhelper.diagnostics.diagnostics_report import \
     DIAGNOSTICS_PASSED_KEY, DIAGNOSTICS_ERRORS_KEY, DiagnosticsReport
-from hw_diag.diagnostics.serial_number_diagnostic import SerialNumberDiagnostic
+from hw_diag.diagnostics.serial_number_diagnostic import SerialNumberDiagnostic, \
+    SbcSerialNumberDiagnostic
 
 VALID_CPU_PROC = """00000000ddd1a4c2"""
 PADDED_CPU_PROC = "%s\x00" % VALID_CPU_PROC
@@ -64,3 +65,25 @@ class TestSerialNumberDiagnostic(unittest.TestCase):
             'serial_number': 'Bad permissions',
             'serial_number': 'Bad permissions'
         })
+
+
+class TestSbcSerialNumberDiagnostic(unittest.TestCase):
+
+    @patch("hw_diag.diagnostics.serial_number_diagnostic.fetch_serial_number",
+           return_value=VALID_CPU_PROC)
+    def test_success(self, mock):
+        diagnostics_report = DiagnosticsReport([SbcSerialNumberDiagnostic()])
+        diagnostics_report.perform_diagnostics()
+
+        self.assertEqual(diagnostics_report['serial_number'], VALID_CPU_PROC)
+        self.assertEqual(diagnostics_report[DIAGNOSTICS_ERRORS_KEY], [])
+
+    @patch("hw_diag.diagnostics.serial_number_diagnostic.fetch_serial_number",
+           return_value="Serial number not found")
+    def test_not_found(self, mock):
+        diagnostics_report = DiagnosticsReport([SbcSerialNumberDiagnostic()])
+        diagnostics_report.perform_diagnostics()
+
+        # the value the snapshot has always shown, now also recorded as an error
+        self.assertEqual(diagnostics_report['serial_number'], "Serial number not found")
+        self.assertIn('serial_number', diagnostics_report[DIAGNOSTICS_ERRORS_KEY])
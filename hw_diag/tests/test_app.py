@@ -1,5 +1,6 @@
 import unittest
 import os
+import tempfile
 from flask import Flask
 from unittest.mock import patch
 from unittest.mock import call
@@ -29,6 +30,16 @@ class TestGetApp(unittest.TestCase):
         app = get_app(__name__)
         self.assertIsInstance(app, Flask)
 
+    @patch('alembic.command.upgrade')
+    def test_workers_share_session_key(self, mock_alembic):
+        with tempfile.TemporaryDirectory() as lock_dir, \
+                patch('hw_diag.utilities.process_lock.LOCK_DIR', lock_dir):
+            worker = get_app(__name__, lean_initializations=False)
+            other_worker = get_app(__name__, lean_initializations=False)
+
+        self.assertTrue(worker.secret_key)
+        self.assertEqual(worker.secret_key, other_worker.secret_key)
+
     @patch('flask.Flask.register_blueprint')
     @patch('alembic.command.upgrade')
     def test_blueprints_registered(
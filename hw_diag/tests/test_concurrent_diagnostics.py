@@ -0,0 +1,192 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from hm_pyhelper.diagnostics.diagnostic import Diagnostic
+from hm_pyhelper.diagnostics.diagnostics_report import \
+    DIAGNOSTICS_PASSED_KEY, DIAGNOSTICS_ERRORS_KEY
+
+from hw_diag.diagnostics.pf_diagnostic import PfDiagnostic
+from hw_diag.utilities.concurrent_diagnostics import ConcurrentDiagnosticsReport
+from hw_diag.utilities.diagnostic_metrics import DiagnosticMetrics
+
+
+class ValueDiagnostic(Diagnostic):
+    def __init__(self, key, value, delay=0, started=None):
+        super(ValueDiagnostic, self).__init__(key, key.lower())
+        self.value = value
+        self.delay = delay
+        self.started = started
+
+    def perform_test(self, diagnostics_report):
+        if self.started is not None:
+            self.started.set()
+        time.sleep(self.delay)
+        diagnostics_report.record_result(self.value, self)
+
+
+class BlockingDiagnostic(Diagnostic):
+    TIMEOUT = 0.2
+
+    def __init__(self, key, release):
+        super(BlockingDiagnostic, self).__init__(key, key.lower())
+        self.release = release
+
+    def perform_test(self, diagnostics_report):
+        self.release.wait(5)
+        diagnostics_report.record_result(True, self)
+
+
+class RaisingDiagnostic(Diagnostic):
+    def perform_test(self, diagnostics_report):
+        raise Exception('boom')
+
+
+class CompositeDiagnostic:
+    KEYS = ['C1', 'C2']
+
+    def perform_test(self, diagnostics_report):
+        for key in self.KEYS:
+            diagnostics_report.record_result(key, Diagnostic(key, key.lower()))
+
+
+class TestConcurrentDiagnosticsReport(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = DiagnosticMetrics()
+        patcher = patch.object(ConcurrentDiagnosticsReport, 'metrics', self.metrics)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_independent_diagnostics_run_concurrently(self):
+        diagnostics = [ValueDiagnostic(key, True, delay=0.5)
+                       for key in ['ECC', 'E0', 'BT', 'LOR']]
+        report = ConcurrentDiagnosticsReport(diagnostics)
+
+        start = time.monotonic()
+        report.perform_diagnostics()
+
+        self.assertLess(time.monotonic() - start, 1.5)
+        self.assertTrue(report[DIAGNOSTICS_PASSED_KEY])
+        self.assertEqual(report[DIAGNOSTICS_ERRORS_KEY], [])
+        self.assertTrue(report['bt'])
+
+    def test_dependent_diagnostic_sees_dependencies(self):
+        # PfDiagnostic listed first still waits for the keys it checks
+        diagnostics = [PfDiagnostic()] + [ValueDiagnostic(key, True, delay=0.1)
+                                          for key in PfDiagnostic.CHECK_KEYS]
+        report = ConcurrentDiagnosticsReport(diagnostics)
+        report.perform_diagnostics()
+
+        self.assertTrue(report['PF'])
+        self.assertTrue(report['legacy_pass_fail'])
+        self.assertTrue(report[DIAGNOSTICS_PASSED_KEY])
+
+    def test_dependent_diagnostic_fails_with_dependency(self):
+        diagnostics = [ValueDiagnostic('ECC', True), ValueDiagnostic('E0', True),
+                       ValueDiagnostic('BT', True), ValueDiagnostic('LOR', False),
+                       PfDiagnostic()]
+        report = ConcurrentDiagnosticsReport(diagnostics)
+        report.perform_diagnostics()
+
+        self.assertFalse(report['PF'])
+        self.assertIn('PF', report[DIAGNOSTICS_ERRORS_KEY])
+
+    def test_timed_out_diagnostic_is_recorded_as_failure(self):
+        release = threading.Event()
+        diagnostics = [BlockingDiagnostic('LOR', release), ValueDiagnostic('ECC', True)]
+        report = ConcurrentDiagnosticsReport(diagnostics)
+
+        start = time.monotonic()
+        report.perform_diagnostics()
+        elapsed = time.monotonic() - start
+        release.set()
+
+        self.assertLess(elapsed, 2)
+        self.assertFalse(report[DIAGNOSTICS_PASSED_KEY])
+        self.assertIn('LOR', report[DIAGNOSTICS_ERRORS_KEY])
+        self.assertIn('timed out', report['LOR'])
+        self.assertTrue(report['ECC'])
+
+    def test_late_result_of_timed_out_diagnostic_is_discarded(self):
+        release = threading.Event()
+        report = ConcurrentDiagnosticsReport([BlockingDiagnostic('LOR', release)])
+        report.perform_diagnostics()
+        release.set()
+        time.sleep(0.1)
+
+        self.assertIn('timed out', report['LOR'])
+
+    def test_raising_diagnostic_is_recorded_as_failure(self):
+        report = ConcurrentDiagnosticsReport([RaisingDiagnostic('LOR', 'lora'),
+                                              ValueDiagnostic('ECC', True)])
+        report.perform_diagnostics()
+
+        self.assertEqual(report['LOR'], 'boom')
+        self.assertIn('LOR', report[DIAGNOSTICS_ERRORS_KEY])
+        self.assertTrue(report['ECC'])
+
+    def test_composite_diagnostic(self):
+        report = ConcurrentDiagnosticsReport([CompositeDiagnostic()])
+        report.perform_diagnostics()
+
+        self.assertEqual(report['C1'], 'C1')
+        self.assertEqual(report['c2'], 'C2')
+        self.assertTrue(report[DIAGNOSTICS_PASSED_KEY])
+
+    @patch('hw_diag.utilities.concurrent_diagnostics.DEFAULT_DIAGNOSTIC_TIMEOUT', 0.2)
+    def test_composite_diagnostic_timeout_fails_all_keys(self):
+        release = threading.Event()
+
+        class BlockingComposite(CompositeDiagnostic):
+            def perform_test(self, diagnostics_report):
+                release.wait(5)
+
+        report = ConcurrentDiagnosticsReport([BlockingComposite()])
+        report.perform_diagnostics()
+        release.set()
+
+        self.assertEqual(report[DIAGNOSTICS_ERRORS_KEY], ['C1', 'C1', 'C2', 'C2'])
+
+    def test_dependency_cycle_is_recorded_as_failure(self):
+        first = ValueDiagnostic('A', True)
+        first.DEPENDS_ON = ['B']
+        second = ValueDiagnostic('B', True)
+        second.DEPENDS_ON = ['A']
+
+        report = ConcurrentDiagnosticsReport([first, second])
+        report.perform_diagnostics()
+
+        self.assertFalse(report[DIAGNOSTICS_PASSED_KEY])
+        self.assertIn('A', report[DIAGNOSTICS_ERRORS_KEY])
+        self.assertIn('B', report[DIAGNOSTICS_ERRORS_KEY])
+
+    def test_timings(self):
+        release = threading.Event()
+        diagnostics = [ValueDiagnostic('ECC', True, delay=0.1), ValueDiagnostic('BT', False),
+                       BlockingDiagnostic('LOR', release), RaisingDiagnostic('E0', 'eth')]
+        report = ConcurrentDiagnosticsReport(diagnostics)
+        report.perform_diagnostics()
+        release.set()
+
+        timings = report.timings
+        # kept off the report, which consumers serialise
+        self.assertNotIn('diagnostics_timings', report)
+        self.assertEqual({name: timing['outcome'] for name, timing in timings.items()},
+                         {'ECC': 'ok', 'BT': 'ok', 'LOR': 'timeout', 'E0': 'error'})
+        self.assertGreaterEqual(timings['ECC']['seconds'], 0.1)
+        self.assertLess(timings['ECC']['seconds'], 0.2)
+
+        metrics = self.metrics.as_dict()
+        self.assertEqual(metrics['ECC']['count'], 1)
+        self.assertEqual(metrics['ECC']['buckets']['0.25'], 1)
+        self.assertEqual(metrics['LOR']['outcomes']['timeout'], 1)
+        self.assertEqual(metrics['E0']['outcomes']['error'], 1)
+
+    def test_failed_outcome(self):
+        report = ConcurrentDiagnosticsReport([PfDiagnostic()])
+        report.perform_diagnostics()
+
+        self.assertEqual(report.timings['PF']['outcome'], 'failed')
+        self.assertEqual(self.metrics.as_dict()['PF']['outcomes']['failed'], 1)
@@ -0,0 +1,80 @@
+import asyncio
+import threading
+import unittest
+from unittest.mock import PropertyMock, patch
+
+from dbus import DBusException
+
+from hw_diag.utilities.dbus_proxy.aio import AsyncModem, AsyncNetworkManager, AsyncSystemd, run_sync
+from hw_diag.utilities.dbus_proxy.connection import DBusConnection, dbus_connection
+from hw_diag.utilities.dbus_proxy.dbus_ids import DBusIds
+
+
+MODEM_PATH = '/org/freedesktop/ModemManager1/Modem/0'
+
+
+@patch('dbus.SystemBus')
+@patch('dbus.Interface')
+class TestAsyncProxiesBlocking(unittest.TestCase):
+
+    def setUp(self):
+        dbus_connection.reset()
+
+    def test_same_results_as_sync(self, mock_interface, _):
+        mock_interface.return_value.state.return_value = 70
+        mock_interface.return_value.Command.return_value = '+QCFG: "servicedomain",2'
+        mock_interface.return_value.GetUnit.return_value = '/org/freedesktop/systemd1/unit/nm'
+
+        async def probe():
+            return await asyncio.gather(AsyncNetworkManager().get_connect_state(),
+                                        AsyncModem(MODEM_PATH).get_service_domain(),
+                                        AsyncSystemd().get_unit(DBusIds.NETWORK_MANAGER_UNIT_NAME))
+
+        state, domain, unit = run_sync(probe(), timeout=5)
+
+        self.assertEqual(state, 'Connected-Global')
+        self.assertEqual(domain, '2')
+        self.assertEqual(unit._path, '/org/freedesktop/systemd1/unit/nm')
+        mock_interface.return_value.Command.assert_called_once_with('AT+QCFG="servicedomain"', 2000)
+
+    def test_reconnects_once(self, mock_interface, _):
+        mock_interface.return_value.state.side_effect = [
+            DBusException('failed', name='org.freedesktop.DBus.Error.ServiceUnknown'), 20]
+
+        self.assertFalse(run_sync(AsyncNetworkManager().is_connected()))
+
+
+@patch('dbus.SystemBus')
+@patch('dbus.Interface')
+@patch.object(DBusConnection, 'signals_enabled', new_callable=PropertyMock, return_value=True)
+class TestAsyncProxiesNonBlocking(unittest.TestCase):
+
+    def setUp(self):
+        dbus_connection.reset()
+
+    def test_reply_delivered_from_mainloop_thread(self, _, mock_interface, __):
+        def command(*args, reply_handler, error_handler, **kwargs):
+            # replies arrive on the dbus main loop thread
+            threading.Timer(0.01, reply_handler, args=('Revision: EG25GGBR07A08M2G',)).start()
+
+        mock_interface.return_value.Command.side_effect = command
+
+        self.assertEqual(run_sync(AsyncModem(MODEM_PATH).get_fw_version(), timeout=5),
+                         'Revision: EG25GGBR07A08M2G')
+        self.assertEqual(mock_interface.return_value.Command.call_args.kwargs['timeout'], 3)
+
+    def test_error_reply_is_raised(self, _, mock_interface, __):
+        def command(*args, reply_handler, error_handler, **kwargs):
+            error_handler(DBusException('failed', name='org.freedesktop.ModemManager1.Error.Core.Failed'))
+
+        mock_interface.return_value.Command.side_effect = command
+
+        with self.assertRaises(DBusException):
+            run_sync(AsyncModem(MODEM_PATH).reset())
+
+    def test_timeout_without_reply(self, _, mock_interface, __):
+        async def probe():
+            return await AsyncModem(MODEM_PATH).at_command('AT', timeout=1)
+
+        with self.assertRaises(asyncio.TimeoutError):
+            run_sync(probe(), timeout=0.05)
@@ -0,0 +1,107 @@
+import unittest
+from unittest.mock import patch
+
+from dbus import DBusException
+
+from hw_diag.utilities.dbus_proxy.connection import DBusConnection
+from hw_diag.utilities.dbus_proxy.dbus_ids import DBusIds
+
+
+def dbus_error(name):
+    return DBusException('failed', name=name)
+
+
+@patch('dbus.Interface')
+@patch('dbus.SystemBus')
+class TestDBusConnection(unittest.TestCase):
+
+    def test_bus_is_opened_once(self, mock_system_bus, _):
+        connection = DBusConnection()
+        connection.get_object(DBusIds.DBUS_NM_SERVICE, DBusIds.DBUS_NM_PATH)
+        connection.get_object(DBusIds.DBUS_MM1_SERVICE, DBusIds.DBUS_MM1_PATH)
+        connection.list_names()
+
+        mock_system_bus.assert_called_once()
+
+    def test_interfaces_are_reused(self, mock_system_bus, mock_interface):
+        connection = DBusConnection()
+        first = connection.get_interface(DBusIds.DBUS_NM_SERVICE, DBusIds.DBUS_NM_PATH,
+                                         DBusIds.DBUS_NM_IF)
+        second = connection.get_interface(DBusIds.DBUS_NM_SERVICE, DBusIds.DBUS_NM_PATH,
+                                          DBusIds.DBUS_NM_IF)
+        connection.get_properties_interface(DBusIds.DBUS_NM_SERVICE, DBusIds.DBUS_NM_PATH)
+
+        self.assertIs(first, second)
+        self.assertEqual(mock_interface.call_count, 2)
+        mock_system_bus.return_value.get_object.assert_called_once_with(
+            DBusIds.DBUS_NM_SERVICE, DBusIds.DBUS_NM_PATH)
+        stats = connection.stats()
+        # the second interface found the object proxy cached
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 3)
+        self.assertEqual(stats['cached_objects'], 1)
+        self.assertEqual(stats['cached_interfaces'], 2)
+
+    def test_call_reconnects_when_bus_drops(self, mock_system_bus, _):
+        connection = DBusConnection()
+        bus = connection.bus
+        calls = []
+
+        def func():
+            calls.append(connection.bus)
+            if len(calls) == 1:
+                raise dbus_error('org.freedesktop.DBus.Error.Disconnected')
+            return 'ok'
+
+        self.assertEqual(connection.call(func), 'ok')
+        self.assertEqual(len(calls), 2)
+        bus.close.assert_called_once()
+        self.assertEqual(mock_system_bus.call_count, 2)
+        self.assertEqual(connection.reconnects, 1)
+
+    def test_call_drops_proxies_when_service_restarted(self, mock_system_bus, _):
+        connection = DBusConnection()
+        connection.get_object(DBusIds.DBUS_MM1_SERVICE, DBusIds.DBUS_MM1_PATH)
+        attempts = []
+
+        def func():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise dbus_error('org.freedesktop.DBus.Error.ServiceUnknown')
+            return 'ok'
+
+        self.assertEqual(connection.call(func), 'ok')
+        self.assertEqual(connection.stats()['cached_objects'], 0)
+        # the bus itself is still fine and kept
+        mock_system_bus.return_value.close.assert_not_called()
+        mock_system_bus.assert_called_once()
+
+    def test_call_raises_other_errors(self, *_):
+        connection = DBusConnection()
+        attempts = []
+
+        def func():
+            attempts.append(1)
+            raise dbus_error('org.freedesktop.DBus.Error.AccessDenied')
+
+        with self.assertRaises(DBusException):
+            connection.call(func)
+        self.assertEqual(len(attempts), 1)
+        self.assertEqual(connection.reconnects, 0)
+
+    def test_signal_receivers_survive_reconnect(self, mock_system_bus, _):
+        connection = DBusConnection()
+        generation = connection.generation
+
+        def handler(*args):
+            pass
+
+        connection.add_signal_receiver(handler, signal_name='StateChanged')
+        connection.bus.add_signal_receiver.assert_called_once_with(handler, signal_name='StateChanged')
+
+        connection.reset()
+        mock_system_bus.return_value.add_signal_receiver.reset_mock()
+        connection.bus
+        mock_system_bus.return_value.add_signal_receiver.assert_called_once_with(
+            handler, signal_name='StateChanged')
+        self.assertNotEqual(connection.generation, generation)
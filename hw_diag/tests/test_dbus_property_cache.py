@@ -0,0 +1,125 @@
+import unittest
+from unittest.mock import patch
+
+from hw_diag.utilities.dbus_proxy.connection import dbus_connection
+from hw_diag.utilities.dbus_proxy.dbus_ids import DBusIds
+from hw_diag.utilities.dbus_proxy.property_cache import DBusPropertyCache
+
+
+MM = DBusIds.DBUS_MM1_SERVICE
+MODEM_PATH = '/org/freedesktop/ModemManager1/Modem/0'
+MODEM_IF = DBusIds.DBUS_MM1_MODEM_IF
+
+
+def managed_objects():
+    return {
+        MODEM_PATH: {
+            MODEM_IF: {'Model': 'EG25', 'State': 8},
+        }
+    }
+
+
+@patch('dbus.SystemBus')
+@patch('dbus.Interface')
+class TestDBusPropertyCache(unittest.TestCase):
+
+    def setUp(self):
+        dbus_connection.reset()
+
+    def test_mirror_is_loaded_once(self, mock_interface, _):
+        mock_interface.return_value.GetManagedObjects.return_value = managed_objects()
+        cache = DBusPropertyCache(poll_ttl=60)
+
+        self.assertEqual(cache.get_objects(MM, MODEM_IF), {MODEM_PATH: {'Model': 'EG25', 'State': 8}})
+        self.assertEqual(cache.get_property(MM, MODEM_PATH, MODEM_IF, 'Model'), 'EG25')
+
+        mock_interface.return_value.GetManagedObjects.assert_called_once()
+        mock_interface.return_value.GetAll.assert_not_called()
+        self.assertEqual(cache.loads, 1)
+
+    def test_mirror_expires_without_signals(self, mock_interface, _):
+        mock_interface.return_value.GetManagedObjects.return_value = managed_objects()
+        cache = DBusPropertyCache(poll_ttl=0)
+
+        cache.get_objects(MM, MODEM_IF)
+        cache.get_objects(MM, MODEM_IF)
+
+        self.assertEqual(mock_interface.return_value.GetManagedObjects.call_count, 2)
+
+    def test_reconnect_reloads_mirror(self, mock_interface, _):
+        mock_interface.return_value.GetManagedObjects.return_value = managed_objects()
+        cache = DBusPropertyCache(poll_ttl=60)
+
+        cache.get_objects(MM, MODEM_IF)
+        dbus_connection.reset()
+        cache.get_objects(MM, MODEM_IF)
+
+        self.assertEqual(cache.loads, 2)
+
+    def test_unmanaged_object_read_once(self, mock_interface, _):
+        mock_interface.return_value.GetManagedObjects.return_value = {}
+        mock_interface.return_value.GetAll.return_value = {'Gateway': '192.168.1.1'}
+        cache = DBusPropertyCache(poll_ttl=60)
+
+        for _ in range(2):
+            props = cache.get_properties(DBusIds.DBUS_NM_SERVICE, '/org/freedesktop/NetworkManager/IP4Config/1',
+                                         DBusIds.DBUS_NM_IPV4CONFIG_IF)
+            self.assertEqual(props, {'Gateway': '192.168.1.1'})
+
+        mock_interface.return_value.GetAll.assert_called_once_with(DBusIds.DBUS_NM_IPV4CONFIG_IF)
+
+    def test_signals_update_mirror(self, mock_interface, _):
+        mock_interface.return_value.GetManagedObjects.return_value = managed_objects()
+        cache = DBusPropertyCache(poll_ttl=60)
+        cache.get_objects(MM, MODEM_IF)
+
+        cache._on_properties_changed(MM, MODEM_IF, {'State': 11}, [], path=MODEM_PATH)
+        self.assertEqual(cache.get_property(MM, MODEM_PATH, MODEM_IF, 'State'), 11)
+
+        sim_path = '/org/freedesktop/ModemManager1/SIM/0'
+        cache._on_interfaces_added(MM, sim_path, {DBusIds.DBUS_MM1_SIM_IF: {'OperatorIdentifier': '310280'}})
+        self.assertIn(sim_path, cache.get_objects(MM, DBusIds.DBUS_MM1_SIM_IF))
+
+        cache._on_interfaces_removed(MM, MODEM_PATH, [MODEM_IF])
+        self.assertEqual(cache.get_objects(MM, MODEM_IF), {})
+
+        mock_interface.return_value.GetManagedObjects.assert_called_once()
+        self.assertEqual(cache.events, 3)
+
+    def test_invalidated_property_is_read_again(self, mock_interface, _):
+        updated = managed_objects()
+        updated[MODEM_PATH][MODEM_IF]['State'] = 3
+        mock_interface.return_value.GetManagedObjects.side_effect = [managed_objects(), updated]
+        cache = DBusPropertyCache(poll_ttl=60)
+        # kept current by signals, only an invalidation makes it reload
+        cache._subscribed = True
+        with patch.object(type(dbus_connection), 'signals_enabled', True):
+            cache.get_objects(MM, MODEM_IF)
+            cache._on_properties_changed(MM, MODEM_IF, {'Model': 'EG25-G'}, ['State'], path=MODEM_PATH)
+
+            self.assertEqual(cache.get_objects(MM, MODEM_IF), {MODEM_PATH: {'Model': 'EG25', 'State': 3}})
+            self.assertEqual(cache.get_property(MM, MODEM_PATH, MODEM_IF, 'State'), 3)
+
+        self.assertEqual(cache.loads, 2)
+        mock_interface.return_value.GetAll.assert_not_called()
+
+    def test_service_restart_drops_mirror(self, mock_interface, _):
+        mock_interface.return_value.GetManagedObjects.return_value = managed_objects()
+        cache = DBusPropertyCache(poll_ttl=60)
+        cache.get_objects(MM, MODEM_IF)
+
+        cache._on_name_owner_changed('org.example.Other', ':1.4', ':1.5')
+        cache.get_objects(MM, MODEM_IF)
+        self.assertEqual(cache.loads, 1)
+
+        cache._on_name_owner_changed(MM, ':1.4', ':1.5')
+        cache.get_objects(MM, MODEM_IF)
+        self.assertEqual(cache.loads, 2)
+
+    @patch('hw_diag.utilities.dbus_proxy.property_cache.dbus_connection.start_mainloop',
+           return_value=False)
+    def test_start_without_mainloop(self, *_):
+        cache = DBusPropertyCache()
+
+        self.assertFalse(cache.start())
+        self.assertFalse(cache.stats()['signals'])
@@ -0,0 +1,140 @@
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+from hm_pyhelper.diagnostics.diagnostic import Diagnostic
+
+from hw_diag.diagnostics.key_diagnostics import KeyDiagnostics
+from hw_diag.diagnostics.ecc_diagnostic import EccDiagnostic
+from hw_diag.diagnostics.pf_diagnostic import PfDiagnostic
+from hw_diag.utilities.concurrent_diagnostics import ConcurrentDiagnosticsReport
+from hw_diag.utilities.diagnostic_cache import DiagnosticResultCache, Volatility, \
+    get_diagnostic_ttl, FAILURE_TTL_SECONDS
+
+
+class CountingDiagnostic(Diagnostic):
+    VOLATILITY = Volatility.STATIC
+
+    def __init__(self, key, value=True):
+        super(CountingDiagnostic, self).__init__(key, key.lower())
+        self.value = value
+        self.calls = 0
+
+    def perform_test(self, diagnostics_report):
+        self.calls += 1
+        if self.value:
+            diagnostics_report.record_result(self.value, self)
+        else:
+            diagnostics_report.record_failure('failed', self)
+
+
+class TestDiagnosticResultCache(unittest.TestCase):
+
+    def test_ttls(self):
+        self.assertIsNone(get_diagnostic_ttl(KeyDiagnostics()))
+        self.assertEqual(get_diagnostic_ttl(EccDiagnostic()), 300)
+        self.assertEqual(get_diagnostic_ttl(PfDiagnostic()), 0)
+
+        diagnostic = PfDiagnostic()
+        diagnostic.CACHE_TTL = 42
+        self.assertEqual(get_diagnostic_ttl(diagnostic), 42)
+
+    @patch('hw_diag.utilities.diagnostic_cache.time.monotonic')
+    def test_entries_expire(self, mock_monotonic):
+        cache = DiagnosticResultCache()
+        mock_monotonic.return_value = 100
+        cache.set('slow', 'value', 10)
+        cache.set('static', 'value', None)
+        cache.set('volatile', 'value', 0)
+
+        mock_monotonic.return_value = 109
+        self.assertEqual(cache.get('slow'), 'value')
+        self.assertIsNone(cache.get('volatile'))
+
+        mock_monotonic.return_value = 110
+        self.assertIsNone(cache.get('slow'))
+        self.assertEqual(cache.get('static'), 'value')
+        self.assertEqual(cache.hits, 2)
+        self.assertEqual(cache.misses, 2)
+
+    @patch('hw_diag.utilities.diagnostic_cache.time.monotonic')
+    def test_failures_expire_sooner(self, mock_monotonic):
+        cache = DiagnosticResultCache()
+        mock_monotonic.return_value = 0
+        cache.get_or_compute('keys', None, lambda: {'key': None},
+                             is_failure=lambda keys: not keys['key'])
+
+        mock_monotonic.return_value = FAILURE_TTL_SECONDS
+        self.assertIsNone(cache.get('keys'))
+
+    def test_invalidate(self):
+        cache = DiagnosticResultCache()
+        cache.set('one', 1, None)
+        cache.set('two', 2, None)
+        cache.invalidate('one')
+        self.assertIsNone(cache.get('one'))
+        self.assertEqual(cache.get('two'), 2)
+        cache.invalidate()
+        self.assertIsNone(cache.get('two'))
+
+    def test_invalidate_reaches_other_workers(self):
+        with tempfile.TemporaryDirectory() as lock_dir, \
+                patch('hw_diag.utilities.process_lock.LOCK_DIR', lock_dir):
+            worker = DiagnosticResultCache()
+            other_worker = DiagnosticResultCache()
+            worker.set('keys', 'old', None)
+            other_worker.set('keys', 'old', None)
+
+            worker.invalidate()
+            self.assertIsNone(other_worker.get('keys'))
+            other_worker.set('keys', 'new', None)
+            self.assertEqual(other_worker.get('keys'), 'new')
+
+
+class TestCachedConcurrentDiagnosticsReport(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = DiagnosticResultCache()
+        patcher = patch.object(ConcurrentDiagnosticsReport, 'result_cache', self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_report(self, diagnostics):
+        report = ConcurrentDiagnosticsReport(diagnostics)
+        report.perform_diagnostics()
+        return report
+
+    def test_cached_result_is_reused(self):
+        diagnostic = CountingDiagnostic('ECC')
+        first = self.run_report([diagnostic])
+        second = self.run_report([diagnostic])
+
+        self.assertEqual(diagnostic.calls, 1)
+        self.assertEqual(first['ECC'], second['ECC'])
+        self.assertTrue(second['ecc'])
+        self.assertEqual(second.timings['ECC']['outcome'], 'cached')
+
+    def test_dependent_diagnostic_runs_after_cached_dependencies(self):
+        diagnostics = [CountingDiagnostic(key) for key in PfDiagnostic.CHECK_KEYS]
+        self.run_report(diagnostics + [PfDiagnostic()])
+        report = self.run_report(diagnostics + [PfDiagnostic()])
+
+        self.assertTrue(report['PF'])
+        self.assertEqual([diagnostic.calls for diagnostic in diagnostics], [1, 1, 1, 1])
+
+    def test_failures_are_cached_with_errors(self):
+        diagnostic = CountingDiagnostic('ECC', value=False)
+        self.run_report([diagnostic])
+        report = self.run_report([diagnostic])
+
+        self.assertEqual(diagnostic.calls, 1)
+        self.assertFalse(report.passed())
+        self.assertEqual(report['errors'], ['ECC', 'ecc'])
+
+    def test_invalidate_forces_rerun(self):
+        diagnostic = CountingDiagnostic('ECC')
+        self.run_report([diagnostic])
+        self.cache.invalidate()
+        self.run_report([diagnostic])
+
+        self.assertEqual(diagnostic.calls, 2)
@@ -0,0 +1,38 @@
+import unittest
+
+from hw_diag.utilities.diagnostic_metrics import DiagnosticMetrics, \
+    OUTCOME_OK, OUTCOME_TIMEOUT, OUTCOME_CACHED
+
+
+class TestDiagnosticMetrics(unittest.TestCase):
+
+    def test_histogram_buckets(self):
+        metrics = DiagnosticMetrics()
+        metrics.record('ECC', 0.003, OUTCOME_OK)
+        metrics.record('ECC', 0.3, OUTCOME_OK)
+        metrics.record('ECC', 120, OUTCOME_TIMEOUT)
+
+        ecc = metrics.as_dict()['ECC']
+        self.assertEqual(ecc['count'], 3)
+        self.assertEqual(ecc['buckets']['0.01'], 1)
+        self.assertEqual(ecc['buckets']['0.5'], 1)
+        self.assertEqual(ecc['buckets']['+Inf'], 1)
+        self.assertEqual(ecc['max_seconds'], 120)
+        self.assertEqual(ecc['outcomes'][OUTCOME_OK], 2)
+        self.assertEqual(ecc['outcomes'][OUTCOME_TIMEOUT], 1)
+        self.assertEqual(ecc['last'], {'seconds': 120, 'outcome': OUTCOME_TIMEOUT})
+
+    def test_cached_results_are_not_latencies(self):
+        metrics = DiagnosticMetrics()
+        metrics.record('BT', 0.0001, OUTCOME_CACHED)
+
+        bt = metrics.as_dict()['BT']
+        self.assertEqual(bt['count'], 0)
+        self.assertIsNone(bt['mean_seconds'])
+        self.assertEqual(bt['outcomes'][OUTCOME_CACHED], 1)
+
+    def test_reset(self):
+        metrics = DiagnosticMetrics()
+        metrics.record('BT', 1, OUTCOME_OK)
+        metrics.reset()
+        self.assertEqual(metrics.as_dict(), {})
@@ -0,0 +1,108 @@
+import datetime
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from hw_diag.database import BASE
+from hw_diag.database.models.diagnostics import DiagnosticsHistory
+from hw_diag.utilities.diagnostics_history import DiagnosticsHistoryStore
+
+
+START = datetime.datetime(2026, 1, 1)
+
+
+def minutes(n):
+    return START + datetime.timedelta(minutes=n)
+
+
+class TestDiagnosticsHistory(unittest.TestCase):
+
+    def setUp(self):
+        engine = create_engine('sqlite://')
+        BASE.metadata.create_all(engine)
+        self.sessionmaker = sessionmaker(bind=engine)
+        self.history = DiagnosticsHistoryStore(self.sessionmaker, keyframe_interval=3,
+                                               max_age_days=1, max_rows=100)
+
+    def rows(self):
+        session = self.sessionmaker()
+        try:
+            return session.query(DiagnosticsHistory).order_by(DiagnosticsHistory.id).all()
+        finally:
+            session.close()
+
+    def test_deltas_and_keyframes(self):
+        self.assertTrue(self.history.record({'ECC': True, 'BT': True, 'last_updated': 'a'}, minutes(0)))
+        self.assertFalse(self.history.record({'ECC': True, 'BT': True, 'last_updated': 'b'}, minutes(1)))
+        self.assertTrue(self.history.record({'ECC': False, 'BT': True}, minutes(2)))
+        self.assertTrue(self.history.record({'ECC': False}, minutes(3)))
+        self.assertTrue(self.history.record({'ECC': True}, minutes(4)))
+
+        rows = self.rows()
+        self.assertEqual([row.keyframe for row in rows], [True, False, False, True])
+        self.assertEqual(rows[1].data, '{"ECC": false}')
+        self.assertEqual(rows[2].data, '{}')
+        self.assertEqual(rows[2].removed, '["BT"]')
+        self.assertEqual(rows[3].data, '{"ECC": true}')
+
+    def test_query_reconstructs_snapshots(self):
+        self.history.record({'ECC': True, 'BT': True}, minutes(0))
+        self.history.record({'ECC': False, 'BT': True}, minutes(10))
+        self.history.record({'ECC': False, 'BT': False}, minutes(20))
+
+        history = self.history.query(minutes(5), minutes(30))
+        self.assertEqual([entry['dt'] for entry in history], [minutes(10), minutes(20)])
+        self.assertEqual(history[0]['diagnostics'], {'ECC': False, 'BT': True})
+        self.assertEqual(history[1]['diagnostics'], {'ECC': False, 'BT': False})
+
+        self.assertEqual(self.history.query(keys=['BT'])[0]['diagnostics'], {'BT': True})
+
+    def test_changes(self):
+        for n, value in enumerate([True, True, False, False, True]):
+            self.history.record({'ECC': value, 'BT': n}, minutes(n))
+
+        self.assertEqual(self.history.changes('ECC'), [
+            {'dt': minutes(0), 'value': True},
+            {'dt': minutes(2), 'value': False},
+            {'dt': minutes(4), 'value': True},
+        ])
+
+    def test_other_workers_continue_from_last_row(self):
+        self.history.record({'ECC': True, 'BT': True}, minutes(0))
+        other_worker = DiagnosticsHistoryStore(self.sessionmaker, keyframe_interval=3)
+
+        self.assertFalse(other_worker.record({'ECC': True, 'BT': True}, minutes(1)))
+        self.assertTrue(other_worker.record({'ECC': False, 'BT': True}, minutes(2)))
+        self.assertTrue(self.history.record({'ECC': False, 'BT': False}, minutes(3)))
+
+        rows = self.rows()
+        self.assertEqual([row.keyframe for row in rows], [True, False, False])
+        self.assertEqual(rows[1].data, '{"ECC": false}')
+
+    def test_missing_table_is_not_recorded(self):
+        engine = create_engine('sqlite://')
+        history = DiagnosticsHistoryStore(sessionmaker(bind=engine))
+
+        self.assertFalse(history.record({'ECC': True}, minutes(0)))
+
+    def test_prune_by_age_keeps_base_keyframe(self):
+        for n in range(5):
+            self.history.record({'BT': n}, minutes(n))
+        # keyframes at rows 1 and 4, the age cutoff falls after row 5
+        self.history.record({'BT': 5}, minutes(60 * 24 + 4))
+
+        rows = self.rows()
+        self.assertEqual([row.keyframe for row in rows], [True, False, False])
+        self.assertEqual(self.history.query()[-1]['diagnostics'], {'BT': 5})
+
+    def test_prune_by_size(self):
+        self.history.max_rows = 4
+        for n in range(10):
+            self.history.record({'BT': n}, minutes(n))
+
+        history = self.history.query()
+        self.assertLessEqual(len(history), 4 + 2)
+        self.assertEqual(history[0]['diagnostics'], {'BT': history[0]['diagnostics']['BT']})
+        self.assertTrue(self.rows()[0].keyframe)
+        self.assertEqual(history[-1]['diagnostics'], {'BT': 9})
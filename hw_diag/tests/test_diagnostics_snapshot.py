@@ -0,0 +1,167 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from hw_diag.utilities.diagnostics_snapshot import DiagnosticsSnapshot
+from hw_diag.utilities.snapshot_store import SnapshotStore
+
+
+class TestDiagnosticsSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.store = SnapshotStore(os.path.join(tmpdir.name, 'diagnostic_data.json'))
+        patcher = patch('hw_diag.utilities.diagnostics_snapshot.snapshot_store', self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        lock_patcher = patch('hw_diag.utilities.process_lock.LOCK_DIR', tmpdir.name)
+        lock_patcher.start()
+        self.addCleanup(lock_patcher.stop)
+
+    def test_empty_snapshot(self):
+        snapshot = DiagnosticsSnapshot()
+        self.assertIsNone(snapshot.get())
+        self.assertIsNone(snapshot.updated_at)
+        self.assertIsNone(snapshot.age_seconds())
+        self.assertIsNone(snapshot.freshness()['updated_at'])
+
+    @patch('hw_diag.utilities.diagnostics_snapshot.perform_hw_diagnostics',
+           return_value={'PF': True})
+    def test_refresh(self, mock_perform):
+        snapshot = DiagnosticsSnapshot()
+        snapshot.refresh(ship=True)
+        mock_perform.assert_called_once_with(ship=True)
+        self.assertEqual(snapshot.get(), {'PF': True})
+        self.assertIsNotNone(snapshot.updated_at)
+        self.assertGreaterEqual(snapshot.age_seconds(), 0)
+        self.assertFalse(snapshot.is_refreshing())
+
+    def test_get_returns_copy(self):
+        snapshot = DiagnosticsSnapshot()
+        snapshot.set({'PF': True})
+        diagnostics = snapshot.get()
+        diagnostics['PF'] = False
+        self.assertEqual(snapshot.get(), {'PF': True})
+
+    def test_changed_at_ignores_last_updated(self):
+        snapshot = DiagnosticsSnapshot()
+        snapshot.set({'PF': True, 'last_updated': 'a'})
+        changed_at = snapshot.changed_at
+        time.sleep(0.01)
+        snapshot.set({'PF': True, 'last_updated': 'b'})
+
+        self.assertEqual(snapshot.changed_at, changed_at)
+        self.assertGreater(snapshot.updated_at, changed_at)
+
+        snapshot.set({'PF': False, 'last_updated': 'c'})
+        self.assertEqual(snapshot.changed_at, snapshot.updated_at)
+
+    def test_request_refresh_in_background(self):
+        snapshot = DiagnosticsSnapshot()
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_diagnostics(ship):
+            started.set()
+            release.wait(5)
+            return {'PF': False}
+
+        with patch('hw_diag.utilities.diagnostics_snapshot.perform_hw_diagnostics',
+                   side_effect=slow_diagnostics) as mock_perform:
+            self.assertTrue(snapshot.request_refresh())
+            self.assertTrue(started.wait(5))
+            # neither a second request nor a scheduled refresh queue up behind it
+            self.assertFalse(snapshot.request_refresh(force=True))
+            self.assertIsNone(snapshot.refresh())
+            release.set()
+            snapshot.wait_refresh(5)
+
+        self.assertEqual(mock_perform.call_count, 1)
+        self.assertEqual(snapshot.get(), {'PF': False})
+        self.assertFalse(snapshot.is_refreshing())
+
+    def test_concurrent_requests_start_one_refresh(self):
+        snapshot = DiagnosticsSnapshot()
+        release = threading.Event()
+
+        def slow_diagnostics(ship):
+            release.wait(5)
+            return {'PF': True}
+
+        with patch('hw_diag.utilities.diagnostics_snapshot.perform_hw_diagnostics',
+                   side_effect=slow_diagnostics) as mock_perform:
+            results = []
+            callers = [threading.Thread(target=lambda: results.append(snapshot.request_refresh()))
+                       for _ in range(10)]
+            for caller in callers:
+                caller.start()
+            for caller in callers:
+                caller.join()
+            release.set()
+            snapshot.wait_refresh(5)
+
+        self.assertEqual(results.count(True), 1)
+        self.assertEqual(mock_perform.call_count, 1)
+
+    @patch('hw_diag.utilities.diagnostics_snapshot.perform_hw_diagnostics',
+           side_effect=Exception('boom'))
+    def test_failed_refresh_keeps_previous_snapshot_and_backs_off(self, mock_perform):
+        snapshot = DiagnosticsSnapshot()
+        snapshot.set({'PF': True})
+
+        self.assertTrue(snapshot.request_refresh())
+        snapshot.wait_refresh(5)
+        self.assertEqual(snapshot.get(), {'PF': True})
+        self.assertEqual(snapshot.last_error, 'boom')
+        self.assertFalse(snapshot.is_refreshing())
+
+        # page views don't retry straight away after a failure
+        self.assertFalse(snapshot.request_refresh())
+        self.assertEqual(mock_perform.call_count, 1)
+
+        # an explicit refresh still goes through
+        self.assertTrue(snapshot.request_refresh(force=True))
+        snapshot.wait_refresh(5)
+        self.assertEqual(mock_perform.call_count, 2)
+
+    @patch('hw_diag.utilities.diagnostics_snapshot.perform_hw_diagnostics',
+           return_value={'PF': True})
+    def test_backoff_after_success(self, mock_perform):
+        snapshot = DiagnosticsSnapshot()
+        snapshot.refresh()
+        self.assertFalse(snapshot.request_refresh())
+        self.assertIsNone(snapshot.last_error)
+        self.assertEqual(mock_perform.call_count, 1)
+
+    def test_report_stored_by_another_worker_is_picked_up(self):
+        snapshot = DiagnosticsSnapshot()
+        snapshot.set({'PF': False})
+        time.sleep(0.01)
+        # written by the worker that ran the refresh
+        self.store.write({'PF': True})
+
+        self.assertEqual(snapshot.get(), {'PF': True})
+        self.assertEqual(DiagnosticsSnapshot().get(), {'PF': True})
+
+    def test_own_newer_report_wins(self):
+        self.store.write({'PF': True})
+        time.sleep(0.01)
+        snapshot = DiagnosticsSnapshot()
+        snapshot.set({'PF': False})
+
+        self.assertEqual(snapshot.get(), {'PF': False})
+
+    @patch('hw_diag.utilities.diagnostics_snapshot.perform_hw_diagnostics',
+           return_value={'PF': True})
+    def test_refresh_skipped_while_another_worker_refreshes(self, mock_perform):
+        other_worker = DiagnosticsSnapshot()
+        self.assertTrue(other_worker._process_lock.acquire(blocking=False))
+        try:
+            self.assertIsNone(DiagnosticsSnapshot().refresh())
+        finally:
+            other_worker._process_lock.release()
+        mock_perform.assert_not_called()
@@ -0,0 +1,133 @@
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch, MagicMock
+
+from hm_pyhelper.lock_singleton import ResourceBusyError
+
+from hw_diag.utilities.ecc_broker import EccBroker
+
+
+class TestEccBroker(unittest.TestCase):
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        patcher = patch('hw_diag.utilities.process_lock.LOCK_DIR', tmpdir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch('hw_diag.utilities.ecc_broker.get_public_keys_rust',
+           return_value={'key': 'foo', 'name': 'bar'})
+    def test_public_keys_are_cached(self, get_keys):
+        broker = EccBroker()
+
+        self.assertEqual(broker.get_public_keys(), {'key': 'foo', 'name': 'bar'})
+        self.assertEqual(broker.get_public_keys(), {'key': 'foo', 'name': 'bar'})
+        get_keys.assert_called_once()
+
+    @patch('hw_diag.utilities.ecc_broker.get_public_keys_rust',
+           side_effect=[None, ResourceBusyError('busy'), {'key': 'foo'}])
+    def test_empty_and_failed_results_are_not_cached(self, get_keys):
+        broker = EccBroker()
+
+        self.assertIsNone(broker.get_public_keys())
+        with self.assertRaises(ResourceBusyError):
+            broker.get_public_keys()
+        self.assertEqual(broker.get_public_keys(), {'key': 'foo'})
+        self.assertEqual(get_keys.call_count, 3)
+
+    @patch('hw_diag.utilities.ecc_broker.get_gateway_mfr_test_result',
+           side_effect=[{'result': 'fail'}, {'result': 'pass'}])
+    def test_failed_mfr_test_is_not_cached(self, mfr_test):
+        broker = EccBroker()
+
+        self.assertEqual(broker.get_gateway_mfr_test_result()['result'], 'fail')
+        self.assertEqual(broker.get_gateway_mfr_test_result()['result'], 'pass')
+        self.assertEqual(broker.get_gateway_mfr_test_result()['result'], 'pass')
+        self.assertEqual(mfr_test.call_count, 2)
+
+    def test_concurrent_identical_requests_are_coalesced(self):
+        broker = EccBroker()
+        release = threading.Event()
+        get_keys = MagicMock(side_effect=lambda: release.wait(5) and {'key': 'foo'})
+        results = []
+
+        def call():
+            results.append(broker.call('public_keys', get_keys))
+
+        threads = [threading.Thread(target=call) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        # every caller is waiting on the first one
+        while broker._single_flight.shared < 4:
+            threading.Event().wait(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(results, [{'key': 'foo'}] * 5)
+        get_keys.assert_called_once()
+
+    def test_operations_are_serialised(self):
+        broker = EccBroker()
+        running = []
+        overlaps = []
+
+        def operation(name):
+            running.append(name)
+            overlaps.append(len(running))
+            threading.Event().wait(0.05)
+            running.remove(name)
+            return name
+
+        futures = [broker.submit(operation, f'op{i}') for i in range(4)]
+
+        self.assertEqual([future.result(5) for future in futures], ['op0', 'op1', 'op2', 'op3'])
+        self.assertEqual(overlaps, [1, 1, 1, 1])
+
+    @patch('hw_diag.utilities.ecc_broker.diagnostic_cache')
+    @patch('hw_diag.utilities.ecc_broker.provision_key', return_value=(True, 'provisioned'))
+    @patch('hw_diag.utilities.ecc_broker.get_public_keys_rust',
+           side_effect=[{'key': 'old'}, {'key': 'new'}])
+    def test_provisioning_invalidates_cached_results(self, get_keys, provision, mock_diagnostic_cache):
+        broker = EccBroker()
+
+        self.assertEqual(broker.get_public_keys(), {'key': 'old'})
+        self.assertEqual(broker.provision_key(slot=0, force=True), (True, 'provisioned'))
+        self.assertEqual(broker.get_public_keys(), {'key': 'new'})
+
+        provision.assert_called_once_with(slot=0, force=True)
+        mock_diagnostic_cache.invalidate.assert_called_once_with()
+
+    def test_operations_of_other_workers_are_serialised(self):
+        worker = EccBroker()
+        other_worker = EccBroker()
+        running = []
+        overlaps = []
+
+        def operation(name):
+            running.append(name)
+            overlaps.append(len(running))
+            threading.Event().wait(0.05)
+            running.remove(name)
+            return name
+
+        futures = [broker.submit(operation, f'op{i}')
+                   for i, broker in enumerate([worker, other_worker] * 2)]
+
+        self.assertEqual(sorted(future.result(5) for future in futures), ['op0', 'op1', 'op2', 'op3'])
+        self.assertEqual(overlaps, [1, 1, 1, 1])
+
+    @patch('hw_diag.utilities.ecc_broker.diagnostic_cache')
+    @patch('hw_diag.utilities.ecc_broker.provision_key', return_value=(True, 'provisioned'))
+    @patch('hw_diag.utilities.ecc_broker.get_public_keys_rust',
+           side_effect=[{'key': 'old'}, {'key': 'new'}])
+    def test_provisioning_invalidates_other_workers(self, get_keys, provision, mock_diagnostic_cache):
+        worker = EccBroker()
+        other_worker = EccBroker()
+
+        self.assertEqual(other_worker.get_public_keys(), {'key': 'old'})
+        worker.provision_key(slot=0, force=True)
+        self.assertEqual(other_worker.get_public_keys(), {'key': 'new'})
+        self.assertEqual(get_keys.call_count, 2)
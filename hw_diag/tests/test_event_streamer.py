@@ -46,7 +46,7 @@ class TestEventStreamer(unittest.TestCase):
         add_upload_failure_response()
         event_streamer.enqueue_persistent_event(valid_test_event())
         event_streamer.enqueue_persistent_event(valid_test_event())
-        self.assertEqual(event_streamer._event_queue.qsize(), 2)
+        self.assertEqual(event_streamer.qsize(), 2)
 
     @responses.activate
     def test_enqueue_with_upload_request_fail_success(self):
@@ -55,19 +55,19 @@ class TestEventStreamer(unittest.TestCase):
         # that means our queue should build up
         add_upload_failure_response()
         event_streamer.enqueue_persistent_event(valid_test_event())
-        self.assertEqual(event_streamer._event_queue.qsize(), 1)
+        self.assertEqual(event_streamer.qsize(), 1)
         # allow calls to response succeed
         add_upload_success_response()
         add_upload_success_response()
         event_streamer.enqueue_persistent_event(valid_test_event())
-        self.assertEqual(event_streamer._event_queue.qsize(), 0)
+        self.assertEqual(event_streamer.qsize(), 0)
 
     def test_enqueue_invalid_event(self):
         event_streamer.clear_queued_events()
         # make sure next two calls to upload will fail and queue builds up
         event_streamer.enqueue_persistent_event({})
         event_streamer.enqueue_persistent_event({})
-        self.assertEqual(event_streamer._event_queue.qsize(), 0)
+        self.assertEqual(event_streamer.qsize(), 0)
 
     @patch('hw_diag.utilities.event_streamer.EventStreamer.process_queued_events',
            side_effect=OSError('test exception'))
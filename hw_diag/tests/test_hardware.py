@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 
 import pytest
 from dbus import DBusException
@@ -15,12 +15,22 @@ from hw_diag.utilities.hardware import (
     is_external_antenna_enabled,
     set_external_antenna_enabled,
 )
+from hw_diag.utilities.ecc_broker import EccBroker
+from hw_diag.utilities.dbus_proxy.connection import dbus_connection
 
 
 class TestHardware(unittest.TestCase):
     ECC_I2C_DETECT_PATTERN = '60 --'
 
-    @patch('hw_diag.utilities.hardware.get_public_keys_rust')
+    def setUp(self):
+        # a fresh broker so results cached by other tests aren't reused
+        patcher = patch('hw_diag.utilities.hardware.ecc_broker', EccBroker())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # proxies cached by other tests hold on to their dbus mocks
+        dbus_connection.reset()
+
+    @patch('hw_diag.utilities.ecc_broker.get_public_keys_rust')
     def test_get_public_keys_no_error(self, mocked_get_public_keys_rust):
         mocked_get_public_keys_rust.return_value = {
             'key': 'foo',
@@ -31,7 +41,7 @@ class TestHardware(unittest.TestCase):
         self.assertEqual(keys['key'], 'foo')
         self.assertEqual(keys['name'], 'bar')
 
-    @patch('hw_diag.utilities.hardware.get_public_keys_rust')
+    @patch('hw_diag.utilities.ecc_broker.get_public_keys_rust')
     def test_get_public_keys_with_error(self, mocked_get_public_keys_rust):
         mocked_get_public_keys_rust.return_value = False
         keys = get_public_keys_and_ignore_errors()
@@ -137,9 +147,6 @@ class TestHardware(unittest.TestCase):
     @patch('dbus.SystemBus')
     @patch('dbus.Interface')
     def test_get_lte_devices_success(self, mocked_interface, _):
-        # Make mocked modems
-        modem0 = MagicMock()
-        mocked_modems = [modem0]
 
         # Properties of a mocked modem with LTE capability
         mocked_modem0_properties = {
@@ -151,8 +158,11 @@ class TestHardware(unittest.TestCase):
 
         # Set mocked modems and their properties in dbus
         mocked_interface = mocked_interface.return_value
-        mocked_interface.GetManagedObjects.return_value = mocked_modems
-        mocked_interface.GetAll.return_value = mocked_modem0_properties
+        mocked_interface.GetManagedObjects.return_value = {
+            '/org/freedesktop/ModemManager1/Modem/0': {
+                'org.freedesktop.ModemManager1.Modem': mocked_modem0_properties
+            }
+        }
 
         # Retrieve list of LTE devices
         lte_devices = get_lte_devices()
@@ -169,9 +179,6 @@ class TestHardware(unittest.TestCase):
     @patch('dbus.SystemBus')
     @patch('dbus.Interface')
     def test_get_lte_devices_missing_lte_capability(self, mocked_interface, _):
-        # Make mocked modems
-        modem0 = MagicMock()
-        mocked_modems = [modem0]
 
         # Properties of a mocked modem without LTE capability
         mocked_modem0_properties = {
@@ -183,8 +190,11 @@ class TestHardware(unittest.TestCase):
 
         # Set mocked modems and their properties in dbus
         mocked_interface = mocked_interface.return_value
-        mocked_interface.GetManagedObjects.return_value = mocked_modems
-        mocked_interface.GetAll.return_value = mocked_modem0_properties
+        mocked_interface.GetManagedObjects.return_value = {
+            '/org/freedesktop/ModemManager1/Modem/0': {
+                'org.freedesktop.ModemManager1.Modem': mocked_modem0_properties
+            }
+        }
 
         # Retrieve list of LTE devices
         lte_devices = get_lte_devices()
@@ -196,12 +206,9 @@ class TestHardware(unittest.TestCase):
     @patch('dbus.SystemBus')
     @patch('dbus.Interface')
     def test_get_lte_devices_no_devices(self, mocked_interface, _):
-        # Make mocked modems
-        mocked_modems = []
-
         # Set mocked modems in dbus
         mocked_interface = mocked_interface.return_value
-        mocked_interface.GetManagedObjects.return_value = mocked_modems
+        mocked_interface.GetManagedObjects.return_value = {}
 
         # Retrieve list of LTE devices
         lte_devices = get_lte_devices()
@@ -213,12 +220,9 @@ class TestHardware(unittest.TestCase):
     @patch('dbus.SystemBus')
     @patch('dbus.Interface', side_effect=DBusException('Not authorized'))
     def test_get_lte_devices_exception(self, mocked_interface, _):
-        # Make mocked modems
-        mocked_modems = []
-
         # Set mocked modems in dbus
         mocked_interface = mocked_interface.return_value
-        mocked_interface.GetManagedObjects.return_value = mocked_modems
+        mocked_interface.GetManagedObjects.return_value = {}
 
         # Retrieve list of LTE devices
         lte_devices = get_lte_devices()
@@ -230,10 +234,6 @@ class TestHardware(unittest.TestCase):
     @patch('dbus.SystemBus')
     @patch('dbus.Interface')
     def test_get_wifi_devices_success_state0(self, mocked_interface, _):
-        # Make mocked NetworkManager devices
-        nm_device0 = MagicMock()
-        mocked_nm_devices = [nm_device0]
-
         # Properties of a mocked NetworkManager device(WiFi)
         mocked_nm_device0_properties = {
             'Interface': 'wlx488ad22b280f',
@@ -254,8 +254,11 @@ class TestHardware(unittest.TestCase):
 
         # Set mocked NetworkManager devices and their properties in dbus
         mocked_interface = mocked_interface.return_value
-        mocked_interface.GetDevices.return_value = mocked_nm_devices
-        mocked_interface.GetAll.return_value = mocked_nm_device0_properties
+        mocked_interface.GetManagedObjects.return_value = {
+            '/org/freedesktop/NetworkManager/Devices/3': {
+                'org.freedesktop.NetworkManager.Device': mocked_nm_device0_properties
+            }
+        }
 
         # Retrieve list of WiFi devices
         wifi_devices = get_wifi_devices()
@@ -273,10 +276,6 @@ class TestHardware(unittest.TestCase):
     @patch('dbus.SystemBus')
     @patch('dbus.Interface')
     def test_get_wifi_devices_success_state1(self, mocked_interface, _):
-        # Make mocked NetworkManager devices
-        nm_device0 = MagicMock()
-        mocked_nm_devices = [nm_device0]
-
         # Properties of a mocked NetworkManager device(WiFi)
         mocked_nm_device0_properties = {
             'Interface': 'wlx488ad22b280f',
@@ -297,8 +296,11 @@ class TestHardware(unittest.TestCase):
 
         # Set mocked NetworkManager devices and their properties in dbus
         mocked_interface = mocked_interface.return_value
-        mocked_interface.GetDevices.return_value = mocked_nm_devices
-        mocked_interface.GetAll.return_value = mocked_nm_device0_properties
+        mocked_interface.GetManagedObjects.return_value = {
+            '/org/freedesktop/NetworkManager/Devices/3': {
+                'org.freedesktop.NetworkManager.Device': mocked_nm_device0_properties
+            }
+        }
 
         # Retrieve list of WiFi devices
         wifi_devices = get_wifi_devices()
@@ -316,10 +318,6 @@ class TestHardware(unittest.TestCase):
     @patch('dbus.SystemBus')
     @patch('dbus.Interface')
     def test_get_wifi_devices_no_wifi_devices(self, mocked_interface, _):
-        # Make mocked NetworkManager devices
-        nm_device0 = MagicMock()
-        mocked_nm_devices = [nm_device0]
-
         # Properties of a mocked NetworkManager device(Ethernet)
         mocked_nm_device0_properties = {
             'Interface': 'wlx488ad22b280f',
@@ -340,8 +338,11 @@ class TestHardware(unittest.TestCase):
 
         # Set mocked NetworkManager devices and their properties in dbus
         mocked_interface = mocked_interface.return_value
-        mocked_interface.GetDevices.return_value = mocked_nm_devices
-        mocked_interface.GetAll.return_value = mocked_nm_device0_properties
+        mocked_interface.GetManagedObjects.return_value = {
+            '/org/freedesktop/NetworkManager/Devices/3': {
+                'org.freedesktop.NetworkManager.Device': mocked_nm_device0_properties
+            }
+        }
 
         # Retrieve list of WiFi devices
         wifi_devices = get_wifi_devices()
@@ -353,12 +354,9 @@ class TestHardware(unittest.TestCase):
     @patch('dbus.SystemBus')
     @patch('dbus.Interface')
     def test_get_wifi_devices_no_nm_devices(self, mocked_interface, _):
-        # Make mocked NetworkManager devices
-        mocked_nm_devices = []
-
-        # Set mocked NetworkManager devices and their properties in dbus
+        # Set mocked NetworkManager devices in dbus
         mocked_interface = mocked_interface.return_value
-        mocked_interface.GetDevices.return_value = mocked_nm_devices
+        mocked_interface.GetManagedObjects.return_value = {}
 
         # Retrieve list of WiFi devices
         wifi_devices = get_wifi_devices()
@@ -370,12 +368,9 @@ class TestHardware(unittest.TestCase):
     @patch('dbus.SystemBus')
     @patch('dbus.Interface', side_effect=DBusException('Not authorized'))
     def test_get_wifi_devices_exception(self, mocked_interface, _):
-        # Make mocked NetworkManager devices
-        mocked_nm_devices = []
-
-        # Set mocked NetworkManager devices and their properties in dbus
+        # Set mocked NetworkManager devices in dbus
         mocked_interface = mocked_interface.return_value
-        mocked_interface.GetDevices.return_value = mocked_nm_devices
+        mocked_interface.GetManagedObjects.return_value = {}
 
         # Retrieve list of WiFi devices
         wifi_devices = get_wifi_devices()
@@ -0,0 +1,95 @@
+import unittest
+from unittest.mock import MagicMock
+
+from hw_diag.utilities.dbus_proxy.dbus_ids import DBusIds
+from hw_diag.utilities.hardware_inventory import HardwareInventory
+
+
+MODEM_PATH = '/org/freedesktop/ModemManager1/Modem/0'
+SIM_PATH = '/org/freedesktop/ModemManager1/SIM/0'
+
+MIRROR = {
+    DBusIds.DBUS_MM1_SERVICE: {
+        MODEM_PATH: {
+            DBusIds.DBUS_MM1_MODEM_IF: {
+                'Model': 'QUECTEL Mobile Broadband Module',
+                'Manufacturer': 'QUALCOMM INCORPORATED',
+                'Revision': 'EG25GGBR07A08M2G\n',
+                'CurrentCapabilities': 12,
+                'EquipmentIdentifier': '867698048214905',
+                'Sim': SIM_PATH,
+            }
+        },
+        '/org/freedesktop/ModemManager1/Modem/1': {
+            DBusIds.DBUS_MM1_MODEM_IF: {
+                'Model': 'Dial-up',
+                'CurrentCapabilities': 1,
+                'Sim': '/',
+            }
+        },
+        SIM_PATH: {
+            DBusIds.DBUS_MM1_SIM_IF: {'OperatorIdentifier': '310280', 'OperatorName': 'AT&T'}
+        },
+    },
+    DBusIds.DBUS_BLUEZ_SERVICE: {
+        '/org/bluez/hci0': {
+            DBusIds.DBUS_BLUEZ_ADAPTER_IF: {'Address': '00:E0:4C:19:D2:91', 'Name': 'ble0',
+                                            'Powered': 1, 'Discoverable': 0, 'Pairable': 1,
+                                            'Discovering': 0}
+        },
+    },
+    DBusIds.DBUS_NM_SERVICE: {
+        '/org/freedesktop/NetworkManager/Devices/2': {
+            DBusIds.DBUS_NM_DEVICE_IF: {'Interface': 'wlan0', 'DeviceType': 2, 'Driver': 'brcmfmac',
+                                        'State': 100}
+        },
+    },
+}
+
+
+def fake_cache():
+    cache = MagicMock()
+
+    def get_objects(service, interface):
+        return {path: interfaces[interface] for path, interfaces in MIRROR[service].items()
+                if interface in interfaces}
+
+    def get_properties(service, path, interface):
+        return MIRROR[service][path][interface]
+
+    cache.get_objects.side_effect = get_objects
+    cache.get_properties.side_effect = get_properties
+    return cache
+
+
+class TestHardwareInventory(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = fake_cache()
+        self.inventory = HardwareInventory(self.cache)
+
+    def test_modems(self):
+        modems = self.inventory.modems()
+
+        self.assertEqual(len(modems), 2)
+        modem = modems[0]
+        self.assertEqual(modem.path, MODEM_PATH)
+        self.assertEqual(modem.revision, 'EG25GGBR07A08M2G')
+        self.assertEqual(modem.sim_path, SIM_PATH)
+        self.assertTrue(modem.is_lte)
+        self.assertIsNone(modems[1].sim_path)
+        self.assertFalse(modems[1].is_lte)
+
+        self.assertEqual([m.as_device() for m in self.inventory.lte_modems()], [{
+            'Model': 'QUECTEL Mobile Broadband Module',
+            'Manufacturer': 'QUALCOMM INCORPORATED',
+            'EquipmentIdentifier': '867698048214905',
+        }])
+
+    def test_devices(self):
+        self.assertEqual(self.inventory.bt_adapters()[0].as_device()['Powered'], '1')
+        self.assertEqual(self.inventory.network_devices()[0].as_device(), {
+            'Interface': 'wlan0', 'Type': 'Wi-Fi', 'Driver': 'brcmfmac', 'State': 'Activated'})
+        # one read per service and interface, nothing per device
+        self.assertEqual(self.cache.get_objects.call_count, 2)
+        self.cache.get_properties.assert_not_called()
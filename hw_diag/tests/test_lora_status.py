@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from hw_diag.utilities.lora_status import LoraStatusWatcher, LORA_STATUS_UNKNOWN
+
+
+def write_status(path, status):
+    # write next to the file and rename, like an atomic update from pktfwd
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(status)
+    os.rename(tmp_path, path)
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+class TestLoraStatusWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+        self.path = os.path.join(self.tmp_dir, 'pktfwd', 'diagnostics')
+
+    def test_missing_file_is_unknown(self):
+        watcher = LoraStatusWatcher(self.path)
+        self.assertIsNone(watcher.get_status())
+        self.assertEqual(watcher.describe(), LORA_STATUS_UNKNOWN)
+        self.assertEqual(watcher.state()['status'], LORA_STATUS_UNKNOWN)
+
+    def test_read(self):
+        os.makedirs(os.path.dirname(self.path))
+        write_status(self.path, 'true')
+        watcher = LoraStatusWatcher(self.path)
+        self.assertTrue(watcher.get_status())
+
+        write_status(self.path, 'false')
+        self.assertFalse(watcher.read())
+        self.assertEqual(watcher.describe(), 'failed')
+
+    def test_history_records_transitions(self):
+        watcher = LoraStatusWatcher(self.path)
+        watcher._set_status(None)
+        watcher._set_status(True)
+        watcher._set_status(True)
+        watcher._set_status(False)
+
+        self.assertEqual([status for _, status in watcher.history()], [None, True, False])
+
+    def test_watcher_follows_file(self):
+        watcher = LoraStatusWatcher(self.path)
+        watcher.start()
+        self.addCleanup(watcher.stop, 5)
+
+        # directory created after the watcher started, like pktfwd starting late
+        with patch('hw_diag.utilities.lora_status.LORA_STATUS_POLL_SECONDS', 0.1):
+            os.makedirs(os.path.dirname(self.path))
+            write_status(self.path, 'true')
+            self.assertTrue(wait_for(lambda: watcher.get_status() is True))
+
+        write_status(self.path, 'false')
+        self.assertTrue(wait_for(lambda: watcher.get_status() is False))
+
+        os.remove(self.path)
+        self.assertTrue(wait_for(lambda: watcher.get_status() is None))
+
+    def test_polling_fallback(self):
+        watcher = LoraStatusWatcher(self.path)
+        with patch('hw_diag.utilities.lora_status.Inotify', side_effect=OSError('no inotify')), \
+                patch('hw_diag.utilities.lora_status.LORA_STATUS_POLL_SECONDS', 0.1):
+            watcher.start()
+            self.addCleanup(watcher.stop, 5)
+            os.makedirs(os.path.dirname(self.path))
+            write_status(self.path, 'true')
+            self.assertTrue(wait_for(lambda: watcher.get_status() is True))
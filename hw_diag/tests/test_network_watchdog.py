@@ -1,6 +1,9 @@
+import threading
+import time
 import unittest
 from unittest.mock import patch
 from icmplib import Host
+from hw_diag.utilities.dbus_proxy.connection import dbus_connection
 from hw_diag.utilities.dbus_proxy.network_manager import NetworkManager
 from hw_diag.utilities.dbus_proxy.systemd_unit import SystemDUnit
 from hw_diag.utilities.event_streamer import DiagEvent
@@ -10,6 +13,13 @@ from hw_diag.utilities.network_watchdog import NetworkWatchdog
 class TestNetworkWatchdog(unittest.TestCase):
     TEST_GATEWAY_IP = '192.168.1.1'             # NOSONAR
 
+    def setUp(self):
+        # proxies cached by other tests hold on to their dbus mocks
+        dbus_connection.reset()
+        patcher = patch('hw_diag.utilities.network_watchdog.ping_history')
+        self.ping_history = patcher.start()
+        self.addCleanup(patcher.stop)
+
     @patch('hw_diag.utilities.network_watchdog.ping', return_value=Host(address=TEST_GATEWAY_IP,
                                                                         packets_sent=4,
                                                                         rtts=[0.3, 0.4]))
@@ -72,7 +82,10 @@ class TestNetworkWatchdog(unittest.TestCase):
 
     @patch.object(NetworkWatchdog, 'is_local_network_connected', return_value=True)
     @patch.object(NetworkWatchdog, 'is_internet_connected', return_value=True)
-    def test_connection_success(self, _, __):
+    # get_current_network_state probes all targets itself
+    @patch.object(NetworkWatchdog, 'is_ping_reachable', return_value=True)
+    @patch.object(NetworkManager, 'get_gateways', return_value=[TEST_GATEWAY_IP])
+    def test_connection_success(self, _, __, ___, ____):
         watchdog = NetworkWatchdog()
         is_connected = watchdog.is_connected()
         self.assertTrue(is_connected)
@@ -81,7 +94,10 @@ class TestNetworkWatchdog(unittest.TestCase):
 
     @patch.object(NetworkWatchdog, 'is_local_network_connected', return_value=False)
     @patch.object(NetworkWatchdog, 'is_internet_connected', return_value=False)
-    def test_connection_fail(self, _, __):
+    # get_current_network_state probes all targets itself
+    @patch.object(NetworkWatchdog, 'is_ping_reachable', return_value=False)
+    @patch.object(NetworkManager, 'get_gateways', return_value=[TEST_GATEWAY_IP])
+    def test_connection_fail(self, _, __, ___, ____):
         watchdog = NetworkWatchdog()
         is_connected = watchdog.is_connected()
         self.assertFalse(is_connected)
@@ -97,7 +113,8 @@ class TestNetworkWatchdog(unittest.TestCase):
             watchdog.restart_network_manager()
             self.assertIn('Network manager restarted:', captured_logs.output[0])
 
-    @patch.object(NetworkWatchdog, 'is_local_network_connected', return_value=True)
+    @patch.object(NetworkWatchdog, 'get_current_network_state',
+                  return_value=DiagEvent.NETWORK_LOCAL_CONNECTED)
     @patch("dbus.SystemBus")
     @patch("dbus.Interface")
     def test_ensure_network_connection_connected(self, _, __, ___):
@@ -108,7 +125,8 @@ class TestNetworkWatchdog(unittest.TestCase):
             self.assertIn('OS has been up for', captured_logs.output[1])
             self.assertIn('Network is working.', captured_logs.output[2])
 
-    @patch.object(NetworkWatchdog, 'is_connected', return_value=False)
+    @patch.object(NetworkWatchdog, 'get_current_network_state',
+                  return_value=DiagEvent.NETWORK_DISCONNECTED)
     @patch.object(NetworkWatchdog, 'restart_network_manager')
     @patch("dbus.SystemBus")
     @patch("dbus.Interface")
@@ -120,3 +138,132 @@ class TestNetworkWatchdog(unittest.TestCase):
             self.assertIn('OS has been up for', captured_logs.output[1])
             self.assertIn(
                 'Network is not connected! Lost connectivity count=1', captured_logs.output[2])
+
+    @patch('hw_diag.utilities.network_watchdog.ping', side_effect=[
+        Host(address=TEST_GATEWAY_IP, packets_sent=1, rtts=[]),
+        Host(address=TEST_GATEWAY_IP, packets_sent=1, rtts=[0.3])])
+    def test_icmp_ping_retries_single_packets(self, mock_ping):
+        watchdog = NetworkWatchdog()
+        self.assertTrue(watchdog.is_ping_reachable(self.TEST_GATEWAY_IP))
+        self.assertEqual(mock_ping.call_count, 2)
+        self.ping_history.record.assert_called_once_with(self.TEST_GATEWAY_IP, 2, [0.3])
+        mock_ping.assert_called_with(self.TEST_GATEWAY_IP, count=1, timeout=NetworkWatchdog.PING_TIMEOUT)
+
+    @patch.object(NetworkManager, 'get_gateways', return_value=[TEST_GATEWAY_IP])
+    @patch("dbus.SystemBus")
+    @patch("dbus.Interface")
+    def test_state_decided_by_first_public_reply(self, _, __, ___):
+        release = threading.Event()
+
+        def is_ping_reachable(ip):
+            if ip == '8.8.8.8':
+                return True
+            # the other targets don't answer until the test is over
+            release.wait(5)
+            return False
+
+        watchdog = NetworkWatchdog()
+        started = time.monotonic()
+        with patch.object(NetworkWatchdog, 'is_ping_reachable', side_effect=is_ping_reachable):
+            self.assertEqual(watchdog.get_current_network_state(), DiagEvent.NETWORK_INTERNET_CONNECTED)
+        release.set()
+        self.assertLess(time.monotonic() - started, 1)
+
+    @patch.object(NetworkManager, 'get_gateways', return_value=[TEST_GATEWAY_IP])
+    @patch("dbus.SystemBus")
+    @patch("dbus.Interface")
+    def test_state_local_once_public_servers_failed(self, _, __, ___):
+        watchdog = NetworkWatchdog()
+        with patch.object(NetworkWatchdog, 'is_ping_reachable',
+                          side_effect=lambda ip: ip == self.TEST_GATEWAY_IP):
+            self.assertEqual(watchdog.get_current_network_state(), DiagEvent.NETWORK_LOCAL_CONNECTED)
+
+    @patch('hw_diag.utilities.network_watchdog.event_streamer')
+    @patch('hw_diag.utilities.metrics_context.system_metrics')
+    @patch.object(NetworkWatchdog, 'get_current_network_state',
+                  return_value=DiagEvent.NETWORK_DISCONNECTED)
+    @patch.object(NetworkWatchdog, 'restart_network_manager')
+    def test_ensure_network_connection_probes_once(self, _, mock_state, mock_metrics, mock_streamer):
+        mock_metrics.get_network_statistics.return_value = {'eth0': {'rx_errors': 1, 'tx_errors': 2}}
+        mock_metrics.get_balena_metrics.return_value = {'balena_api_status': 'success'}
+        mock_metrics.get_serial_number.return_value = '00000000a3e7kg80'
+        watchdog = NetworkWatchdog()
+        watchdog.lost_count = 0
+
+        watchdog.ensure_network_connection()
+
+        # the state decided on and the event sent come from the same probe
+        mock_state.assert_called_once()
+        mock_metrics.get_balena_metrics.assert_called_once()
+        mock_metrics.get_network_statistics.assert_called_once()
+        event = mock_streamer.enqueue_persistent_event.call_args.args[0]
+        self.assertEqual(event['network_state'], 'NETWORK_DISCONNECTED')
+        self.assertEqual(event['serial'], '00000000a3e7kg80')
+        self.assertEqual(event['balena_api_status'], 'success')
+
+    @patch('hw_diag.utilities.network_watchdog.event_streamer')
+    @patch('hw_diag.utilities.metrics_context.system_metrics')
+    @patch.object(NetworkWatchdog, 'get_current_network_state',
+                  return_value=DiagEvent.NETWORK_INTERNET_CONNECTED)
+    def test_heartbeat_uses_new_context(self, mock_state, mock_metrics, mock_streamer):
+        mock_metrics.get_network_statistics.return_value = {}
+        mock_metrics.get_balena_metrics.return_value = {}
+        watchdog = NetworkWatchdog()
+
+        watchdog.emit_heartbeat()
+        watchdog.emit_heartbeat()
+
+        self.assertEqual(mock_state.call_count, 2)
+        self.assertEqual(mock_streamer.enqueue_event.call_count, 2)
+
+    @patch('hw_diag.utilities.network_watchdog.event_streamer')
+    @patch('hw_diag.utilities.metrics_context.system_metrics')
+    @patch('hw_diag.utilities.network_watchdog.time.monotonic')
+    @patch.object(NetworkWatchdog, 'get_current_network_state',
+                  return_value=DiagEvent.NETWORK_DISCONNECTED)
+    @patch.object(NetworkWatchdog, 'restart_network_manager')
+    def test_escalation_paced_by_disconnected_time(self, mock_restart, _, mock_monotonic, mock_metrics, __):
+        mock_metrics.get_network_statistics.return_value = {}
+        mock_metrics.get_balena_metrics.return_value = {}
+        watchdog = NetworkWatchdog()
+        watchdog.lost_count = 0
+
+        # checks two minutes apart while disconnected
+        for minute in [0, 2, 4, 14]:
+            mock_monotonic.return_value = minute * 60
+            watchdog.ensure_network_connection()
+        self.assertEqual(watchdog.lost_count, 1)
+        mock_restart.assert_called_once()
+
+        mock_monotonic.return_value = 16 * 60
+        watchdog.ensure_network_connection()
+        self.assertEqual(watchdog.lost_count, 2)
+        self.assertEqual(mock_restart.call_count, 2)
+
+    @patch('hw_diag.utilities.network_watchdog.ping', return_value=Host(address=TEST_GATEWAY_IP,
+                                                                        packets_sent=1,
+                                                                        rtts=[0.3]))
+    @patch('hw_diag.utilities.network_watchdog.passive_connectivity')
+    @patch.object(NetworkWatchdog, 'is_ping_reachable')
+    @patch.object(NetworkManager, 'get_gateways', return_value=[TEST_GATEWAY_IP])
+    @patch("dbus.SystemBus")
+    @patch("dbus.Interface")
+    def test_passive_state_skips_reachability_pings(self, _, __, ___, mock_reachable, mock_passive,
+                                                    mock_ping):
+        watchdog = NetworkWatchdog()
+
+        mock_passive.classify.return_value = DiagEvent.NETWORK_INTERNET_CONNECTED
+        self.assertEqual(watchdog.get_current_network_state(), DiagEvent.NETWORK_INTERNET_CONNECTED)
+        mock_passive.classify.assert_called_once_with()
+        mock_reachable.assert_not_called()
+        # every target is still sampled once for the history, written once
+        self.assertEqual(sorted(ip for (ip, _, _), _ in self.ping_history.record.call_args_list),
+                         sorted(NetworkWatchdog.PUBLIC_SERVERS + [self.TEST_GATEWAY_IP]))
+        self.assertEqual(mock_ping.call_count, 3)
+        self.ping_history.flush.assert_called_once_with()
+
+        mock_passive.classify.return_value = None
+        mock_reachable.return_value = False
+        self.assertEqual(watchdog.get_current_network_state(), DiagEvent.NETWORK_DISCONNECTED)
+        self.assertEqual(mock_reachable.call_count, 3)
+        self.assertEqual(self.ping_history.flush.call_count, 2)
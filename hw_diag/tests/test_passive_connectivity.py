@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from hw_diag.utilities.event_streamer import DiagEvent
+from hw_diag.utilities.passive_connectivity import PassiveConnectivityTracker
+
+
+class TestPassiveConnectivityTracker(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.cache = MagicMock()
+        self.tracker = PassiveConnectivityTracker(self.cache)
+        self.tracker.SYS_NET_PATH = os.path.join(self.temp_dir.name, 'net')
+        self.set_carrier('lo', '1')
+
+    def set_nm(self, state, connectivity):
+        self.cache.get_property.side_effect = lambda service, path, interface, name: {
+            'State': state, 'Connectivity': connectivity}[name]
+
+    def set_carrier(self, interface, carrier):
+        os.makedirs(os.path.join(self.tracker.SYS_NET_PATH, interface), exist_ok=True)
+        with open(os.path.join(self.tracker.SYS_NET_PATH, interface, 'carrier'), 'w') as f:
+            f.write(carrier + '\n')
+
+    def test_internet(self):
+        self.set_nm(70, 4)
+        self.assertEqual(self.tracker.classify(), DiagEvent.NETWORK_INTERNET_CONNECTED)
+
+    def test_local_network_is_left_to_the_pings(self):
+        # the gateway's ARP entry is still complete (flags 0x2) once it goes
+        # STALE, a dead gateway looks the same as a live one
+        self.set_nm(50, 3)
+        self.set_carrier('wlan0', '1')
+        self.assertIsNone(self.tracker.classify())
+
+        self.set_nm(70, 3)
+        self.assertIsNone(self.tracker.classify())
+
+    def test_disconnected_needs_no_carrier(self):
+        self.set_nm(20, 1)
+        self.set_carrier('eth0', '0')
+        self.assertEqual(self.tracker.classify(), DiagEvent.NETWORK_DISCONNECTED)
+
+        # NetworkManager may be the problem, let the pings decide
+        self.set_carrier('eth0', '1')
+        self.assertIsNone(self.tracker.classify())
+
+    def test_ambiguous(self):
+        # connectivity checking disabled in NetworkManager
+        self.set_nm(70, 0)
+        self.assertIsNone(self.tracker.classify())
+
+        self.cache.get_property.side_effect = Exception('org.freedesktop.DBus.Error.ServiceUnknown')
+        self.assertIsNone(self.tracker.classify())
@@ -0,0 +1,94 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from hw_diag.utilities.ping_history import PingHistory, RingBuffer, summarize
+from hw_diag.utilities.snapshot_store import SnapshotStore
+
+
+class TestRingBuffer(unittest.TestCase):
+
+    def test_overwrites_oldest(self):
+        ring = RingBuffer(size=3)
+        for i in range(5):
+            ring.append(ts=i, rtt_avg=i * 10)
+
+        self.assertEqual(ring.count, 3)
+        self.assertEqual(ring.column('ts'), [2, 3, 4])
+        self.assertEqual([sample['rtt_avg'] for sample in ring.samples()], [20, 30, 40])
+
+    def test_percentiles_skip_lost_probes(self):
+        ring = RingBuffer(size=10)
+        for rtt in [5, 1, 4, 2, 3]:
+            ring.append(rtt_avg=rtt)
+        ring.append(loss=1.0)
+
+        self.assertEqual(ring.percentile('rtt_avg', 50), 3)
+        self.assertEqual(ring.percentile('rtt_avg', 90), 5)
+        self.assertEqual(ring.percentile('rtt_avg', 1), 1)
+        self.assertIsNone(ring.samples()[-1]['rtt_avg'])
+        self.assertIsNone(RingBuffer(size=2).percentile('rtt_avg', 50))
+
+    def test_summarize(self):
+        sample = summarize(4, [10.0, 14.0, 12.0])
+
+        self.assertEqual(sample['loss'], 0.25)
+        self.assertEqual((sample['rtt_min'], sample['rtt_avg'], sample['rtt_max']), (10.0, 12.0, 14.0))
+        self.assertEqual(sample['jitter'], 3.0)
+        self.assertNotIn('rtt_avg', summarize(2, []))
+
+
+class TestPingHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.path = os.path.join(self.temp_dir.name, 'ping_history.json')
+
+    def test_shared_through_store(self):
+        history = PingHistory(SnapshotStore(self.path), size=4)
+        history.record('8.8.8.8', 1, [12.5])
+        history.record('8.8.8.8', 2, [])
+        history.record('192.168.1.1', 1, [0.8])
+        self.assertFalse(os.path.exists(self.path))
+        self.assertTrue(history.flush())
+        self.assertFalse(history.flush())
+
+        # another worker reads what the probing one wrote
+        result = PingHistory(SnapshotStore(self.path), size=4).query([50])
+
+        self.assertEqual(sorted(result), ['192.168.1.1', '8.8.8.8'])
+        self.assertEqual(len(result['8.8.8.8']['samples']), 2)
+        self.assertEqual(result['8.8.8.8']['rtt_avg'], {'p50': 12.5})
+        self.assertEqual(result['8.8.8.8']['loss'], {'p50': 0.0})
+
+    def test_continues_after_restart(self):
+        before_restart = PingHistory(SnapshotStore(self.path), size=2)
+        before_restart.record('1.1.1.1', 1, [5.0])
+        before_restart.flush()
+        history = PingHistory(SnapshotStore(self.path), size=2)
+        history.record('1.1.1.1', 1, [6.0])
+        history.record('1.1.1.1', 1, [7.0])
+        history.flush()
+
+        samples = history.query()['1.1.1.1']['samples']
+        self.assertEqual([sample['rtt_avg'] for sample in samples], [6.0, 7.0])
+
+    def test_query_rebuilds_only_after_a_flush(self):
+        history = PingHistory(SnapshotStore(self.path), size=4)
+        history.record('8.8.8.8', 1, [12.5])
+        history.flush()
+        reader = PingHistory(SnapshotStore(self.path), size=4)
+
+        with patch.object(RingBuffer, 'from_samples', wraps=RingBuffer.from_samples) as from_samples:
+            reader.query()
+            reader.query()
+            self.assertEqual(from_samples.call_count, 1)
+
+            time.sleep(0.01)
+            history.record('8.8.8.8', 1, [13.5])
+            history.flush()
+            self.assertEqual(len(reader.query()['8.8.8.8']['samples']), 2)
+            self.assertEqual(from_samples.call_count, 2)
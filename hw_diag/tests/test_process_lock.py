@@ -0,0 +1,72 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from hw_diag.utilities.process_lock import InterProcessLock, LeaderElection, SharedGeneration, \
+    file_lock, shared_secret
+
+
+class TestProcessLock(unittest.TestCase):
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.lock_dir = tmpdir.name
+
+    def test_lock_is_exclusive(self):
+        # flock locks belong to the open file, two instances behave like two workers
+        first = InterProcessLock('test', self.lock_dir)
+        second = InterProcessLock('test', self.lock_dir)
+
+        self.assertTrue(first.acquire(blocking=False))
+        self.assertTrue(first.locked)
+        self.assertFalse(second.acquire(blocking=False))
+        self.assertFalse(second.locked)
+        first.release()
+        self.assertTrue(second.acquire(blocking=False))
+        second.release()
+
+    def test_file_lock(self):
+        with file_lock('test', self.lock_dir):
+            self.assertFalse(InterProcessLock('test', self.lock_dir).acquire(blocking=False))
+        self.assertTrue(os.path.exists(os.path.join(self.lock_dir, 'hm_diag_test.lock')))
+        self.assertTrue(InterProcessLock('test', self.lock_dir).acquire(blocking=False))
+
+    def test_shared_secret(self):
+        secret = shared_secret('session_key', self.lock_dir)
+
+        self.assertEqual(len(secret), 64)
+        self.assertEqual(shared_secret('session_key', self.lock_dir), secret)
+        self.assertNotEqual(shared_secret('other', self.lock_dir), secret)
+        path = os.path.join(self.lock_dir, 'hm_diag_session_key.secret')
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+        # removed by start_diagnostics.sh
+        os.unlink(path)
+        self.assertNotEqual(shared_secret('session_key', self.lock_dir), secret)
+
+    def test_shared_generation(self):
+        generation = SharedGeneration('cache', self.lock_dir)
+        other = SharedGeneration('cache', self.lock_dir)
+
+        self.assertEqual(generation.current(), 0)
+        bumped = generation.bump()
+        self.assertEqual(other.current(), bumped)
+        self.assertGreater(other.bump(), bumped)
+
+    def test_single_leader(self):
+        elected = []
+        leader = LeaderElection('scheduler', self.lock_dir)
+        follower = LeaderElection('scheduler', self.lock_dir)
+        follower_elected = threading.Event()
+
+        self.assertTrue(leader.run_when_leader(lambda: elected.append('leader')))
+        self.assertFalse(follower.run_when_leader(follower_elected.set, interval=0.05))
+        self.assertEqual(elected, ['leader'])
+        self.assertFalse(follower.is_leader)
+
+        # the leader going away hands over to the follower
+        leader.release()
+        self.assertTrue(follower_elected.wait(5))
+        self.assertTrue(follower.is_leader)
+        follower.release()
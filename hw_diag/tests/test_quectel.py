@@ -1,7 +1,7 @@
 from subprocess import CalledProcessError
 import unittest
 import os
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 
 from hw_diag.utilities.quectel import ensure_quectel_health, find_eg25g_modem
 from hw_diag.utilities.quectel import firmware_upgrade_with_rollback
@@ -10,6 +10,8 @@ from hw_diag.utilities.quectel import EG25G_DESIRED_FW
 from hw_diag.utilities.dbus_proxy.modem import Modem
 from hw_diag.utilities.dbus_proxy.sim import Sim
 from hw_diag.utilities.keystore import KeyStore
+from hw_diag.utilities.dbus_proxy.connection import dbus_connection
+from hw_diag.utilities.dbus_proxy.property_cache import dbus_property_cache
 
 
 MOCKED_STATE_FILE = "./tmp_fw_state"
@@ -22,18 +24,21 @@ class TestQuectel(unittest.TestCase):
     def setUp(self) -> None:
         if os.path.exists(MOCKED_STATE_FILE):
             os.remove(MOCKED_STATE_FILE)
+        # proxies cached by other tests hold on to their dbus mocks
+        dbus_connection.reset()
         return super().setUp()
 
     def mock_modem(self, mock_object, modem_properties):
-        # Make mocked modems
-        modem0 = MagicMock()
-        mocked_modems = [modem0]
-
         # Set mocked modems and their properties in dbus
         mocked_object = mock_object.return_value
-        mocked_object.GetManagedObjects.return_value = mocked_modems
-
+        mocked_object.GetManagedObjects.return_value = {
+            '/org/freedesktop/ModemManager1/Modem/0': {
+                'org.freedesktop.ModemManager1.Modem': modem_properties
+            }
+        }
         mocked_object.GetAll.return_value = modem_properties
+        # the modems changed, don't serve the previous ones from memory
+        dbus_property_cache.invalidate()
 
     @patch("dbus.SystemBus")
     @patch("dbus.Interface")
@@ -1,4 +1,5 @@
 import unittest
+from unittest.mock import patch
 from hw_diag.utilities.hardware import should_display_lte
 
 
@@ -15,3 +16,11 @@ class TestShouldDisplayLTE(unittest.TestCase):
         diagnostics = {'VA': variant}
         result = should_display_lte(diagnostics)
         self.assertFalse(result)
+
+    @patch('hw_diag.utilities.hardware.hardware_inventory')
+    def test_unknown_variant_with_lte_modem(self, mock_inventory):
+        mock_inventory.lte_modems.return_value = [object()]
+        self.assertTrue(should_display_lte({'VA': 'UNKNOWN'}))
+
+        mock_inventory.lte_modems.side_effect = Exception('ModemManager not running')
+        self.assertFalse(should_display_lte({'VA': 'UNKNOWN'}))
@@ -0,0 +1,68 @@
+import threading
+import time
+import unittest
+
+from hw_diag.utilities.single_flight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_concurrent_calls_share_one_computation(self):
+        single_flight = SingleFlight()
+        calls = []
+        results = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'PF': True}
+
+        threads = [threading.Thread(target=lambda: results.append(single_flight.do('init', compute)))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(single_flight.shared, 4)
+        self.assertFalse(single_flight.in_flight('init'))
+
+    def test_keys_are_independent(self):
+        single_flight = SingleFlight()
+        self.assertEqual(single_flight.do('a', lambda: 1), 1)
+        self.assertEqual(single_flight.do('b', lambda: 2), 2)
+        self.assertEqual(single_flight.calls, 2)
+
+    def test_exception_is_shared_and_not_cached(self):
+        single_flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        errors = []
+
+        def failing():
+            started.set()
+            release.wait(5)
+            raise ValueError('ecc busy')
+
+        def call():
+            try:
+                single_flight.do('init', failing)
+            except ValueError as e:
+                errors.append(e)
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=call)
+        follower.start()
+        while single_flight.shared == 0:
+            time.sleep(0.01)
+        release.set()
+        leader.join()
+        follower.join()
+
+        self.assertEqual(len(errors), 2)
+        self.assertEqual(single_flight.do('init', lambda: 'ok'), 'ok')
@@ -0,0 +1,67 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from hw_diag.utilities.snapshot_store import SnapshotStore
+
+
+class TestSnapshotStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, 'diagnostic_data.json')
+        self.store = SnapshotStore(self.path)
+
+    def test_missing_file(self):
+        with self.assertRaises(FileNotFoundError):
+            self.store.read()
+        self.assertIsNone(self.store.read_or_none())
+
+    def test_write_and_read(self):
+        self.assertTrue(self.store.write({'PF': True, 'last_updated': '10:00'}))
+
+        with open(self.path) as f:
+            self.assertEqual(json.load(f), {'PF': True, 'last_updated': '10:00'})
+        self.assertEqual(self.store.read(), {'PF': True, 'last_updated': '10:00'})
+        self.assertEqual(os.listdir(self.tmpdir.name), ['diagnostic_data.json'])
+
+    def test_unchanged_content_is_not_rewritten(self):
+        self.store.write({'PF': True, 'last_updated': '10:00'})
+        self.assertFalse(self.store.write({'PF': True, 'last_updated': '10:15'}))
+        self.assertTrue(self.store.write({'PF': False, 'last_updated': '10:30'}))
+
+        self.assertEqual(self.store.writes, 2)
+        self.assertEqual(self.store.skipped_writes, 1)
+        self.assertEqual(self.store.read()['last_updated'], '10:30')
+
+    def test_rewritten_when_file_removed(self):
+        self.store.write({'PF': True})
+        os.unlink(self.path)
+        self.assertTrue(self.store.write({'PF': True}))
+        self.assertTrue(os.path.exists(self.path))
+
+    def test_unchanged_file_is_not_parsed_again(self):
+        self.store.write({'PF': True})
+        with patch('hw_diag.utilities.snapshot_store.json.load') as mock_load:
+            self.assertEqual(self.store.read(), {'PF': True})
+            self.assertEqual(self.store.read(), {'PF': True})
+        mock_load.assert_not_called()
+
+    def test_external_change_is_picked_up(self):
+        self.store.write({'PF': True})
+        other = SnapshotStore(self.path)
+        other.write({'PF': False, 'extra': 1})
+
+        self.assertEqual(self.store.read(), {'PF': False, 'extra': 1})
+
+    def test_failed_write_keeps_previous_file(self):
+        self.store.write({'PF': True})
+        with patch('hw_diag.utilities.snapshot_store.json.dump', side_effect=TypeError('boom')):
+            with self.assertRaises(TypeError):
+                self.store.write({'PF': False})
+
+        self.assertEqual(os.listdir(self.tmpdir.name), ['diagnostic_data.json'])
+        self.assertEqual(SnapshotStore(self.path).read(), {'PF': True})
@@ -0,0 +1,117 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from flask import Flask
+from flask_caching import Cache
+
+from hw_diag.cache import cached_stale_while_revalidate
+from hw_diag.utilities.sqlite_cache import SQLiteCache
+
+
+class TestSQLiteCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, 'cache.sqlite')
+        self.cache = SQLiteCache(self.path)
+
+    def test_set_get(self):
+        self.assertIsNone(self.cache.get('foo'))
+        self.assertTrue(self.cache.set('foo', {'bar': b'baz'}))
+        self.assertEqual(self.cache.get('foo'), {'bar': b'baz'})
+        self.assertTrue(self.cache.has('foo'))
+        self.assertTrue(self.cache.delete('foo'))
+        self.assertFalse(self.cache.has('foo'))
+
+    def test_shared_between_instances(self):
+        # another worker process opens the same file
+        self.cache.set('foo', 'bar')
+        self.assertEqual(SQLiteCache(self.path).get('foo'), 'bar')
+
+    def test_expiry(self):
+        self.cache.set('foo', 'bar', timeout=1)
+        self.cache.set('forever', 'bar', timeout=0)
+        with patch('hw_diag.utilities.sqlite_cache.time.time', return_value=time.time() + 2):
+            self.assertIsNone(self.cache.get('foo'))
+            self.assertEqual(self.cache.get('forever'), 'bar')
+
+    def test_add_is_exclusive(self):
+        other = SQLiteCache(self.path)
+        self.assertTrue(self.cache.add('lock', 1, timeout=1))
+        self.assertFalse(other.add('lock', 2))
+        with patch('hw_diag.utilities.sqlite_cache.time.time', return_value=time.time() + 2):
+            self.assertTrue(other.add('lock', 3))
+
+    def test_clear(self):
+        self.cache.set('foo', 'bar')
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('foo'))
+
+
+class TestStaleWhileRevalidate(unittest.TestCase):
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.cache = Cache(config={
+            'CACHE_TYPE': 'hw_diag.utilities.sqlite_cache.SQLiteCache',
+            'CACHE_SQLITE_PATH': os.path.join(tmpdir.name, 'cache.sqlite')
+        })
+        self.app = Flask('test')
+        self.cache.init_app(self.app)
+        patcher = patch('hw_diag.cache.cache', self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.calls = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def view(self):
+        self.calls += 1
+        self.release.wait(5)
+        return 'report %d' % self.calls
+
+    def test_stale_value_is_served_during_refresh(self):
+        view = cached_stale_while_revalidate(timeout=1, stale_timeout=60, key='initfile')(self.view)
+        with self.app.app_context():
+            self.assertEqual(view(), 'report 1')
+            self.assertEqual(view(), 'report 1')
+            self.assertEqual(self.calls, 1)
+
+            self.release.clear()
+            with patch('hw_diag.cache.time.time', return_value=time.time() + 2):
+                self.assertEqual(view(), 'report 1')
+                self.assertEqual(view(), 'report 1')
+            self.release.set()
+
+            deadline = time.monotonic() + 5
+            while self.cache.has('initfile:revalidating') and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(view(), 'report 2')
+            self.assertEqual(self.calls, 2)
+
+    def test_concurrent_misses_compute_once(self):
+        view = cached_stale_while_revalidate(timeout=10, stale_timeout=60, key='initfile')(self.view)
+        results = []
+
+        def call():
+            with self.app.app_context():
+                results.append(view())
+
+        self.release.clear()
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.2)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, ['report 1'] * 3)
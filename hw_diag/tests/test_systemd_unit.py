@@ -0,0 +1,98 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from hw_diag.utilities.dbus_proxy.connection import dbus_connection
+from hw_diag.utilities.dbus_proxy.dbus_ids import DBusIds
+from hw_diag.utilities.dbus_proxy.systemd_jobs import SystemdJobWatcher
+from hw_diag.utilities.dbus_proxy.systemd_unit import SystemDUnit
+
+
+UNIT_PATH = '/org/freedesktop/systemd1/unit/ModemManager_2eservice'
+JOB_PATH = '/org/freedesktop/systemd1/job/1234'
+
+
+@patch('dbus.SystemBus')
+@patch('dbus.Interface')
+@patch.object(dbus_connection, 'add_signal_receiver')
+@patch.object(dbus_connection, 'start_mainloop', return_value=True)
+class TestSystemDUnitSignals(unittest.TestCase):
+
+    def setUp(self):
+        dbus_connection.reset()
+        self.watcher = SystemdJobWatcher()
+        patcher = patch('hw_diag.utilities.dbus_proxy.systemd_unit.systemd_job_watcher', self.watcher)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def finish_job(self, result='done'):
+        def restart(mode):
+            # systemd can finish the job before the call returns
+            self.watcher._on_job_removed(1234, JOB_PATH, 'ModemManager.service', result)
+            return JOB_PATH
+        return restart
+
+    def test_restart_returns_once_job_finished(self, _, __, mock_interface, ___):
+        mock_interface.return_value.Restart.side_effect = self.finish_job()
+        mock_interface.return_value.Get.return_value = 'running'
+
+        started = time.monotonic()
+        self.assertTrue(SystemDUnit(UNIT_PATH).wait_restart())
+
+        self.assertLess(time.monotonic() - started, 1)
+        mock_interface.return_value.Restart.assert_called_once_with('fail')
+        mock_interface.return_value.Subscribe.assert_called_once()
+        mock_interface.return_value.Get.assert_called_once_with(DBusIds.SYSTEMD_UNIT_IF, 'SubState')
+
+    def test_failed_job(self, _, __, mock_interface, ___):
+        mock_interface.return_value.Restart.side_effect = self.finish_job('failed')
+
+        self.assertFalse(SystemDUnit(UNIT_PATH).wait_restart())
+        mock_interface.return_value.Get.assert_not_called()
+
+    def test_state_reached_after_job(self, _, __, mock_interface, ___):
+        mock_interface.return_value.Restart.side_effect = self.finish_job()
+        mock_interface.return_value.Get.return_value = 'start'
+        timer = threading.Timer(0.05, self.watcher._on_properties_changed,
+                                args=(DBusIds.SYSTEMD_UNIT_IF, {'SubState': 'running'}, []),
+                                kwargs={'path': UNIT_PATH})
+        timer.start()
+
+        self.assertTrue(SystemDUnit(UNIT_PATH).wait_restart(timeout=5))
+        timer.join()
+
+    def test_times_out(self, _, __, mock_interface, ___):
+        mock_interface.return_value.Stop.return_value = JOB_PATH
+        mock_interface.return_value.Get.return_value = 'running'
+
+        self.assertFalse(SystemDUnit(UNIT_PATH).wait_stop(timeout=0.1))
+        # the unit isn't watched any more
+        self.assertEqual(self.watcher._watched, {})
+
+
+@patch('dbus.SystemBus')
+@patch('dbus.Interface')
+@patch('hw_diag.utilities.dbus_proxy.systemd_unit.time.sleep')
+@patch.object(dbus_connection, 'start_mainloop', return_value=False)
+class TestSystemDUnitPolling(unittest.TestCase):
+
+    def setUp(self):
+        dbus_connection.reset()
+
+    def test_waits_for_job_then_state(self, _, mock_sleep, mock_interface, __):
+        mock_interface.return_value.Restart.return_value = JOB_PATH
+        mock_interface.return_value.GetAll.side_effect = [
+            # still running the old instance while the job is pending
+            {'Job': (1234, JOB_PATH), 'SubState': 'running'},
+            {'Job': (0, '/'), 'SubState': 'start'},
+            {'Job': (0, '/'), 'SubState': 'running'},
+        ]
+
+        self.assertTrue(SystemDUnit(UNIT_PATH).wait_restart())
+        self.assertEqual([c.args[0] for c in mock_sleep.call_args_list], [0.1, 0.2])
+
+    def test_times_out(self, _, __, mock_interface, ___):
+        mock_interface.return_value.GetAll.return_value = {'Job': (0, '/'), 'SubState': 'running'}
+
+        self.assertFalse(SystemDUnit(UNIT_PATH).wait_stop(timeout=1))
@@ -0,0 +1,93 @@
+import unittest
+from unittest.mock import patch
+
+from hm_pyhelper.diagnostics import DiagnosticsReport
+
+from hw_diag.tasks import perform_hw_diagnostics
+
+
+def make_report(**results):
+    report = DiagnosticsReport()
+    report.set_passed(True)
+    for key, value in results.items():
+        report[key] = value
+    return report
+
+
+@patch('hw_diag.tasks.upload_diagnostics')
+@patch('hw_diag.tasks.get_public_keys_and_ignore_errors',
+       return_value={'key': 'pubkey', 'name': 'animal-name'})
+@patch('hw_diag.tasks.is_commercial_fleet', return_value=False)
+@patch('hw_diag.tasks.is_nebra_fleet', return_value=True)
+@patch('hw_diag.tasks.snapshot_store')
+@patch('hw_diag.tasks.diagnostics_history')
+class TestPerformHwDiagnostics(unittest.TestCase):
+
+    def test_snapshot_types(self, *mocks):
+        report = make_report(E0='00:11', W0='00:22', ECC=True, BT=[{'Name': 'hci0'}],
+                             LTE=[], LOR=True, PF=True, OK='pubkey', PK='pubkey',
+                             RE='EU868', gateway_region='EU868')
+        with patch('hw_diag.tasks.run_diagnostics', return_value=report) as mock_run:
+            diagnostics = perform_hw_diagnostics()
+
+        mock_run.assert_called_once_with('snapshot')
+        mocks[0].record.assert_called_once_with(diagnostics)
+        mocks[1].write.assert_called_once_with(diagnostics)
+        self.assertEqual(diagnostics['E0'], '00:11')
+        self.assertIs(diagnostics['ECC'], True)
+        self.assertIs(diagnostics['BT'], True)
+        self.assertIs(diagnostics['LTE'], False)
+        self.assertIs(diagnostics['LOR'], True)
+        self.assertIs(diagnostics['PF'], True)
+        self.assertEqual(diagnostics['PK'], 'pubkey')
+        self.assertEqual(diagnostics['AN'], 'animal-name')
+        self.assertEqual(diagnostics['RE'], 'EU868')
+        self.assertIn('last_updated', diagnostics)
+
+    def test_failed_diagnostics(self, *mocks):
+        report = make_report(E0='00:11', ECC='gateway_mfr test finished with error',
+                             W0='Failed to find file', PF=False, gateway_region='rpc error')
+        for key in ['ECC', 'W0', 'PF', 'gateway_region']:
+            report.append_error(key)
+        with patch('hw_diag.tasks.run_diagnostics', return_value=report):
+            diagnostics = perform_hw_diagnostics()
+
+        self.assertIs(diagnostics['ECC'], False)
+        self.assertIs(diagnostics['W0'], False)
+        self.assertIs(diagnostics['BT'], False)
+        self.assertIs(diagnostics['PF'], False)
+        self.assertIsNone(diagnostics['OK'])
+        self.assertEqual(diagnostics['RE'], 'UN123')
+
+    def test_history_failure_is_not_fatal(self, mock_history, *mocks):
+        mock_history.record.side_effect = Exception('database is locked')
+        with patch('hw_diag.tasks.run_diagnostics', return_value=make_report(PF=True)):
+            diagnostics = perform_hw_diagnostics()
+
+        self.assertIs(diagnostics['PF'], True)
+
+    def test_ecc_and_pf_follow_the_registry(self, *mocks):
+        # ECC is the gateway_mfr test and PF PfDiagnostic's verdict, as in
+        # /initFile.txt: a chip failing the test is not ECC, a missing W0 still passes
+        report = make_report(E0='00:11', W0=None, ECC='gateway_mfr test finished with error',
+                             BT=[{'Name': 'hci0'}], LOR=True, PF=False)
+        report.append_error('ECC')
+        with patch('hw_diag.tasks.run_diagnostics', return_value=report):
+            diagnostics = perform_hw_diagnostics()
+        self.assertIs(diagnostics['ECC'], False)
+        self.assertIs(diagnostics['PF'], False)
+
+        report = make_report(E0='00:11', ECC=True, BT=[{'Name': 'hci0'}], LOR=True, PF=True)
+        with patch('hw_diag.tasks.run_diagnostics', return_value=report):
+            diagnostics = perform_hw_diagnostics()
+        self.assertIs(diagnostics['W0'], False)
+        self.assertIs(diagnostics['PF'], True)
+
+    def test_snapshot_runs_serial_and_environment_diagnostics(self, *mocks):
+        report = make_report(serial_number='00000000ddd1a4c2', VA='NEBHNT-OUT1', diagnotics_version=None)
+        with patch('hw_diag.tasks.run_diagnostics', return_value=report):
+            diagnostics = perform_hw_diagnostics()
+
+        self.assertEqual(diagnostics['serial_number'], '00000000ddd1a4c2')
+        self.assertEqual(diagnostics['VA'], 'NEBHNT-OUT1')
+        self.assertIsNone(diagnostics['diagnotics_version'])
@@ -1,7 +1,10 @@
+import datetime
+import json
+import gzip
 import unittest
 import flask
 import os
-from unittest.mock import patch, mock_open
+from unittest.mock import patch, mock_open, MagicMock, call
 from os.path import abspath, dirname, join
 
 import hm_pyhelper
@@ -9,6 +12,7 @@ from hm_pyhelper.constants.shipping import DESTINATION_ADD_GATEWAY_TXN_KEY
 from hm_pyhelper.diagnostics.diagnostics_report import DIAGNOSTICS_PASSED_KEY, \
     DIAGNOSTICS_ERRORS_KEY
 from hw_diag.app import get_app
+from hw_diag.cache import cache
 from hw_diag.utilities.security import GnuPG
 
 @patch.dict(
@@ -43,8 +47,26 @@ class TestGetDiagnostics(unittest.TestCase):
         cls.gnupg.cleanup()
 
     def setUp(self):
+        # Never let the views or the scheduler probe the hardware in the background.
+        self.snapshot = MagicMock()
+        self.snapshot.get.return_value = None
+        self.snapshot.updated_at = None
+        self.snapshot.changed_at = None
+        self.snapshot.age_seconds.return_value = None
+        self.snapshot.freshness.return_value = {'updated_at': None, 'age_seconds': None,
+                                                'refreshing': False, 'last_error': None}
+        for target in ['hw_diag.app.diagnostics_snapshot',
+                       'hw_diag.utilities.diagnostics.diagnostics_snapshot',
+                       'hw_diag.views.diagnostics.diagnostics_snapshot']:
+            patcher = patch(target, self.snapshot)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
         self.app = get_app('test_app', lean_initializations=False)
         self.client = self.app.test_client()
+        # the view cache is shared between processes, don't serve a previous run
+        with self.app.app_context():
+            cache.clear()
 
     def test_get_diagnostics(self):
         # Check the diagnostics page.
@@ -89,6 +111,173 @@ class TestGetDiagnostics(unittest.TestCase):
                             'application/json'
                         )
 
+    def test_get_json_serves_snapshot(self):
+        self.snapshot.get.return_value = {'PF': True, 'serial_number': '00000000a3e7kg80'}
+        with self.app.test_client() as c:
+            with c.session_transaction() as session:
+                session['logged_in'] = True
+            cresp = c.get('/json')
+
+        self.assertEqual(cresp.status_code, 200)
+        self.assertEqual(cresp.json, {'PF': True, 'serial_number': '00000000a3e7kg80'})
+        self.snapshot.request_refresh.assert_not_called()
+
+    def test_get_json_conditional(self):
+        self.snapshot.get.return_value = {'PF': True, 'serial_number': '00000000a3e7kg80',
+                                          'last_updated': '12:00 UTC 01 Jan 2026'}
+        self.snapshot.changed_at = datetime.datetime(2026, 1, 1, 12, 0, 0, 500)
+        with self.app.test_client() as c:
+            with c.session_transaction() as session:
+                session['logged_in'] = True
+            first = c.get('/json')
+            etag = first.headers['ETag']
+            # a later run that found nothing new
+            self.snapshot.get.return_value = {'PF': True, 'serial_number': '00000000a3e7kg80',
+                                              'last_updated': '12:30 UTC 01 Jan 2026'}
+            self.snapshot.updated_at = datetime.datetime(2026, 1, 1, 12, 30)
+            by_etag = c.get('/json', headers={'If-None-Match': etag})
+            by_date = c.get('/json', headers={'If-Modified-Since': first.headers['Last-Modified']})
+            self.snapshot.get.return_value = {'PF': False, 'serial_number': '00000000a3e7kg80'}
+            changed = c.get('/json', headers={'If-None-Match': etag})
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.headers['Last-Modified'], 'Thu, 01 Jan 2026 12:00:00 GMT')
+        self.assertEqual(by_etag.status_code, 304)
+        self.assertEqual(by_etag.data, b'')
+        self.assertEqual(by_date.status_code, 304)
+        self.assertEqual(changed.status_code, 200)
+        self.assertFalse(changed.json['PF'])
+        self.assertNotEqual(changed.headers['ETag'], etag)
+
+    def test_get_json_gzip(self):
+        diagnostics = {'PF': True, 'BT': ['hci%d' % n for n in range(100)]}
+        self.snapshot.get.return_value = diagnostics
+        with self.app.test_client() as c:
+            with c.session_transaction() as session:
+                session['logged_in'] = True
+            compressed = c.get('/json', headers={'Accept-Encoding': 'gzip, deflate'})
+            revalidated = c.get('/json', headers={'Accept-Encoding': 'gzip',
+                                                  'If-None-Match': compressed.headers['ETag']})
+            plain = c.get('/json')
+
+        self.assertEqual(compressed.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', compressed.headers['Vary'])
+        self.assertEqual(json.loads(gzip.decompress(compressed.data)), diagnostics)
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertIsNone(plain.headers.get('Content-Encoding'))
+        self.assertEqual(plain.json, diagnostics)
+        self.assertNotEqual(plain.headers['ETag'], compressed.headers['ETag'])
+
+    def test_get_json_without_snapshot_requests_refresh(self):
+        with patch('builtins.open', side_effect=FileNotFoundError):
+            with self.app.test_client() as c:
+                with c.session_transaction() as session:
+                    session['logged_in'] = True
+                cresp = c.get('/json')
+
+        self.assertIn('error', cresp.json)
+        self.snapshot.request_refresh.assert_called_once_with()
+
+    @patch('hw_diag.views.diagnostics.diagnostic_cache')
+    def test_refresh_diagnostics(self, mock_cache):
+        self.snapshot.request_refresh.return_value = True
+        with self.app.test_client() as c:
+            with c.session_transaction() as session:
+                session['logged_in'] = True
+            cresp = c.get('/refresh_diagnostics')
+
+        self.assertEqual(cresp.status_code, 200)
+        self.assertTrue(cresp.json['action_invoked'])
+        self.assertFalse(cresp.json['refreshing'])
+        self.snapshot.request_refresh.assert_called_once_with(force=True)
+        mock_cache.invalidate.assert_called_once_with()
+
+    def test_refresh_diagnostics_requires_login(self):
+        cresp = self.client.get('/refresh_diagnostics')
+        self.assertNotEqual(cresp.status_code, 200)
+        self.snapshot.request_refresh.assert_not_called()
+
+    def test_diagnostics_snapshot_status(self):
+        with self.app.test_client() as c:
+            with c.session_transaction() as session:
+                session['logged_in'] = True
+            cresp = c.get('/diagnostics_snapshot')
+
+        self.assertEqual(cresp.status_code, 200)
+        self.assertEqual(cresp.json['updated_at'], None)
+
+    @patch('hw_diag.views.diagnostics.diagnostic_metrics')
+    def test_diagnostics_metrics(self, mock_metrics):
+        mock_metrics.as_dict.return_value = {'ECC': {'count': 1}}
+        with self.app.test_client() as c:
+            with c.session_transaction() as session:
+                session['logged_in'] = True
+            resp = c.get('/diagnostics_metrics')
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json['diagnostics'], {'ECC': {'count': 1}})
+        self.assertIn('hits', resp.json['cache'])
+        self.assertIn('misses', resp.json['dbus'])
+        self.assertIn('loads', resp.json['dbus_properties'])
+
+    @patch('hw_diag.views.diagnostics.diagnostics_history')
+    def test_diagnostics_history(self, mock_history):
+        mock_history.query.return_value = [
+            {'dt': datetime.datetime(2026, 1, 1, 12), 'diagnostics': {'ECC': True}}]
+        with self.app.test_client() as c:
+            with c.session_transaction() as session:
+                session['logged_in'] = True
+            resp = c.get('/diagnostics_history?since=2026-01-01T00:00:00&keys=ECC,BT')
+            bad_resp = c.get('/diagnostics_history?since=yesterday')
+
+        mock_history.query.assert_called_once_with(
+            datetime.datetime(2026, 1, 1), None, ['ECC', 'BT'])
+        self.assertEqual(resp.json, [{'dt': '2026-01-01T12:00:00', 'diagnostics': {'ECC': True}}])
+        self.assertEqual(bad_resp.status_code, 400)
+
+    @patch('hw_diag.views.diagnostics.ping_history')
+    def test_connectivity_history(self, mock_history):
+        mock_history.query.return_value = {'8.8.8.8': {'samples': [], 'rtt_avg': {'p95': None}}}
+        with self.app.test_client() as c:
+            with c.session_transaction() as session:
+                session['logged_in'] = True
+            resp = c.get('/connectivity_history?percentiles=95')
+            bad_resp = c.get('/connectivity_history?percentiles=150')
+
+        mock_history.query.assert_called_once_with([95.0])
+        self.assertEqual(resp.json['8.8.8.8']['rtt_avg'], {'p95': None})
+        self.assertEqual(bad_resp.status_code, 400)
+
+    @patch('hw_diag.views.diagnostics.run_diagnostics_for_fields')
+    def test_selected_diagnostics(self, mock_run):
+        # keys of a snapshot built from the SNAPSHOT consumers, no device_status
+        self.snapshot.get.return_value = {'serial_number': '00000000a3e7kg80', 'BT': True,
+                                          'AN': 'angry-purple-tiger', 'errors': ['BT']}
+        mock_run.return_value = {'LTE': [], 'lte': [], 'device_status': 'Failed',
+                                 'errors': ['device_status']}
+        with self.app.test_client() as c:
+            with c.session_transaction() as session:
+                session['logged_in'] = True
+            from_snapshot = c.get('/v2/diagnostics?fields=serial_number,AN,BT')
+            mock_run.assert_not_called()
+            fields = c.get('/v2/diagnostics?fields=serial_number,device_status')
+            only = c.get('/v2/diagnostics?only=LTE&fields=serial_number')
+            unknown = c.get('/v2/diagnostics?only=LTE,foo')
+            unknown_field = c.get('/v2/diagnostics?fields=serial_number,bar')
+            everything = c.get('/v2/diagnostics')
+
+        self.assertEqual(from_snapshot.json, {'serial_number': '00000000a3e7kg80', 'BT': True,
+                                              'AN': 'angry-purple-tiger', 'errors': ['BT']})
+        self.assertEqual(fields.json, {'serial_number': '00000000a3e7kg80',
+                                       'device_status': 'Failed', 'errors': ['device_status']})
+        self.assertEqual(mock_run.call_args_list, [call(['device_status']), call(['LTE'])])
+        self.assertEqual(only.json, {'serial_number': '00000000a3e7kg80', 'LTE': [], 'errors': []})
+        self.assertEqual(unknown.status_code, 400)
+        self.assertIn('foo', unknown.get_data(as_text=True))
+        self.assertEqual(unknown_field.status_code, 400)
+        self.assertIn('bar', unknown_field.get_data(as_text=True))
+        self.assertEqual(everything.json['BT'], True)
+
     def test_initFile_output(self):
         # Check the diagnostics JSON output.
         url = '/initFile.txt'
@@ -0,0 +1,48 @@
+import unittest
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+from hw_diag.app import run_network_watchdog_task
+from hw_diag.utilities.event_streamer import DiagEvent
+from hw_diag.utilities.watchdog_schedule import AdaptiveSchedule
+
+
+CONNECTED = DiagEvent.NETWORK_INTERNET_CONNECTED
+DISCONNECTED = DiagEvent.NETWORK_DISCONNECTED
+
+
+def make_schedule():
+    return AdaptiveSchedule(base_interval=timedelta(hours=1), max_interval=timedelta(hours=4),
+                            recovery_interval=timedelta(minutes=2))
+
+
+class TestAdaptiveSchedule(unittest.TestCase):
+
+    def test_backs_off_while_connected(self):
+        schedule = make_schedule()
+        intervals = [schedule.next_interval(CONNECTED) for _ in range(5)]
+
+        self.assertEqual(intervals, [timedelta(hours=1), timedelta(hours=2), timedelta(hours=4),
+                                     timedelta(hours=4), timedelta(hours=4)])
+
+    def test_checks_quickly_until_recovered(self):
+        schedule = make_schedule()
+        schedule.next_interval(CONNECTED)
+
+        self.assertEqual(schedule.next_interval(DISCONNECTED), timedelta(minutes=2))
+        self.assertEqual(schedule.next_interval(DISCONNECTED), timedelta(minutes=2))
+        # recovered, confirmed soon and then backing off again
+        self.assertEqual(schedule.next_interval(DiagEvent.NETWORK_LOCAL_CONNECTED), timedelta(minutes=2))
+        self.assertEqual(schedule.next_interval(CONNECTED), timedelta(minutes=4))
+        self.assertEqual(schedule.next_interval(CONNECTED), timedelta(minutes=8))
+
+    def test_task_reschedules_job(self):
+        watchdog = MagicMock()
+        watchdog.ensure_network_connection.return_value = DISCONNECTED
+        scheduler = MagicMock()
+
+        run_network_watchdog_task(watchdog, scheduler, make_schedule())
+
+        scheduler.get_job.assert_called_once_with('network_watchdog')
+        next_run_time = scheduler.get_job.return_value.modify.call_args.kwargs['next_run_time']
+        self.assertIsNotNone(next_run_time)
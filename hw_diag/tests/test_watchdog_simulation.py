@@ -0,0 +1,111 @@
+import json
+import logging
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from hw_diag.utilities import network_watchdog
+from hw_diag.utilities.network_watchdog import NetworkWatchdog
+from hw_diag.utilities.watchdog_simulation import ConnectivityTrace, WatchdogPolicy, \
+    WatchdogSimulation, main
+
+
+HOUR = 3600
+
+
+def make_policy(**overrides):
+    policy = WatchdogPolicy(NM_RESTART_THRESHOLD=1, FULL_REBOOT_THRESHOLD=3, FULL_FORCE_REBOOT_THRESHOLD=3,
+                            REBOOT_LIMIT_HOURS=24, ESCALATION_INTERVAL_MINUTES=15,
+                            base_interval_hours=1.0, max_interval_hours=4.0, recovery_minutes=2.0)
+    for name, value in overrides.items():
+        setattr(policy, name, value)
+    return policy
+
+
+def simulate(outages, duration_hours=336, **overrides):
+    trace = ConnectivityTrace.from_dict({'duration_hours': duration_hours, 'outages': outages})
+    return WatchdogSimulation(trace, make_policy(**overrides)).run()
+
+
+class TestWatchdogSimulation(unittest.TestCase):
+
+    def test_connected_trace_takes_no_action(self):
+        report = simulate([])
+
+        self.assertEqual(report.nm_restarts, [])
+        self.assertEqual(report.reboots, [])
+        # only the first check reports, the others repeat it
+        self.assertEqual(len(report.events), 1)
+        # backs off to every 4 hours
+        self.assertLess(report.checks, 336 / 4 + 5)
+
+    def test_nm_restart_fixes_outage(self):
+        report = simulate([{'start_hours': 20, 'end_hours': 30, 'fixed_by': 'nm_restart'}])
+
+        self.assertEqual(report.nm_restarts, [20 * HOUR])
+        self.assertEqual(report.reboots, [])
+        outage, = report.outages
+        self.assertTrue(outage['fixed_early'])
+        self.assertEqual(outage['time_to_detect'], 0)
+        # confirmed by the next recovery check
+        self.assertEqual(outage['time_to_recovery'], 120)
+
+    def test_escalates_to_reboot(self):
+        report = simulate([{'start_hours': 20, 'end_hours': 30, 'fixed_by': 'reboot'}])
+
+        # a check counts once every 15 minutes, the third one reboots
+        self.assertEqual(report.nm_restarts, [20 * HOUR, 20 * HOUR + 16 * 60])
+        self.assertEqual(report.reboots, [20 * HOUR + 32 * 60])
+        self.assertEqual(report.forced_reboots, 0)
+        outage, = report.outages
+        self.assertTrue(outage['fixed_early'])
+        # the unit boots for 2 minutes and checks an hour later
+        self.assertEqual(outage['time_to_recovery'], 32 * 60 + 120 + HOUR)
+
+    def test_reboots_once_per_limit(self):
+        report = simulate([{'start_hours': 50, 'end_hours': 110}], initial_uptime_hours=48.0)
+
+        self.assertEqual(len(report.reboots), 3)
+        for previous, reboot in zip(report.reboots, report.reboots[1:]):
+            self.assertGreaterEqual(reboot - previous, 24 * HOUR)
+        outage, = report.outages
+        self.assertFalse(outage['fixed_early'])
+
+    def test_forces_reboot_when_ignored(self):
+        report = simulate([{'start_hours': 50, 'end_hours': 60, 'fixed_by': 'reboot'}],
+                          graceful_reboot_works=False, REBOOT_LIMIT_HOURS=1)
+
+        self.assertEqual(len(report.reboots), 4)
+        self.assertEqual(report.forced_reboots, 1)
+        self.assertEqual(report.events[-2]['action'], 'ACTION_SYSTEM_REBOOT_FORCED')
+
+    def test_short_outage_between_checks_goes_unnoticed(self):
+        report = simulate([{'start_hours': 101.5, 'end_hours': 101.7}])
+
+        self.assertEqual(report.summary()['undetected_outages'], 1)
+        self.assertEqual(report.nm_restarts, [])
+
+    def test_leaves_watchdog_untouched(self):
+        logger = logging.getLogger(network_watchdog.__name__)
+        handlers = list(logger.handlers)
+        threshold = NetworkWatchdog.FULL_REBOOT_THRESHOLD
+        uptime = network_watchdog.uptime
+
+        simulate([{'start_hours': 20, 'end_hours': 30, 'fixed_by': 'reboot'}],
+                 FULL_REBOOT_THRESHOLD=threshold + 2)
+
+        self.assertEqual(logger.handlers, handlers)
+        self.assertEqual(NetworkWatchdog.FULL_REBOOT_THRESHOLD, threshold)
+        self.assertEqual(NetworkWatchdog.lost_count, 0)
+        self.assertIs(network_watchdog.uptime, uptime)
+
+    def test_main(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as trace:
+            json.dump({'duration_hours': 72,
+                       'outages': [{'start_hours': 20, 'end_hours': 30, 'fixed_by': 'nm_restart'}]}, trace)
+            trace.flush()
+            with patch('builtins.print'):
+                result = main([trace.name, '--policy', 'recovery_minutes=5'])
+
+        self.assertEqual(result['nm_restarts'], 1)
+        self.assertEqual(result['mean_time_to_recovery_seconds'], 300)
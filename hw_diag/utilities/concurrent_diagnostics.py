@@ -0,0 +1,237 @@
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from hm_pyhelper.diagnostics import DiagnosticsReport, Diagnostic
+from hm_pyhelper.diagnostics.diagnostics_report import \
+    DIAGNOSTICS_PASSED_KEY, DIAGNOSTICS_ERRORS_KEY
+from hm_pyhelper.logger import get_logger
+
+from hw_diag.utilities.diagnostic_cache import diagnostic_cache, get_diagnostic_ttl
+from hw_diag.utilities.diagnostic_metrics import diagnostic_metrics, OUTCOME_OK, \
+    OUTCOME_FAILED, OUTCOME_ERROR, OUTCOME_TIMEOUT, OUTCOME_CACHED
+
+LOGGER = get_logger(__name__)
+
+# Default time a single diagnostic may take before it is recorded as failed.
+# Diagnostics can override it with a TIMEOUT class attribute.
+DEFAULT_DIAGNOSTIC_TIMEOUT = float(os.getenv('DIAGNOSTIC_TIMEOUT_SECONDS', 15))
+
+REPORT_META_KEYS = {DIAGNOSTICS_PASSED_KEY, DIAGNOSTICS_ERRORS_KEY}
+
+RunningDiagnostic = namedtuple('RunningDiagnostic',
+                               ['diagnostic', 'scratch_report', 'seeded', 'started', 'deadline'])
+
+
+def get_diagnostic_keys(diagnostic) -> list:
+    '''
+    report keys a diagnostic produces. Composite diagnostics (which wrap
+    several Diagnostic objects) list theirs in a KEYS class attribute.
+    '''
+    keys = getattr(diagnostic, 'KEYS', None)
+    if keys:
+        return list(keys)
+    return [diagnostic.key]
+
+
+def get_diagnostic_name(diagnostic) -> str:
+    return ','.join(get_diagnostic_keys(diagnostic))
+
+
+def get_diagnostic_timeout(diagnostic) -> float:
+    return getattr(diagnostic, 'TIMEOUT', DEFAULT_DIAGNOSTIC_TIMEOUT)
+
+
+def get_diagnostic_dependencies(diagnostic) -> list:
+    '''report keys that have to be populated before the diagnostic runs'''
+    return list(getattr(diagnostic, 'DEPENDS_ON', []))
+
+
+def _timed_perform_test(diagnostic, diagnostics_report: DiagnosticsReport) -> float:
+    '''runs the diagnostic, returns when it finished'''
+    diagnostic.perform_test(diagnostics_report)
+    return time.monotonic()
+
+
+class ConcurrentDiagnosticsReport(DiagnosticsReport):
+    '''
+    DiagnosticsReport that runs independent diagnostics on a thread pool.
+
+    A diagnostic waits for the diagnostics producing the keys listed in its
+    DEPENDS_ON attribute, everything else starts straight away. Each diagnostic
+    writes into its own scratch report which is merged once it finishes, so a
+    diagnostic exceeding its TIMEOUT is recorded as failed and whatever it
+    writes afterwards is discarded.
+
+    Results of diagnostics declaring a VOLATILITY or CACHE_TTL are kept in
+    result_cache and reused without running the diagnostic until they expire.
+
+    The duration and outcome of each diagnostic go to metrics and to the
+    timings attribute, keyed by diagnostic name. They are kept out of the
+    report itself, which is what /initFile.txt and the snapshot serialise.
+    '''
+
+    result_cache = diagnostic_cache
+    metrics = diagnostic_metrics
+
+    TIMEOUT_MSG = "Diagnostic timed out after %s seconds."
+    UNRESOLVED_DEPENDENCY_MSG = "Diagnostic dependencies could not be resolved."
+
+    def perform_diagnostics(self):
+        self.set_passed(True)
+        self.timings = {}
+
+        producers = {}
+        for diagnostic in self.diagnostics:
+            for key in get_diagnostic_keys(diagnostic):
+                producers[key] = diagnostic
+
+        dependencies = {}
+        for diagnostic in self.diagnostics:
+            dependencies[id(diagnostic)] = {
+                id(producers[key]) for key in get_diagnostic_dependencies(diagnostic)
+                if key in producers and producers[key] is not diagnostic
+            }
+
+        pending = list(self.diagnostics)
+        running = {}
+        finished = set()
+
+        # No context manager, leaving it would block on diagnostics that timed out.
+        pool = ThreadPoolExecutor(max_workers=max(len(self.diagnostics), 1),
+                                  thread_name_prefix='diagnostic')
+        try:
+            while pending or running:
+                self._start_ready(pool, pending, dependencies, running, finished)
+                if not running:
+                    break
+
+                next_deadline = min(entry.deadline for entry in running.values())
+                wait(running, timeout=max(next_deadline - time.monotonic(), 0),
+                     return_when=FIRST_COMPLETED)
+                self._collect(running, finished)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        for diagnostic in pending:
+            self._record_failure_for_all_keys(self.UNRESOLVED_DEPENDENCY_MSG, diagnostic)
+
+    def _record_timing(self, diagnostic, seconds: float, outcome: str) -> None:
+        name = get_diagnostic_name(diagnostic)
+        self.timings[name] = {'seconds': round(seconds, 4), 'outcome': outcome}
+        if self.metrics is not None:
+            self.metrics.record(name, seconds, outcome)
+
+    def _start_ready(self, pool: ThreadPoolExecutor, pending: list, dependencies: dict,
+                     running: dict, finished: set) -> None:
+        '''starts every diagnostic whose dependencies are done, cached ones finish at once'''
+        progress = True
+        while progress:
+            progress = False
+            for diagnostic in list(pending):
+                if not dependencies[id(diagnostic)] <= finished:
+                    continue
+                pending.remove(diagnostic)
+                if self._merge_cached(diagnostic):
+                    finished.add(id(diagnostic))
+                    progress = True
+                else:
+                    self._submit(pool, diagnostic, running)
+
+    def _cache_name(self, diagnostic) -> str:
+        # consumers may produce the same keys with different diagnostics
+        return f'diagnostic:{type(diagnostic).__name__}:{get_diagnostic_name(diagnostic)}'
+
+    def _merge_cached(self, diagnostic) -> bool:
+        if self.result_cache is None or get_diagnostic_ttl(diagnostic) == 0:
+            return False
+        cached = self.result_cache.get(self._cache_name(diagnostic))
+        if cached is None:
+            return False
+        self._merge(cached)
+        self._record_timing(diagnostic, 0, OUTCOME_CACHED)
+        return True
+
+    def _store_cached(self, diagnostic, result: DiagnosticsReport) -> None:
+        ttl = get_diagnostic_ttl(diagnostic)
+        if self.result_cache is None or ttl == 0:
+            return
+        self.result_cache.set(self._cache_name(diagnostic), result, ttl,
+                              failed=bool(result[DIAGNOSTICS_ERRORS_KEY]))
+
+    def _own_result(self, scratch_report: DiagnosticsReport, seeded: dict) -> DiagnosticsReport:
+        '''what the diagnostic added to its scratch report on top of the seeded values'''
+        result = DiagnosticsReport()
+        for key, value in scratch_report.items():
+            if key not in REPORT_META_KEYS and (key not in seeded or seeded[key] != value):
+                result[key] = value
+        seeded_errors = len(seeded[DIAGNOSTICS_ERRORS_KEY])
+        result[DIAGNOSTICS_ERRORS_KEY] = scratch_report[DIAGNOSTICS_ERRORS_KEY][seeded_errors:]
+        return result
+
+    def _submit(self, pool: ThreadPoolExecutor, diagnostic, running: dict) -> None:
+        # Dependent diagnostics read results (and errors) of the diagnostics they
+        # depend on from the report they are given, so seed the scratch report.
+        seeded = {key: value for key, value in self.items() if key not in REPORT_META_KEYS}
+        scratch_report = DiagnosticsReport(**seeded)
+        scratch_report.set_passed(True)
+        seeded[DIAGNOSTICS_ERRORS_KEY] = list(self[DIAGNOSTICS_ERRORS_KEY])
+        scratch_report[DIAGNOSTICS_ERRORS_KEY] = list(seeded[DIAGNOSTICS_ERRORS_KEY])
+
+        started = time.monotonic()
+        future = pool.submit(_timed_perform_test, diagnostic, scratch_report)
+        deadline = started + get_diagnostic_timeout(diagnostic)
+        running[future] = RunningDiagnostic(diagnostic, scratch_report, seeded, started, deadline)
+
+    def _collect(self, running: dict, finished: set) -> None:
+        now = time.monotonic()
+        for future in list(running):
+            entry = running[future]
+            diagnostic = entry.diagnostic
+            finished_at = now
+            if future.done():
+                outcome, finished_at = self._collect_done(future, entry, now)
+            elif now >= entry.deadline:
+                timeout = get_diagnostic_timeout(diagnostic)
+                LOGGER.error(f"diagnostic {get_diagnostic_name(diagnostic)} "
+                             f"timed out after {timeout}s")
+                self._record_failure_for_all_keys(self.TIMEOUT_MSG % timeout, diagnostic)
+                outcome = OUTCOME_TIMEOUT
+            else:
+                continue
+
+            self._record_timing(diagnostic, finished_at - entry.started, outcome)
+            del running[future]
+            finished.add(id(diagnostic))
+
+    def _collect_done(self, future, entry: RunningDiagnostic, now: float) -> tuple:
+        '''merges a finished diagnostic, returns its outcome and when it finished'''
+        exception = future.exception()
+        if exception is not None:
+            LOGGER.error(f"diagnostic {get_diagnostic_name(entry.diagnostic)} "
+                         f"failed: {exception}")
+            self._record_failure_for_all_keys(exception, entry.diagnostic)
+            return OUTCOME_ERROR, now
+
+        result = self._own_result(entry.scratch_report, entry.seeded)
+        self._merge(result)
+        self._store_cached(entry.diagnostic, result)
+        outcome = OUTCOME_FAILED if result[DIAGNOSTICS_ERRORS_KEY] else OUTCOME_OK
+        return outcome, future.result()
+
+    def _merge(self, result: DiagnosticsReport) -> None:
+        for key, value in result.items():
+            if key not in REPORT_META_KEYS:
+                self[key] = value
+        for key in result[DIAGNOSTICS_ERRORS_KEY]:
+            self.append_error(key)
+        if result[DIAGNOSTICS_ERRORS_KEY]:
+            self.set_passed(False)
+
+    def _record_failure_for_all_keys(self, msg_or_exception, diagnostic) -> None:
+        if not getattr(diagnostic, 'KEYS', None):
+            self.record_failure(msg_or_exception, diagnostic)
+            return
+        for key in get_diagnostic_keys(diagnostic):
+            self.record_failure(msg_or_exception, Diagnostic(key, key))
@@ -0,0 +1,261 @@
+'''
+asyncio versions of the dbus proxies, with the same methods as their
+synchronous counterparts but as coroutines, so queries to several services
+can run concurrently on one event loop:
+
+    async def probe():
+        return await asyncio.gather(AsyncNetworkManager().get_connect_state(),
+                                    AsyncModemManager().get_all_modems())
+
+    run_sync(probe(), timeout=5)
+
+dbus-python has no asyncio integration. With the dbus main loop running
+calls are sent without blocking and their replies, delivered on the main
+loop thread, complete futures on the event loop. Without it the blocking
+calls run in a small thread pool shared by the process.
+'''
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Awaitable, Callable, List, Optional
+
+import dbus
+
+from hw_diag.utilities.dbus_proxy.connection import dbus_connection
+from hw_diag.utilities.dbus_proxy.dbus_ids import DBusIds
+from hw_diag.utilities.dbus_proxy.modem import Modem
+from hw_diag.utilities.dbus_proxy.modem_manager import ModemManager
+from hw_diag.utilities.dbus_proxy.network_manager import NetworkManager
+from hw_diag.utilities.dbus_proxy.sim import Sim
+from hw_diag.utilities.dbus_proxy.systemd_unit import SystemDUnit
+
+
+# dbus' own default reply timeout, in seconds
+DEFAULT_CALL_TIMEOUT = 25
+# Threads running blocking calls when the dbus main loop isn't available
+BLOCKING_WORKERS = int(os.getenv('DBUS_ASYNC_WORKERS', 4))
+
+_executor = ThreadPoolExecutor(max_workers=BLOCKING_WORKERS, thread_name_prefix='dbus-aio')
+
+
+def run_blocking(func: Callable, *args) -> Awaitable:
+    '''runs func in the dbus thread pool'''
+    loop = asyncio.get_running_loop()
+    return loop.run_in_executor(_executor, partial(func, *args))
+
+
+def run_sync(coro: Awaitable, timeout: Optional[float] = None) -> Any:
+    '''runs coro on a new event loop, for callers that aren't async'''
+    if timeout is not None:
+        coro = asyncio.wait_for(coro, timeout)
+    return asyncio.run(coro)
+
+
+def _resolve(future: asyncio.Future, result: Any) -> None:
+    # the caller may have timed out or been cancelled in the meantime
+    if not future.done():
+        future.set_result(result)
+
+
+def _reject(future: asyncio.Future, error: Exception) -> None:
+    if not future.done():
+        future.set_exception(error)
+
+
+async def _call_nonblocking(service: str, path: str, interface: str, method: str,
+                            args: tuple, timeout: float) -> Any:
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def on_reply(*result):
+        value = result[0] if len(result) == 1 else (result or None)
+        loop.call_soon_threadsafe(_resolve, future, value)
+
+    def on_error(error):
+        loop.call_soon_threadsafe(_reject, future, error)
+
+    iface = dbus_connection.get_interface(service, path, interface)
+    getattr(iface, method)(*args, reply_handler=on_reply, error_handler=on_error, timeout=timeout)
+    return await asyncio.wait_for(future, timeout)
+
+
+async def call_method(service: str, path: str, interface: str, method: str, *args,
+                      timeout: float = DEFAULT_CALL_TIMEOUT) -> Any:
+    '''
+    calls method on the shared connection, retrying once on a fresh one if
+    the first went away. Raises asyncio.TimeoutError after timeout secs.
+    '''
+    if not dbus_connection.signals_enabled:
+        return await asyncio.wait_for(
+            run_blocking(dbus_connection.call,
+                         lambda: getattr(dbus_connection.get_interface(service, path, interface),
+                                         method)(*args)),
+            timeout)
+
+    try:
+        return await _call_nonblocking(service, path, interface, method, args, timeout)
+    except dbus.exceptions.DBusException as e:
+        if not dbus_connection.recover(e):
+            raise
+        return await _call_nonblocking(service, path, interface, method, args, timeout)
+
+
+class AsyncDBusObject(object):
+    '''
+    Base class for the asyncio dbus objects, see DBusObject
+    '''
+
+    def __init__(self, service: str, path: str, interface: str) -> None:
+        self._service = service
+        self._path = path
+        self._interface_name = interface
+
+    async def _call(self, method: str, *args, timeout: float = DEFAULT_CALL_TIMEOUT) -> Any:
+        return await call_method(self._service, self._path, self._interface_name, method, *args,
+                                 timeout=timeout)
+
+    async def get_properties(self) -> dict:
+        return await call_method(self._service, self._path, DBusIds.DBUS_PROPERTIES_IF,
+                                 'GetAll', self._interface_name)
+
+    async def get_property(self, property_name: str) -> Any:
+        return await call_method(self._service, self._path, DBusIds.DBUS_PROPERTIES_IF,
+                                 'Get', self._interface_name, property_name)
+
+
+class AsyncNetworkManager(AsyncDBusObject):
+
+    def __init__(self) -> None:
+        super(AsyncNetworkManager, self).__init__(DBusIds.DBUS_NM_SERVICE,
+                                                  DBusIds.DBUS_NM_PATH,
+                                                  DBusIds.DBUS_NM_IF)
+
+    async def get_connect_state(self) -> str:
+        state = await self._call('state')
+        return NetworkManager.nm_state.get(state, 'Unknown')
+
+    async def is_connected(self) -> bool:
+        return 'Connected' in await self.get_connect_state()
+
+    async def get_gateways(self) -> list:
+        # answered from the property cache, which may have to load it
+        return await run_blocking(NetworkManager().get_gateways)
+
+
+class AsyncSim(AsyncDBusObject):
+
+    def __init__(self, sim_obj_path: str) -> None:
+        super(AsyncSim, self).__init__(DBusIds.DBUS_MM1_SERVICE,
+                                       sim_obj_path,
+                                       DBusIds.DBUS_MM1_SIM_IF)
+
+    async def is_att_sim(self) -> bool:
+        operatorid = await self.get_property('OperatorIdentifier')
+        return Sim.is_att_operator(operatorid)
+
+
+class AsyncModem(AsyncDBusObject):
+    '''
+    asyncio version of Modem
+    '''
+
+    def __init__(self, modem_obj_path: str) -> None:
+        super(AsyncModem, self).__init__(DBusIds.DBUS_MM1_SERVICE,
+                                         modem_obj_path,
+                                         DBusIds.DBUS_MM1_MODEM_IF)
+
+    async def at_command(self, cmd: str, timeout: int = 2000) -> str:
+        # timeout is ModemManager's, in ms, the reply may take a little longer
+        return await self._call('Command', cmd, timeout, timeout=timeout / 1000 + 1)
+
+    async def get_fw_version(self) -> str:
+        return await self.at_command(Modem.FIRMWARE_VER_AT_CMD)
+
+    async def get_ue_mode(self) -> str:
+        response = await self.at_command(Modem.UE_MODE_SETTING_READ_AT_CMD)
+        return Modem.parse_ue_mode(response)
+
+    async def set_at_value(self, cmd: str, value: str) -> str:
+        return await self.at_command(cmd + ',' + value)
+
+    async def set_ue_mode(self, value: str = Modem.UE_MODE_DATA_ONLY_VALUE) -> str:
+        return await self.set_at_value(Modem.UE_MODE_SETTING_WRITE_AT_CMD, value)
+
+    async def get_service_domain(self) -> str:
+        response = await self.at_command(Modem.SERVICE_DOMAIN_AT_CMD)
+        return Modem.parse_service_domain(response)
+
+    async def set_service_domain(self, value: str = Modem.SERVICE_DOMAIN_PS_VALUE) -> str:
+        return await self.at_command(Modem.service_domain_command(value))
+
+    async def reset(self) -> str:
+        return await self.at_command(Modem.REST_AT_CMD)
+
+    async def get_sim(self) -> AsyncSim:
+        sim_obj_path = await self.get_property('Sim')
+        return AsyncSim(sim_obj_path)
+
+
+class AsyncModemManager(AsyncDBusObject):
+
+    def __init__(self) -> None:
+        super(AsyncModemManager, self).__init__(DBusIds.DBUS_MM1_SERVICE,
+                                                DBusIds.DBUS_MM1_PATH,
+                                                DBusIds.DBUS_MM1_IF)
+
+    async def get_all_modems(self) -> List[AsyncModem]:
+        # the modems come from the hardware inventory, see ModemManager
+        modems = await run_blocking(ModemManager().get_all_modems)
+        return [AsyncModem(modem._path) for modem in modems]
+
+    async def find_modem_by_properties(self, desired_properties: dict) -> Optional[AsyncModem]:
+        modem = await run_blocking(ModemManager().find_modem_by_properties, desired_properties)
+        return AsyncModem(modem._path) if modem else None
+
+
+class AsyncSystemDUnit(AsyncDBusObject):
+    '''
+    asyncio version of SystemDUnit
+    '''
+
+    def __init__(self, unit_obj_path: str) -> None:
+        super(AsyncSystemDUnit, self).__init__(DBusIds.SYSTEMD_SERVICE, unit_obj_path,
+                                               DBusIds.SYSTEMD_UNIT_IF)
+
+    async def start(self, mode: str = 'fail') -> str:
+        return await self._call('Start', mode)
+
+    async def stop(self, mode: str = 'fail') -> str:
+        return await self._call('Stop', mode)
+
+    async def restart(self, mode: str = 'fail') -> str:
+        return await self._call('Restart', mode)
+
+    # the waits block on systemd's job signals, see SystemDUnit
+    async def wait_stop(self, mode: str = 'fail', timeout=10) -> bool:
+        return await run_blocking(SystemDUnit(self._path).wait_stop, mode, timeout)
+
+    async def wait_start(self, mode: str = 'fail', timeout=10) -> bool:
+        return await run_blocking(SystemDUnit(self._path).wait_start, mode, timeout)
+
+    async def wait_restart(self, mode: str = 'fail', timeout=20) -> bool:
+        return await run_blocking(SystemDUnit(self._path).wait_restart, mode, timeout)
+
+    async def is_running(self) -> bool:
+        return str(await self.get_property('SubState')).strip() == 'running'
+
+    async def is_stopped(self) -> bool:
+        return str(await self.get_property('SubState')).strip() == 'dead'
+
+
+class AsyncSystemd(AsyncDBusObject):
+
+    def __init__(self) -> None:
+        super(AsyncSystemd, self).__init__(DBusIds.SYSTEMD_SERVICE,
+                                           DBusIds.SYSTEMD_PATH,
+                                           DBusIds.SYSTEMD_MANAGER_IF)
+
+    async def get_unit(self, servicename: str) -> AsyncSystemDUnit:
+        unit_path = await self._call('GetUnit', servicename)
+        return AsyncSystemDUnit(unit_path)
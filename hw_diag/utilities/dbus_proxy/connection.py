@@ -0,0 +1,206 @@
+import threading
+from typing import Any, Callable, Optional
+
+import dbus
+from hm_pyhelper.logger import get_logger
+
+from hw_diag.utilities.dbus_proxy.dbus_ids import DBusIds
+
+
+LOGGER = get_logger(__name__)
+
+# The connection to the bus itself is gone
+DISCONNECT_ERRORS = [
+    'org.freedesktop.DBus.Error.Disconnected',
+    'org.freedesktop.DBus.Error.NoServer',
+]
+# The bus is fine but the service behind the cached proxies restarted
+STALE_PROXY_ERRORS = [
+    'org.freedesktop.DBus.Error.ServiceUnknown',
+    'org.freedesktop.DBus.Error.UnknownObject',
+]
+
+
+def _dbus_error_name(error: Exception) -> Optional[str]:
+    if not isinstance(error, dbus.exceptions.DBusException):
+        return None
+    return error.get_dbus_name()
+
+
+def is_disconnect_error(error: Exception) -> bool:
+    return _dbus_error_name(error) in DISCONNECT_ERRORS
+
+
+def is_reconnect_error(error: Exception) -> bool:
+    return _dbus_error_name(error) in DISCONNECT_ERRORS + STALE_PROXY_ERRORS
+
+
+class DBusConnection(object):
+    '''
+    System bus connection shared by the whole process.
+
+    Proxy objects and interfaces are created once per (service, path) and
+    (service, path, interface) and reused afterwards. When the bus drops or a
+    service restarts everything is thrown away and rebuilt on the next use,
+    call() does that and retries once.
+
+    Signal receivers are only called once start_mainloop() succeeded. They are
+    registered again on every new connection. generation changes on every
+    reset, state cached by consumers before that may be stale.
+    '''
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._bus = None
+        self._objects = {}
+        self._interfaces = {}
+        self._receivers = []
+        self._mainloop = None
+        self._mainloop_thread = None
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.reconnects = 0
+
+    @property
+    def bus(self) -> Any:
+        with self._lock:
+            if self._bus is None:
+                if self._mainloop is not None:
+                    self._bus = dbus.SystemBus(mainloop=self._mainloop)
+                else:
+                    self._bus = dbus.SystemBus()
+                # don't take the process down with the bus, reconnect instead
+                self._bus.set_exit_on_disconnect(False)
+                for handler, kwargs in self._receivers:
+                    self._bus.add_signal_receiver(handler, **kwargs)
+            return self._bus
+
+    @property
+    def signals_enabled(self) -> bool:
+        return self._mainloop_thread is not None
+
+    def start_mainloop(self) -> bool:
+        '''
+        runs a GLib main loop in a background thread so signal receivers get
+        called. Returns false if PyGObject isn't installed, signals are never
+        delivered then and consumers have to poll.
+        '''
+        with self._lock:
+            if self._mainloop_thread is not None:
+                return True
+            try:
+                from dbus.mainloop.glib import DBusGMainLoop
+                from gi.repository import GLib
+            except ImportError as e:
+                LOGGER.info(f"dbus signals not available, no GLib main loop: {e}")
+                return False
+
+            self._mainloop = DBusGMainLoop()
+            # a connection opened before has no main loop attached
+            self.reset()
+            self._mainloop_thread = threading.Thread(target=GLib.MainLoop().run,
+                                                     name='dbus-mainloop', daemon=True)
+            self._mainloop_thread.start()
+            return True
+
+    def add_signal_receiver(self, handler: Callable, **kwargs) -> None:
+        '''
+        registers handler with bus.add_signal_receiver, now and again on
+        every reconnect
+        '''
+        with self._lock:
+            self._receivers.append((handler, kwargs))
+            if self._bus is not None:
+                self._bus.add_signal_receiver(handler, **kwargs)
+
+    def remove_signal_receiver(self, handler: Callable, **kwargs) -> None:
+        with self._lock:
+            if (handler, kwargs) in self._receivers:
+                self._receivers.remove((handler, kwargs))
+            if self._bus is not None:
+                self._bus.remove_signal_receiver(handler, **kwargs)
+
+    def get_object(self, service: str, path: str) -> Any:
+        key = (service, str(path))
+        with self._lock:
+            proxy = self._objects.get(key)
+            if proxy is not None:
+                self.hits += 1
+                return proxy
+            self.misses += 1
+            proxy = self.bus.get_object(service, path)
+            self._objects[key] = proxy
+            return proxy
+
+    def get_interface(self, service: str, path: str, interface: str) -> Any:
+        key = (service, str(path), interface)
+        with self._lock:
+            iface = self._interfaces.get(key)
+            if iface is not None:
+                self.hits += 1
+                return iface
+            self.misses += 1
+            iface = dbus.Interface(self.get_object(service, path), interface)
+            self._interfaces[key] = iface
+            return iface
+
+    def get_properties_interface(self, service: str, path: str) -> Any:
+        return self.get_interface(service, path, DBusIds.DBUS_PROPERTIES_IF)
+
+    def list_names(self) -> list:
+        return self.call(lambda: self.bus.list_names())
+
+    def call(self, func: Callable[[], Any]) -> Any:
+        '''
+        runs func, which should look up its proxies through this connection,
+        and runs it again on a fresh connection if the first one went away
+        '''
+        try:
+            return func()
+        except dbus.exceptions.DBusException as e:
+            if not self.recover(e):
+                raise
+            return func()
+
+    def recover(self, error: Exception) -> bool:
+        '''
+        drops the connection or the proxies if error says they went away,
+        returns true if the failed call is worth retrying
+        '''
+        if not is_reconnect_error(error):
+            return False
+        LOGGER.warning(f"dbus call failed, reconnecting: {error.get_dbus_name()}")
+        self.reset(close_bus=is_disconnect_error(error))
+        self.reconnects += 1
+        return True
+
+    def reset(self, close_bus: bool = True) -> None:
+        '''drops every cached proxy and, if close_bus, the connection'''
+        with self._lock:
+            self._objects.clear()
+            self._interfaces.clear()
+            self.generation += 1
+            if not close_bus:
+                return
+            bus, self._bus = self._bus, None
+            if bus is not None:
+                try:
+                    # closing the shared bus makes dbus.SystemBus() open a new one
+                    bus.close()
+                except Exception as e:
+                    LOGGER.debug(f"error closing dbus connection: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'reconnects': self.reconnects,
+                'signals_enabled': self.signals_enabled,
+                'cached_objects': len(self._objects),
+                'cached_interfaces': len(self._interfaces),
+            }
+
+
+dbus_connection = DBusConnection()
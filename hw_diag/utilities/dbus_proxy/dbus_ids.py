@@ -5,6 +5,16 @@ class DBusIds:
     DBUS_PROPERTIES_IF = 'org.freedesktop.DBus.Properties'
     DBUS_OBJECTMANAGER_IF = 'org.freedesktop.DBus.ObjectManager'
 
+    # Bus daemon
+    DBUS_SERVICE = 'org.freedesktop.DBus'
+    DBUS_PATH = '/org/freedesktop/DBus'
+    DBUS_IF = 'org.freedesktop.DBus'
+
+    # BlueZ
+    DBUS_BLUEZ_SERVICE = 'org.bluez'
+    DBUS_BLUEZ_PATH = '/'
+    DBUS_BLUEZ_ADAPTER_IF = 'org.bluez.Adapter1'
+
     # Modem manager
     DBUS_MM1_SERVICE = 'org.freedesktop.ModemManager1'
     DBUS_MM1_PATH = '/org/freedesktop/ModemManager1'
@@ -18,7 +28,10 @@ class DBusIds:
     # Network manager
     DBUS_NM_SERVICE = 'org.freedesktop.NetworkManager'
     DBUS_NM_PATH = '/org/freedesktop/NetworkManager'
+    # NetworkManager's ObjectManager lives one level up
+    DBUS_NM_OBJECTMANAGER_PATH = '/org/freedesktop'
     DBUS_NM_IF = 'org.freedesktop.NetworkManager'
+    DBUS_NM_DEVICE_IF = 'org.freedesktop.NetworkManager.Device'
     DBUS_NM_ACTIVE_CONNECTION_IF = 'org.freedesktop.NetworkManager.Connection.Active'
     DBUS_NM_IPV4CONFIG_IF = 'org.freedesktop.NetworkManager.IP4Config'
 
@@ -1,21 +1,50 @@
-import dbus
+from typing import Any
 
-from hw_diag.utilities.dbus_proxy.dbus_ids import DBusIds
+from hw_diag.utilities.dbus_proxy.connection import dbus_connection
 
 
 class DBusObject(object):
-    '''Base class for various dbus objects'''
+    '''
+    Base class for various dbus objects
+
+    Proxies come from the process wide dbus_connection, so constructing one is
+    cheap and they keep working after the connection was re-established.
+    '''
 
     def __init__(self, service: str, path: str, interface: str) -> None:
-        self._system_bus = dbus.SystemBus()
-        self._object_proxy = self._system_bus.get_object(service, path)
-        self._object_if = dbus.Interface(self._object_proxy, interface)
-        self._properties_iface = dbus.Interface(self._object_proxy, DBusIds.DBUS_PROPERTIES_IF)
+        self._service = service
+        self._path = path
+        self._interface_name = interface
+
+    @property
+    def _system_bus(self) -> Any:
+        return dbus_connection.bus
+
+    @property
+    def _object_proxy(self) -> Any:
+        return dbus_connection.get_object(self._service, self._path)
+
+    @property
+    def _object_if(self) -> Any:
+        return self._get_interface(self._interface_name)
+
+    @property
+    def _properties_iface(self) -> Any:
+        return dbus_connection.get_properties_interface(self._service, self._path)
+
+    def _get_interface(self, interface: str) -> Any:
+        return dbus_connection.get_interface(self._service, self._path, interface)
+
+    def _call(self, method: str, *args) -> Any:
+        '''calls method on the object's interface, reconnecting if needed'''
+        return dbus_connection.call(lambda: getattr(self._object_if, method)(*args))
 
     def get_properties(self):
-        props = self._properties_iface.GetAll(self._object_if.dbus_interface)
+        props = dbus_connection.call(
+            lambda: self._properties_iface.GetAll(self._interface_name))
         return props
 
     def get_property(self, property_name: str) -> str:
-        prop = self._properties_iface.Get(self._object_if.dbus_interface, property_name)
+        prop = dbus_connection.call(
+            lambda: self._properties_iface.Get(self._interface_name, property_name))
         return prop
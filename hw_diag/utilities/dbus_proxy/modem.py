@@ -25,36 +25,48 @@ class Modem(DBusObject):
                                     DBusIds.DBUS_MM1_MODEM_IF)
 
     def at_command(self, cmd: str, timeout: int = 2000) -> str:
-        response = self._object_if.Command(cmd, timeout)
+        response = self._call('Command', cmd, timeout)
         return response
 
     def get_fw_version(self) -> str:
         return self.at_command(self.FIRMWARE_VER_AT_CMD)
 
-    def get_ue_mode(self) -> str:
-        response = self.at_command(self.UE_MODE_SETTING_READ_AT_CMD)
+    @staticmethod
+    def parse_ue_mode(response: str) -> str:
         values = response.strip().split(' ')
         if len(values) == 2:
             return values[1]
         return ''
 
+    def get_ue_mode(self) -> str:
+        response = self.at_command(self.UE_MODE_SETTING_READ_AT_CMD)
+        return self.parse_ue_mode(response)
+
     def set_at_value(self, cmd: str, value: str) -> str:
         return self.at_command(cmd + ',' + value)
 
     def set_ue_mode(self, value: str = UE_MODE_DATA_ONLY_VALUE) -> str:
         return self.set_at_value(self.UE_MODE_SETTING_WRITE_AT_CMD, value)
 
-    def get_service_domain(self) -> str:
-        response = self.at_command(self.SERVICE_DOMAIN_AT_CMD)
+    @staticmethod
+    def parse_service_domain(response: str) -> str:
         values = response.strip().split(',')
         if len(values) == 2:
             return values[1].strip()
         return ''
 
+    def get_service_domain(self) -> str:
+        response = self.at_command(self.SERVICE_DOMAIN_AT_CMD)
+        return self.parse_service_domain(response)
+
+    @classmethod
+    def service_domain_command(cls, value: str) -> str:
+        if value == cls.SERVICE_DOMAIN_PS_VALUE:
+            return cls.SERVICE_DOMAIN_PS_WRITE_AT_CMD + ',' + value
+        return cls.SERVICE_DOMAIN_AT_CMD + ',' + value
+
     def set_service_domain(self, value: str = SERVICE_DOMAIN_PS_VALUE) -> str:
-        if value == self.SERVICE_DOMAIN_PS_VALUE:
-            return self.at_command(self.SERVICE_DOMAIN_PS_WRITE_AT_CMD + ',' + value)
-        return self.at_command(self.SERVICE_DOMAIN_AT_CMD + ',' + value)
+        return self.at_command(self.service_domain_command(value))
 
     def reset(self) -> str:
         return self.at_command(self.REST_AT_CMD)
@@ -1,8 +1,7 @@
-import dbus
-
 from hw_diag.utilities.dbus_proxy.dbus_ids import DBusIds
 from hw_diag.utilities.dbus_proxy.dbus_object import DBusObject
 from hw_diag.utilities.dbus_proxy.modem import Modem
+from hw_diag.utilities.hardware_inventory import hardware_inventory
 from hm_pyhelper.logger import get_logger
 
 logging = get_logger(__name__)
@@ -14,15 +13,12 @@ class ModemManager(DBusObject):
         super(ModemManager, self).__init__(DBusIds.DBUS_MM1_SERVICE,
                                            DBusIds.DBUS_MM1_PATH,
                                            DBusIds.DBUS_MM1_IF)
-        self._mm_objmanager_iface = dbus.Interface(self._object_proxy,
-                                                   DBusIds.DBUS_OBJECTMANAGER_IF)
 
     def get_all_modems(self) -> list:
         '''
         @rtype: list of all managed Modem objects
         '''
-        modem_paths = self._mm_objmanager_iface.GetManagedObjects()
-        modems = [Modem(modem_path) for modem_path in modem_paths]
+        modems = [Modem(record.path) for record in hardware_inventory.modems()]
         return modems
 
     def _do_properties_match(self, actual_properties: dict, desired_properties: dict) -> bool:
@@ -48,13 +44,10 @@ class ModemManager(DBusObject):
         @param properties: dict of properties to match
         @rtype: Modem object or None if properties don't match any modem
         '''
-        modems = self.get_all_modems()
-
-        # iterate over all object paths
-        for modem in modems:
-            props = modem.get_properties()
-            if self._do_properties_match(props, desired_properties):
-                return modem
+        # properties come from the inventory, no call per modem
+        for record in hardware_inventory.modems():
+            if self._do_properties_match(record.properties, desired_properties):
+                return Modem(record.path)
 
 
 if __name__ == '__main__':
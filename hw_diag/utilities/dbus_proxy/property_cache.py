@@ -0,0 +1,209 @@
+import os
+import threading
+import time
+from functools import partial
+from typing import Optional
+
+from hm_pyhelper.logger import get_logger
+
+from hw_diag.utilities.dbus_proxy.connection import dbus_connection
+from hw_diag.utilities.dbus_proxy.dbus_ids import DBusIds
+
+
+LOGGER = get_logger(__name__)
+
+# Services mirrored, with the path their ObjectManager is exported on
+MIRRORED_SERVICES = {
+    DBusIds.DBUS_BLUEZ_SERVICE: DBusIds.DBUS_BLUEZ_PATH,
+    DBusIds.DBUS_MM1_SERVICE: DBusIds.DBUS_MM1_PATH,
+    DBusIds.DBUS_NM_SERVICE: DBusIds.DBUS_NM_OBJECTMANAGER_PATH,
+}
+# Without signals a mirror is only trusted for this long
+POLL_TTL_SECONDS = float(os.getenv('DBUS_CACHE_POLL_TTL_SECONDS', 5))
+
+
+class DBusPropertyCache(object):
+    '''
+    In memory mirror of the objects BlueZ, ModemManager and NetworkManager
+    export, as returned by their ObjectManager: {path: {interface: {prop: value}}}.
+
+    A service's mirror is loaded with one GetManagedObjects call. With the dbus
+    main loop running it's then kept current by InterfacesAdded,
+    InterfacesRemoved and PropertiesChanged and dropped when the service
+    restarts, so reads don't touch the bus. Without it the mirror is
+    reloaded once it's older than POLL_TTL_SECONDS.
+    '''
+
+    def __init__(self, services: dict = MIRRORED_SERVICES,
+                 poll_ttl: float = POLL_TTL_SECONDS) -> None:
+        self.services = services
+        self.poll_ttl = poll_ttl
+        self._lock = threading.RLock()
+        self._mirrors = {}
+        self._loaded = {}
+        self._subscribed = False
+        self.loads = 0
+        self.events = 0
+
+    def start(self) -> bool:
+        '''subscribes to the signals, returns false if they can't be delivered'''
+        if not dbus_connection.start_mainloop():
+            return False
+
+        with self._lock:
+            if self._subscribed:
+                return True
+            for service in self.services:
+                dbus_connection.add_signal_receiver(
+                    partial(self._on_interfaces_added, service),
+                    signal_name='InterfacesAdded', dbus_interface=DBusIds.DBUS_OBJECTMANAGER_IF,
+                    bus_name=service)
+                dbus_connection.add_signal_receiver(
+                    partial(self._on_interfaces_removed, service),
+                    signal_name='InterfacesRemoved', dbus_interface=DBusIds.DBUS_OBJECTMANAGER_IF,
+                    bus_name=service)
+                dbus_connection.add_signal_receiver(
+                    partial(self._on_properties_changed, service),
+                    signal_name='PropertiesChanged', dbus_interface=DBusIds.DBUS_PROPERTIES_IF,
+                    bus_name=service, path_keyword='path')
+            dbus_connection.add_signal_receiver(
+                self._on_name_owner_changed, signal_name='NameOwnerChanged',
+                dbus_interface=DBusIds.DBUS_IF, bus_name=DBusIds.DBUS_SERVICE)
+            self._subscribed = True
+            self.invalidate()
+        return True
+
+    def _is_fresh(self, service: str) -> bool:
+        loaded = self._loaded.get(service)
+        if loaded is None:
+            return False
+        generation, loaded_at = loaded
+        if generation != dbus_connection.generation:
+            # loaded over a connection that has been dropped since
+            return False
+        if self._subscribed and dbus_connection.signals_enabled:
+            return True
+        return time.monotonic() - loaded_at < self.poll_ttl
+
+    def _load(self, service: str) -> dict:
+        objects = dbus_connection.call(
+            lambda: dbus_connection.get_interface(service, self.services[service],
+                                                  DBusIds.DBUS_OBJECTMANAGER_IF).GetManagedObjects())
+        mirror = {
+            str(path): {str(interface): dict(props) for interface, props in interfaces.items()}
+            for path, interfaces in objects.items()
+        }
+        self.loads += 1
+        return mirror
+
+    def _mirror(self, service: str) -> dict:
+        with self._lock:
+            if not self._is_fresh(service):
+                # Held while loading so concurrent readers share one call
+                self._mirrors[service] = self._load(service)
+                self._loaded[service] = (dbus_connection.generation, time.monotonic())
+            return self._mirrors[service]
+
+    def get_managed_objects(self, service: str) -> dict:
+        '''copy of the mirror of service: {path: {interface: {prop: value}}}'''
+        with self._lock:
+            mirror = self._mirror(service)
+            return {path: {interface: dict(props) for interface, props in interfaces.items()}
+                    for path, interfaces in mirror.items()}
+
+    def get_objects(self, service: str, interface: str) -> dict:
+        '''{path: properties} of the objects of service implementing interface'''
+        with self._lock:
+            mirror = self._mirror(service)
+            return {path: dict(interfaces[interface]) for path, interfaces in mirror.items()
+                    if interface in interfaces}
+
+    def get_properties(self, service: str, path: str, interface: str) -> dict:
+        '''
+        properties of one object, read with GetAll and kept in the mirror if
+        the ObjectManager didn't report it
+        '''
+        path = str(path)
+        with self._lock:
+            props = self._mirror(service).get(path, {}).get(interface)
+            if props is not None:
+                return dict(props)
+
+        props = dbus_connection.call(
+            lambda: dbus_connection.get_properties_interface(service, path).GetAll(interface))
+        with self._lock:
+            mirror = self._mirrors.get(service)
+            if mirror is not None:
+                mirror.setdefault(path, {})[interface] = dict(props)
+        return dict(props)
+
+    def get_property(self, service: str, path: str, interface: str, name: str) -> Optional[object]:
+        return self.get_properties(service, path, interface).get(name)
+
+    def invalidate(self, service: str = None) -> None:
+        '''drops the mirror of service, or of every service'''
+        with self._lock:
+            if service is None:
+                self._mirrors.clear()
+                self._loaded.clear()
+            else:
+                self._mirrors.pop(service, None)
+                self._loaded.pop(service, None)
+
+    def _on_interfaces_added(self, service: str, path: str, interfaces: dict) -> None:
+        with self._lock:
+            self.events += 1
+            mirror = self._mirrors.get(service)
+            if mirror is None:
+                return
+            entry = mirror.setdefault(str(path), {})
+            for interface, props in interfaces.items():
+                entry[str(interface)] = dict(props)
+
+    def _on_interfaces_removed(self, service: str, path: str, interfaces: list) -> None:
+        with self._lock:
+            self.events += 1
+            mirror = self._mirrors.get(service)
+            if mirror is None or str(path) not in mirror:
+                return
+            entry = mirror[str(path)]
+            for interface in interfaces:
+                entry.pop(str(interface), None)
+            if not entry:
+                del mirror[str(path)]
+
+    def _on_properties_changed(self, service: str, interface: str, changed: dict,
+                               invalidated: list, path: str = None) -> None:
+        with self._lock:
+            self.events += 1
+            mirror = self._mirrors.get(service)
+            if mirror is None:
+                return
+            props = mirror.get(str(path), {}).get(str(interface))
+            if props is None:
+                # not mirrored yet, the next read will fetch it
+                return
+            props.update(changed)
+            for name in invalidated:
+                props.pop(str(name), None)
+            if invalidated:
+                # invalidated properties aren't sent along, the next read
+                # reloads the service to get them
+                self._loaded.pop(service, None)
+
+    def _on_name_owner_changed(self, name: str, old_owner: str, new_owner: str) -> None:
+        if name in self.services:
+            LOGGER.info(f"{name} restarted, dropping its dbus property mirror")
+            self.invalidate(str(name))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'signals': self._subscribed and dbus_connection.signals_enabled,
+                'loads': self.loads,
+                'events': self.events,
+                'mirrored_objects': {service: len(mirror) for service, mirror in self._mirrors.items()},
+            }
+
+
+dbus_property_cache = DBusPropertyCache()
@@ -25,7 +25,11 @@ class Sim(DBusObject):
                                   sim_obj_path,
                                   DBusIds.DBUS_MM1_SIM_IF)
 
+    @classmethod
+    def is_att_operator(cls, operatorid: str) -> bool:
+        all_att_operator_codes = cls.ATT_US_OPERATOR_CODES + cls.ATT_INT_OPERATOR_CODES
+        return operatorid in all_att_operator_codes
+
     def is_att_sim(self) -> bool:
         operatorid = self.get_property('OperatorIdentifier')
-        all_att_operator_codes = self.ATT_US_OPERATOR_CODES + self.ATT_INT_OPERATOR_CODES
-        return operatorid in all_att_operator_codes
+        return self.is_att_operator(operatorid)
@@ -11,7 +11,7 @@ class Systemd(DBusObject):
                                       DBusIds.SYSTEMD_MANAGER_IF)
 
     def get_unit(self, servicename: str) -> SystemDUnit:
-        unit_path = self._object_if.GetUnit(servicename)
+        unit_path = self._call('GetUnit', servicename)
         unit_proxy = SystemDUnit(unit_path)
         return unit_proxy
 
@@ -0,0 +1,150 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from dbus import DBusException
+from hm_pyhelper.logger import get_logger
+
+from hw_diag.utilities.dbus_proxy.connection import dbus_connection
+from hw_diag.utilities.dbus_proxy.dbus_ids import DBusIds
+
+
+LOGGER = get_logger(__name__)
+
+# JobRemoved is emitted for every job on the system, only the latest are kept
+MAX_FINISHED_JOBS = 64
+JOB_RESULT_DONE = 'done'
+
+
+def _remaining(deadline: float) -> float:
+    return max(0.0, deadline - time.monotonic())
+
+
+class SystemdJobWatcher(object):
+    '''
+    Wakes up callers waiting on systemd unit jobs as soon as systemd reports
+    progress, instead of them polling SubState.
+
+    Jobs returned by Start/Stop/Restart are tracked through the manager's
+    JobRemoved signal and the SubState of watched units through their
+    PropertiesChanged signal. Both need the dbus main loop, start() returns
+    false when it isn't available and callers have to poll.
+    '''
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        self._subscribed = False
+        self._manager_generation = None
+        self._finished_jobs = OrderedDict()
+        self._watched = {}
+
+    def start(self) -> bool:
+        '''registers the signal receivers, returns false if signals can't be delivered'''
+        if not dbus_connection.start_mainloop():
+            return False
+
+        with self._cond:
+            if not self._subscribed:
+                dbus_connection.add_signal_receiver(
+                    self._on_job_removed, signal_name='JobRemoved',
+                    dbus_interface=DBusIds.SYSTEMD_MANAGER_IF, bus_name=DBusIds.SYSTEMD_SERVICE)
+                dbus_connection.add_signal_receiver(
+                    self._on_properties_changed, signal_name='PropertiesChanged',
+                    dbus_interface=DBusIds.DBUS_PROPERTIES_IF, bus_name=DBusIds.SYSTEMD_SERVICE,
+                    path_keyword='path')
+                self._subscribed = True
+        self._subscribe_manager()
+        return True
+
+    def _subscribe_manager(self) -> None:
+        # systemd only emits unit and job signals to clients that subscribed,
+        # once per connection
+        if self._manager_generation == dbus_connection.generation:
+            return
+        try:
+            dbus_connection.call(
+                lambda: dbus_connection.get_interface(DBusIds.SYSTEMD_SERVICE, DBusIds.SYSTEMD_PATH,
+                                                      DBusIds.SYSTEMD_MANAGER_IF).Subscribe())
+        except DBusException as e:
+            # already subscribed on this connection
+            LOGGER.debug(f"systemd subscribe failed: {e}")
+        self._manager_generation = dbus_connection.generation
+
+    @contextmanager
+    def watch(self, unit_path: str):
+        '''records the SubState changes of the unit while the block runs'''
+        path = str(unit_path)
+        with self._cond:
+            entry = self._watched.setdefault(path, {'watchers': 0, 'sub_state': None})
+            entry['watchers'] += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                entry['watchers'] -= 1
+                if not entry['watchers']:
+                    self._watched.pop(path, None)
+
+    def _sub_state(self, path: str) -> Optional[str]:
+        entry = self._watched.get(path)
+        return entry['sub_state'] if entry else None
+
+    def wait(self, unit_path: str, job_path: Optional[str], target_state: str,
+             deadline: float, read_state: Callable[[], str]) -> bool:
+        '''
+        blocks until job_path finished and the unit, which has to be watched,
+        reached target_state, or until deadline. read_state is used once to
+        read the SubState from the bus after the job finished.
+        @rtype: true if the unit reached target_state
+        '''
+        path = str(unit_path)
+        job_path = str(job_path) if job_path else None
+        with self._cond:
+            if job_path and not self._cond.wait_for(lambda: job_path in self._finished_jobs,
+                                                    _remaining(deadline)):
+                job_path = None
+                LOGGER.warning(f"systemd didn't report the end of the job for {path} in time")
+                deadline = time.monotonic()
+            if job_path:
+                result = self._finished_jobs.pop(job_path)
+                if result != JOB_RESULT_DONE:
+                    LOGGER.warning(f"systemd job {job_path} for {path} finished with {result}")
+                    return False
+            entry = self._watched.get(path)
+            if entry is not None:
+                # only trust changes reported from here on
+                entry['sub_state'] = None
+
+        sub_state = read_state()
+        if sub_state == target_state:
+            return True
+
+        with self._cond:
+            entry = self._watched.get(path)
+            if entry is not None and entry['sub_state'] is None:
+                entry['sub_state'] = sub_state
+            return self._cond.wait_for(lambda: self._sub_state(path) == target_state,
+                                       _remaining(deadline))
+
+    def _on_job_removed(self, job_id: int, job_path: str, unit: str, result: str) -> None:
+        with self._cond:
+            self._finished_jobs[str(job_path)] = str(result)
+            while len(self._finished_jobs) > MAX_FINISHED_JOBS:
+                self._finished_jobs.popitem(last=False)
+            self._cond.notify_all()
+
+    def _on_properties_changed(self, interface: str, changed: dict, invalidated: list,
+                               path: str = None) -> None:
+        if interface != DBusIds.SYSTEMD_UNIT_IF or 'SubState' not in changed:
+            return
+        with self._cond:
+            entry = self._watched.get(str(path))
+            if entry is None:
+                return
+            entry['sub_state'] = str(changed['SubState'])
+            self._cond.notify_all()
+
+
+systemd_job_watcher = SystemdJobWatcher()
@@ -1,6 +1,15 @@
 import time
+from typing import Optional
+
 from hw_diag.utilities.dbus_proxy.dbus_ids import DBusIds
 from hw_diag.utilities.dbus_proxy.dbus_object import DBusObject
+from hw_diag.utilities.dbus_proxy.systemd_jobs import systemd_job_watcher
+
+
+# Polling intervals when the dbus main loop isn't available, in seconds
+POLL_INTERVAL_MIN = 0.1
+POLL_INTERVAL_MAX = 1
+NO_JOB_PATH = '/'
 
 
 class SystemDUnit(DBusObject):
@@ -13,25 +22,51 @@ class SystemDUnit(DBusObject):
                                           DBusIds.SYSTEMD_UNIT_IF)
 
     def start(self, mode: str = 'fail') -> str:
-        job_path = self._object_if.Start(mode)
+        job_path = self._call('Start', mode)
         return job_path
 
     def stop(self, mode: str = 'fail') -> str:
-        job_path = self._object_if.Stop(mode)
+        job_path = self._call('Stop', mode)
         return job_path
 
     def restart(self, mode: str = 'fail') -> str:
-        job_path = self._object_if.Restart(mode)
+        job_path = self._call('Restart', mode)
         return job_path
 
-    def _wait_state(self, target_state: str, timeout: int) -> bool:
-        sleep_time = 1  # seconds
-        max_polls = int(timeout / sleep_time)
-        for _ in range(max_polls):
-            time.sleep(sleep_time)
-            if self.get_property('SubState').strip() == target_state:
-                return True
-        return False
+    def _sub_state(self) -> str:
+        return str(self.get_property('SubState')).strip()
+
+    def _poll_state(self, target_state: str, deadline: float, job_path: Optional[str]) -> bool:
+        interval = POLL_INTERVAL_MIN
+        while True:
+            props = self.get_properties()
+            # Job is (id, path) of the unit's pending job, (0, '/') if there is none
+            pending_job = str(props.get('Job', (0, NO_JOB_PATH))[1])
+            if job_path is None or pending_job != str(job_path):
+                if str(props.get('SubState')).strip() == target_state:
+                    return True
+            if time.monotonic() + interval > deadline:
+                return False
+            time.sleep(interval)
+            interval = min(interval * 2, POLL_INTERVAL_MAX)
+
+    def _wait_state(self, target_state: str, timeout: int, job_path: Optional[str] = None) -> bool:
+        '''
+        waits for job_path to finish and the unit to reach target_state, woken
+        by systemd's signals if possible and polling the unit otherwise
+        '''
+        deadline = time.monotonic() + timeout
+        if systemd_job_watcher.start():
+            return systemd_job_watcher.wait(self._path, job_path, target_state, deadline,
+                                            self._sub_state)
+        return self._poll_state(target_state, deadline, job_path)
+
+    def _run_job(self, method: str, mode: str, target_state: str, timeout: int) -> bool:
+        # subscribe before the job exists so none of its signals are missed
+        systemd_job_watcher.start()
+        with systemd_job_watcher.watch(self._path):
+            job_path = self._call(method, mode)
+            return self._wait_state(target_state, timeout, job_path)
 
     def wait_stop(self, mode: str = 'fail', timeout=10) -> bool:
         '''
@@ -40,8 +75,7 @@ class SystemDUnit(DBusObject):
         @param timeout: max time to wait for stop in secs
         @rtype: true if stopped else false
         '''
-        self.stop()
-        return self._wait_state('dead', timeout)
+        return self._run_job('Stop', mode, 'dead', timeout)
 
     def wait_start(self, mode: str = 'fail', timeout=10) -> bool:
         '''
@@ -50,8 +84,7 @@ class SystemDUnit(DBusObject):
         @param timeout: max time to wait for stop in secs
         @rtype: true if started else false
         '''
-        self.start(mode)
-        return self._wait_state('running', timeout)
+        return self._run_job('Start', mode, 'running', timeout)
 
     def wait_restart(self, mode: str = 'fail', timeout=20) -> bool:
         '''
@@ -60,13 +93,12 @@ class SystemDUnit(DBusObject):
         @param timeout: max time to wait for stop in secs
         @rtype: true if restarted else false
         '''
-        self.restart(mode)
-        # wait for the command to have an effect
-        time.sleep(2)
-        return self._wait_state('running', timeout)
+        # waiting for the restart job to finish replaces a fixed delay for the
+        # command to have an effect
+        return self._run_job('Restart', mode, 'running', timeout)
 
     def is_running(self) -> bool:
-        return self.get_property('SubState').strip() == 'running'
+        return self._sub_state() == 'running'
 
     def is_stopped(self) -> bool:
-        return self.get_property('SubState').strip() == 'dead'
+        return self._sub_state() == 'dead'
@@ -0,0 +1,120 @@
+import logging
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from hw_diag.utilities.process_lock import SharedGeneration
+
+log = logging.getLogger()
+
+
+class Volatility(object):
+    '''how often a diagnostic value is expected to change'''
+    STATIC = 'static'      # fixed for the lifetime of the boot
+    SLOW = 'slow'          # hardware probes, changes rarely
+    FAST = 'fast'          # status values
+    VOLATILE = 'volatile'  # never cached
+
+
+VOLATILITY_TTLS = {
+    Volatility.STATIC: None,
+    Volatility.SLOW: float(os.getenv('DIAG_CACHE_SLOW_TTL_SECONDS', 300)),
+    Volatility.FAST: float(os.getenv('DIAG_CACHE_FAST_TTL_SECONDS', 15)),
+    Volatility.VOLATILE: 0,
+}
+
+# Failed results are retried sooner, whatever the volatility of the diagnostic.
+FAILURE_TTL_SECONDS = float(os.getenv('DIAG_CACHE_FAILURE_TTL_SECONDS', 15))
+
+
+def volatility_ttl(volatility: str) -> Optional[float]:
+    return VOLATILITY_TTLS[volatility]
+
+
+def get_diagnostic_ttl(diagnostic) -> Optional[float]:
+    '''
+    seconds a diagnostic result can be reused for, None if it never expires.
+    Diagnostics set a VOLATILITY class or an explicit CACHE_TTL, anything that
+    declares neither is treated as volatile.
+    '''
+    ttl = getattr(diagnostic, 'CACHE_TTL', None)
+    if ttl is not None:
+        return ttl
+    return volatility_ttl(getattr(diagnostic, 'VOLATILITY', Volatility.VOLATILE))
+
+
+def _failure_ttl(ttl: Optional[float]) -> float:
+    if ttl is None:
+        return FAILURE_TTL_SECONDS
+    return min(ttl, FAILURE_TTL_SECONDS)
+
+
+class DiagnosticResultCache(object):
+    '''
+    Thread safe store of diagnostic results, each entry with its own expiry.
+
+    Every gunicorn worker has its own entries, invalidating all of them in one
+    worker bumps a shared generation the others check before every read.
+    '''
+
+    def __init__(self, name: str = 'diagnostic_cache') -> None:
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._invalidations = SharedGeneration(name)
+        self._generation = self._invalidations.current()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: str):
+        '''returns the cached value or None if it is missing or has expired'''
+        generation = self._invalidations.current()
+        with self._lock:
+            if generation != self._generation:
+                # invalidated by another worker
+                self._entries.clear()
+                self._generation = generation
+            entry = self._entries.get(name)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._entries[name]
+                self.misses += 1
+                return None
+            self.hits += 1
+            return value
+
+    def set(self, name: str, value, ttl: Optional[float], failed: bool = False) -> None:
+        '''stores a value, a ttl of None keeps it until invalidated'''
+        if failed:
+            ttl = _failure_ttl(ttl)
+        if ttl is not None and ttl <= 0:
+            return
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            self._entries[name] = (value, expires_at)
+
+    def get_or_compute(self, name: str, ttl: Optional[float], func: Callable,
+                       is_failure: Callable = None):
+        value = self.get(name)
+        if value is not None:
+            return value
+        value = func()
+        failed = is_failure(value) if is_failure else False
+        self.set(name, value, ttl, failed=failed)
+        return value
+
+    def invalidate(self, name: str = None) -> None:
+        '''drops one entry, or all of them if no name is given'''
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+                self._generation = self._invalidations.bump()
+            else:
+                self._entries.pop(name, None)
+        log.debug(f"diagnostic cache invalidated: {name or 'all'}")
+
+
+diagnostic_cache = DiagnosticResultCache()
@@ -0,0 +1,72 @@
+import bisect
+import threading
+
+
+# Upper bounds (seconds) of the latency histogram buckets, the last bucket is unbounded.
+LATENCY_BUCKETS = [0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+
+OUTCOME_OK = 'ok'
+OUTCOME_FAILED = 'failed'
+OUTCOME_ERROR = 'error'
+OUTCOME_TIMEOUT = 'timeout'
+OUTCOME_CACHED = 'cached'
+OUTCOMES = [OUTCOME_OK, OUTCOME_FAILED, OUTCOME_ERROR, OUTCOME_TIMEOUT, OUTCOME_CACHED]
+
+
+class LatencyHistogram(object):
+    '''cumulative latency and outcome counts of one diagnostic'''
+
+    def __init__(self) -> None:
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.outcomes = dict.fromkeys(OUTCOMES, 0)
+        self.last = None
+
+    def record(self, seconds: float, outcome: str) -> None:
+        self.outcomes[outcome] += 1
+        self.last = {'seconds': round(seconds, 4), 'outcome': outcome}
+        if outcome == OUTCOME_CACHED:
+            # a cache hit says nothing about how slow the check is
+            return
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def as_dict(self) -> dict:
+        bounds = [str(bound) for bound in LATENCY_BUCKETS] + ['+Inf']
+        return {
+            'count': self.count,
+            'mean_seconds': round(self.total_seconds / self.count, 4) if self.count else None,
+            'max_seconds': round(self.max_seconds, 4),
+            'buckets': dict(zip(bounds, self.buckets)),
+            'outcomes': dict(self.outcomes),
+            'last': self.last
+        }
+
+
+class DiagnosticMetrics(object):
+    '''per diagnostic latency histograms, filled in by ConcurrentDiagnosticsReport'''
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def record(self, name: str, seconds: float, outcome: str) -> None:
+        with self._lock:
+            histogram = self._histograms.setdefault(name, LatencyHistogram())
+            histogram.record(seconds, outcome)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {name: histogram.as_dict()
+                    for name, histogram in sorted(self._histograms.items())}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+
+diagnostic_metrics = DiagnosticMetrics()
@@ -1,18 +1,20 @@
-import json
-import os
-
 from hm_pyhelper.diagnostics import DiagnosticsReport, Diagnostic
-from hw_diag.tasks import perform_hw_diagnostics
 from hw_diag.utilities.balena_supervisor import BalenaSupervisor
+from hw_diag.utilities.diagnostics_snapshot import diagnostics_snapshot
+from hw_diag.utilities.snapshot_store import snapshot_store
 
 
 def read_diagnostics_file():
-    diagnostics = {}
+    diagnostics = diagnostics_snapshot.get()
+    if diagnostics is not None:
+        return diagnostics
+
+    # Nothing in memory yet, kick off a refresh in the background and serve
+    # whatever the last run left on disk in the meantime.
+    diagnostics_snapshot.request_refresh()
 
     try:
-        perform_hw_diagnostics()
-        with open('diagnostic_data.json', 'r') as f:
-            diagnostics = json.load(f)
+        diagnostics = snapshot_store.read()
     except FileNotFoundError:
         msg = 'Diagnostics have not yet run, please try again in a few minutes'
         diagnostics = {'error': msg}
@@ -24,9 +26,12 @@ def read_diagnostics_file():
 
 
 def cached_diagnostics_data():
-    if os.path.exists('diagnostic_data.json'):
-        with open('diagnostic_data.json', 'r') as f:
-            return json.load(f)
+    diagnostics = diagnostics_snapshot.get()
+    if diagnostics is not None:
+        return diagnostics
+    diagnostics = snapshot_store.read_or_none()
+    if diagnostics is not None:
+        return diagnostics
     return read_diagnostics_file()
 
 
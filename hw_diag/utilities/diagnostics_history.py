@@ -0,0 +1,219 @@
+import datetime
+import json
+import logging
+import os
+import threading
+from typing import Callable, Iterable, List, Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+from hw_diag.database import get_db_session
+from hw_diag.database.models.diagnostics import DiagnosticsHistory
+from hw_diag.utilities.process_lock import file_lock
+from hw_diag.utilities.snapshot_store import UNHASHED_KEYS
+
+
+log = logging.getLogger()
+
+# A full snapshot is stored every KEYFRAME_INTERVAL rows, the rows in between
+# only hold the keys that changed.
+KEYFRAME_INTERVAL = int(os.getenv('DIAG_HISTORY_KEYFRAME_INTERVAL', 48))
+MAX_AGE_DAYS = float(os.getenv('DIAG_HISTORY_MAX_AGE_DAYS', 30))
+MAX_ROWS = int(os.getenv('DIAG_HISTORY_MAX_ROWS', 5000))
+
+
+def _comparable(snapshot: dict) -> dict:
+    '''snapshot as it reads back from the db, without the per run keys'''
+    snapshot = {key: value for key, value in snapshot.items() if key not in UNHASHED_KEYS}
+    return json.loads(json.dumps(snapshot, default=str))
+
+
+def compute_delta(previous: dict, current: dict) -> tuple:
+    '''returns the changed or added keys and the list of removed keys'''
+    changed = {key: value for key, value in current.items()
+               if key not in previous or previous[key] != value}
+    removed = sorted(key for key in previous if key not in current)
+    return changed, removed
+
+
+def apply_row(snapshot: Optional[dict], row: DiagnosticsHistory) -> dict:
+    data = json.loads(row.data)
+    if row.keyframe or snapshot is None:
+        return data
+    snapshot = dict(snapshot)
+    snapshot.update(data)
+    for key in json.loads(row.removed or '[]'):
+        snapshot.pop(key, None)
+    return snapshot
+
+
+class DiagnosticsHistoryStore(object):
+    '''
+    Bounded history of diagnostics snapshots in the sqlite db.
+
+    Runs that change nothing are not stored, the others as a delta against the
+    previous row, with a full keyframe every KEYFRAME_INTERVAL rows. Pruning
+    always keeps the keyframe the oldest remaining deltas are based on.
+
+    The previous state is read back from the db under an inter-process lock,
+    so every gunicorn worker refreshing the snapshot shares the same history.
+    Nothing is recorded while the table does not exist, which is the case in
+    manufacturing where the migrations are skipped.
+    '''
+
+    def __init__(self, session_factory: Callable[[], Session] = get_db_session,
+                 keyframe_interval: int = KEYFRAME_INTERVAL,
+                 max_age_days: float = MAX_AGE_DAYS,
+                 max_rows: int = MAX_ROWS) -> None:
+        self.session_factory = session_factory
+        self.keyframe_interval = keyframe_interval
+        self.max_age_days = max_age_days
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._table_exists = False
+
+    def _has_table(self, session: Session) -> bool:
+        if not self._table_exists:
+            self._table_exists = inspect(session.get_bind()).has_table(DiagnosticsHistory.__tablename__)
+        return self._table_exists
+
+    def _last_state(self, session: Session) -> tuple:
+        '''the snapshot held by the last row and the number of rows since its keyframe'''
+        keyframe = session.query(DiagnosticsHistory.id). \
+            filter(DiagnosticsHistory.keyframe.is_(True)). \
+            order_by(DiagnosticsHistory.id.desc()). \
+            first()
+        if keyframe is None:
+            return None, 0
+
+        snapshot = None
+        rows = 0
+        for row in session.query(DiagnosticsHistory). \
+                filter(DiagnosticsHistory.id >= keyframe.id). \
+                order_by(DiagnosticsHistory.id):
+            snapshot = apply_row(snapshot, row)
+            rows += 1
+        return snapshot, rows - 1
+
+    def record(self, snapshot: dict, dt: datetime.datetime = None) -> bool:
+        '''
+        adds snapshot to the history, returns false if nothing changed since
+        the previous one
+        '''
+        dt = dt or datetime.datetime.utcnow()
+        current = _comparable(snapshot)
+
+        with self._lock, file_lock('diagnostics_history'):
+            session = self.session_factory()
+            try:
+                if not self._has_table(session):
+                    log.debug("diagnostics history table missing, not recording")
+                    return False
+
+                previous, rows_since_keyframe = self._last_state(session)
+                keyframe = previous is None or rows_since_keyframe + 1 >= self.keyframe_interval
+                if keyframe:
+                    changed, removed = current, []
+                else:
+                    changed, removed = compute_delta(previous, current)
+                    if not changed and not removed:
+                        return False
+
+                row = DiagnosticsHistory(dt=dt, keyframe=keyframe, data=json.dumps(changed),
+                                         removed=json.dumps(removed) if removed else None)
+                session.add(row)
+                session.commit()
+                self.prune(session, dt)
+                return True
+            finally:
+                session.close()
+
+    def prune(self, session: Session, now: datetime.datetime = None) -> int:
+        '''drops rows older than max_age_days and beyond max_rows'''
+        now = now or datetime.datetime.utcnow()
+        cutoff = now - datetime.timedelta(days=self.max_age_days)
+        boundary = session.query(DiagnosticsHistory.id). \
+            filter(DiagnosticsHistory.dt < cutoff). \
+            order_by(DiagnosticsHistory.id.desc()). \
+            first()
+        boundary_id = boundary.id + 1 if boundary else None
+
+        count = session.query(DiagnosticsHistory).count()
+        if count > self.max_rows:
+            oldest_kept = session.query(DiagnosticsHistory.id). \
+                order_by(DiagnosticsHistory.id.desc()). \
+                offset(self.max_rows - 1). \
+                first()
+            if oldest_kept and (boundary_id is None or oldest_kept.id > boundary_id):
+                boundary_id = oldest_kept.id
+
+        if boundary_id is None:
+            return 0
+
+        # Deltas from boundary_id on need the keyframe they start from
+        keyframe = session.query(DiagnosticsHistory.id). \
+            filter(DiagnosticsHistory.keyframe.is_(True)). \
+            filter(DiagnosticsHistory.id <= boundary_id). \
+            order_by(DiagnosticsHistory.id.desc()). \
+            first()
+        if keyframe is None:
+            return 0
+
+        deleted = session.query(DiagnosticsHistory). \
+            filter(DiagnosticsHistory.id < keyframe.id). \
+            delete(synchronize_session=False)
+        session.commit()
+        if deleted:
+            log.debug("pruned %s diagnostics history rows", deleted)
+        return deleted
+
+    def query(self, start: datetime.datetime = None, end: datetime.datetime = None,
+              keys: Iterable[str] = None) -> List[dict]:
+        '''
+        snapshots recorded between start and end (inclusive), oldest first, as
+        {'dt': ..., 'diagnostics': {...}} restricted to keys if given
+        '''
+        session = self.session_factory()
+        try:
+            rows = session.query(DiagnosticsHistory)
+            if start is not None:
+                base = session.query(DiagnosticsHistory.id). \
+                    filter(DiagnosticsHistory.keyframe.is_(True)). \
+                    filter(DiagnosticsHistory.dt <= start). \
+                    order_by(DiagnosticsHistory.dt.desc(), DiagnosticsHistory.id.desc()). \
+                    first()
+                if base is not None:
+                    rows = rows.filter(DiagnosticsHistory.id >= base.id)
+                else:
+                    rows = rows.filter(DiagnosticsHistory.dt >= start)
+            if end is not None:
+                rows = rows.filter(DiagnosticsHistory.dt <= end)
+
+            history = []
+            snapshot = None
+            for row in rows.order_by(DiagnosticsHistory.id):
+                snapshot = apply_row(snapshot, row)
+                if start is not None and row.dt < start:
+                    continue
+                if keys is not None:
+                    diagnostics = {key: snapshot[key] for key in keys if key in snapshot}
+                else:
+                    diagnostics = snapshot
+                history.append({'dt': row.dt, 'diagnostics': diagnostics})
+            return history
+        finally:
+            session.close()
+
+    def changes(self, key: str, start: datetime.datetime = None,
+                end: datetime.datetime = None) -> List[dict]:
+        '''the points in time key took a new value, as {'dt': ..., 'value': ...}'''
+        transitions = []
+        for entry in self.query(start, end, keys=[key]):
+            value = entry['diagnostics'].get(key)
+            if not transitions or transitions[-1]['value'] != value:
+                transitions.append({'dt': entry['dt'], 'value': value})
+        return transitions
+
+
+diagnostics_history = DiagnosticsHistoryStore()
@@ -0,0 +1,205 @@
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+from hw_diag.tasks import perform_hw_diagnostics
+from hw_diag.utilities.process_lock import InterProcessLock
+from hw_diag.utilities.snapshot_store import snapshot_store, content_hash
+
+
+log = logging.getLogger()
+
+# Minimum gap between refreshes that weren't explicitly forced, doubled after
+# every failed run up to REFRESH_MAX_BACKOFF_SECONDS.
+REFRESH_BACKOFF_SECONDS = float(os.getenv('DIAG_SNAPSHOT_BACKOFF_SECONDS', 60))
+REFRESH_MAX_BACKOFF_SECONDS = float(os.getenv('DIAG_SNAPSHOT_MAX_BACKOFF_SECONDS', 1800))
+
+
+class DiagnosticsSnapshot(object):
+    '''
+    Owns the latest hardware diagnostics report.
+
+    The report is refreshed in the background (on a schedule or on demand) and
+    readers are handed the last completed report without touching the hardware.
+    With several gunicorn workers only one refreshes at a time, the others
+    pick its report up from the snapshot store.
+    '''
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._process_lock = InterProcessLock('diagnostics_snapshot')
+        self._diagnostics = None
+        self._hash = None
+        self._updated_at = None
+        self._changed_at = None
+        self._last_attempt_at = None
+        self._last_error = None
+        self._failure_count = 0
+        self._refresh_thread = None
+
+    @property
+    def updated_at(self) -> Optional[datetime]:
+        '''utc time the last completed report was stored, None if it never ran'''
+        return self._updated_at
+
+    @property
+    def changed_at(self) -> Optional[datetime]:
+        '''
+        utc time the report last changed, runs that only refresh last_updated
+        leave it alone
+        '''
+        return self._changed_at
+
+    @property
+    def last_error(self) -> Optional[str]:
+        '''error of the last refresh attempt, None if it succeeded'''
+        return self._last_error
+
+    def age_seconds(self) -> Optional[float]:
+        if self._updated_at is None:
+            return None
+        return (datetime.utcnow() - self._updated_at).total_seconds()
+
+    def is_refreshing(self) -> bool:
+        return self._refresh_lock.locked()
+
+    def _sync_from_store(self) -> None:
+        '''loads the stored report if another worker refreshed it since'''
+        mtime = snapshot_store.mtime()
+        if mtime is None:
+            return
+        stored_at = datetime.utcfromtimestamp(mtime)
+        if self._updated_at is not None and self._updated_at >= stored_at:
+            return
+        try:
+            diagnostics = snapshot_store.read()
+        except Exception as e:
+            log.warning(f"failed to load the stored diagnostics snapshot: {e}")
+            return
+        with self._lock:
+            if self._updated_at is None or self._updated_at < stored_at:
+                self._store(diagnostics, stored_at)
+
+    def get(self) -> Optional[dict]:
+        '''returns a copy of the latest report or None if diagnostics have not run yet'''
+        self._sync_from_store()
+        with self._lock:
+            if self._diagnostics is None:
+                return None
+            return dict(self._diagnostics)
+
+    def _store(self, diagnostics: dict, updated_at: datetime) -> None:
+        '''caller must hold the lock'''
+        digest = content_hash(diagnostics)
+        if digest != self._hash:
+            self._hash = digest
+            self._changed_at = updated_at
+        self._diagnostics = dict(diagnostics)
+        self._updated_at = updated_at
+
+    def set(self, diagnostics: dict) -> None:
+        with self._lock:
+            self._store(diagnostics, datetime.utcnow())
+
+    def freshness(self) -> dict:
+        updated_at = self._updated_at
+        return {
+            'updated_at': updated_at.isoformat() if updated_at else None,
+            'age_seconds': self.age_seconds(),
+            'refreshing': self.is_refreshing(),
+            'last_error': self._last_error
+        }
+
+    def _backoff(self) -> timedelta:
+        seconds = REFRESH_BACKOFF_SECONDS * (2 ** min(self._failure_count, 16))
+        return timedelta(seconds=min(seconds, REFRESH_MAX_BACKOFF_SECONDS))
+
+    def _in_backoff(self) -> bool:
+        if self._last_attempt_at is None:
+            return False
+        return datetime.utcnow() - self._last_attempt_at < self._backoff()
+
+    def _acquire(self, blocking: bool) -> bool:
+        if not self._refresh_lock.acquire(blocking=blocking):
+            return False
+        if not self._process_lock.acquire(blocking=blocking):
+            self._refresh_lock.release()
+            return False
+        return True
+
+    def _release(self) -> None:
+        self._process_lock.release()
+        self._refresh_lock.release()
+
+    def _do_refresh(self, ship: bool) -> dict:
+        '''runs diagnostics, caller must hold the refresh locks'''
+        self._last_attempt_at = datetime.utcnow()
+        try:
+            diagnostics = perform_hw_diagnostics(ship=ship)
+        except Exception as e:
+            self._failure_count += 1
+            self._last_error = str(e)
+            raise e
+
+        self._failure_count = 0
+        self._last_error = None
+        self.set(diagnostics)
+        return diagnostics
+
+    def refresh(self, ship: bool = False) -> Optional[dict]:
+        '''
+        runs the hardware diagnostics in the calling thread and stores the result.
+        A plain refresh is skipped (returns None) if one is already in flight,
+        shipping waits for it as the upload needs its own run.
+        '''
+        if not self._acquire(blocking=ship):
+            log.debug("diagnostics snapshot refresh already in progress, skipping")
+            return None
+        try:
+            return self._do_refresh(ship)
+        finally:
+            self._release()
+
+    def _refresh_worker(self) -> None:
+        try:
+            self._do_refresh(ship=False)
+        except Exception as e:
+            log.error(f"failed to refresh diagnostics snapshot: {e}")
+        finally:
+            self._release()
+
+    def request_refresh(self, force: bool = False) -> bool:
+        '''
+        starts a refresh in a background thread.
+        returns false if a refresh is already in progress, or if the last attempt
+        was too recent and force is not set.
+        '''
+        if not force and self._in_backoff():
+            log.debug("diagnostics snapshot refresh requested too soon, skipping")
+            return False
+
+        if not self._acquire(blocking=False):
+            log.debug("diagnostics snapshot refresh already in progress")
+            return False
+
+        try:
+            self._refresh_thread = threading.Thread(target=self._refresh_worker,
+                                                    name='diagnostics-snapshot-refresh',
+                                                    daemon=True)
+            self._refresh_thread.start()
+        except Exception:
+            self._release()
+            raise
+        return True
+
+    def wait_refresh(self, timeout: float = None) -> None:
+        '''blocks until the background refresh started by request_refresh is done'''
+        thread = self._refresh_thread
+        if thread is not None:
+            thread.join(timeout)
+
+
+diagnostics_snapshot = DiagnosticsSnapshot()
@@ -0,0 +1,126 @@
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Callable
+
+from hm_pyhelper.miner_param import get_gateway_mfr_test_result, get_public_keys_rust, provision_key
+
+from hw_diag.utilities.diagnostic_cache import diagnostic_cache
+from hw_diag.utilities.process_lock import InterProcessLock, SharedGeneration
+from hw_diag.utilities.single_flight import SingleFlight
+
+
+log = logging.getLogger()
+
+# How long a caller waits for its ECC operation, queueing included.
+ECC_BROKER_TIMEOUT_SECONDS = float(os.getenv('ECC_BROKER_TIMEOUT_SECONDS', 120))
+
+
+class EccBroker(object):
+    '''
+    Runs every ECC operation of the process (public keys, gateway_mfr test,
+    key provisioning) on one worker thread, holding an inter-process lock so
+    they never overlap with those of the other gunicorn workers either.
+
+    Identical requests made while one is queued or running share its result
+    through a SingleFlight, and results of read-only operations can be kept
+    until a key is provisioned by any worker.
+    '''
+
+    def __init__(self, name: str = 'ecc') -> None:
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._single_flight = SingleFlight()
+        self._process_lock = InterProcessLock(name)
+        self._invalidations = SharedGeneration(name)
+        self._results = {}
+        self._generation = self._invalidations.current()
+        self._worker = None
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._worker = threading.Thread(target=self._run, name='ecc-broker', daemon=True)
+        self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            func, args, kwargs, future = self._queue.get()
+            self._process_lock.acquire()
+            try:
+                future.set_result(func(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                self._process_lock.release()
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        '''queues func behind the ECC operations already queued'''
+        future = Future()
+        with self._lock:
+            self._ensure_worker()
+            self._queue.put((func, args, kwargs, future))
+        return future
+
+    def _sync_generation(self) -> int:
+        '''drops the cached results if a worker provisioned keys since, caller holds the lock'''
+        generation = self._invalidations.current()
+        if generation != self._generation:
+            self._results.clear()
+            self._generation = generation
+        return generation
+
+    def _call_and_cache(self, name: str, func: Callable, args, kwargs, cache, timeout: float):
+        with self._lock:
+            generation = self._sync_generation()
+        result = self.submit(func, *args, **kwargs).result(timeout)
+        keep = cache(result) if callable(cache) else cache and bool(result)
+        with self._lock:
+            # keys provisioned meanwhile make the result stale
+            if keep and generation == self._sync_generation():
+                self._results[name] = result
+        return result
+
+    def call(self, name: str, func: Callable, *args, cache=False,
+             timeout: float = None, **kwargs):
+        '''
+        runs func on the worker and waits for it, exceptions of func are raised
+        here. Callers of the same name while it's queued or running get its
+        result, and so does everyone while a cached result exists. cache is a
+        bool (non-empty results are kept) or a predicate on the result.
+        '''
+        if timeout is None:
+            timeout = ECC_BROKER_TIMEOUT_SECONDS
+        with self._lock:
+            self._sync_generation()
+            if name in self._results:
+                return self._results[name]
+        return self._single_flight.do(name, self._call_and_cache, name, func, args, kwargs,
+                                      cache, timeout)
+
+    def invalidate(self) -> None:
+        '''forgets cached results, along with the diagnostics derived from them'''
+        with self._lock:
+            self._results.clear()
+            self._generation = self._invalidations.bump()
+        diagnostic_cache.invalidate()
+
+    def get_public_keys(self) -> dict:
+        return self.call('public_keys', get_public_keys_rust, cache=True)
+
+    def get_gateway_mfr_test_result(self) -> dict:
+        # a failed test is run again next time, it may have been transient
+        return self.call('gateway_mfr_test_result', get_gateway_mfr_test_result,
+                         cache=lambda result: result.get('result') == 'pass')
+
+    def provision_key(self, slot: int, force: bool):
+        try:
+            return self.call(f'provision_key:{slot}:{force}', provision_key, slot=slot, force=force)
+        finally:
+            # keys may have changed even if provisioning reported a failure
+            self.invalidate()
+
+
+ecc_broker = EccBroker()
@@ -1,4 +1,5 @@
 from enum import Enum, auto
+import contextlib
 import os
 import json
 import shutil
@@ -12,12 +13,14 @@ from hw_diag.utilities import system_metrics
 from hw_diag.utilities.events_bq_data_model import EventDataModel
 from hw_diag.utilities.osutils import get_rw_storage_path
 from hw_diag.utilities.fifo_disk_queue import FifoDiskQueue
+from hw_diag.utilities.process_lock import file_lock
 
 log = logging.getLogger()
 log.setLevel(logging.DEBUG)
 
 VOLUME_PATH = '/var/watchdog'
 EVENTS_FOLDER = 'events'
+EVENT_QUEUE_LOCK = 'event_queue'
 
 NETWORK_EVENT_BASE = 0
 CONTAINER_EVENT_BASE = 1000
@@ -94,17 +97,32 @@ class EventStreamer(object):
         self.processing_lock = threading.Lock()
         self._max_size = max_size
         self._storage_path = get_rw_storage_path(VOLUME_PATH, EVENTS_FOLDER)
-        self._event_queue = FifoDiskQueue(self._storage_path, maxsize=self._max_size)
+
+    @contextlib.contextmanager
+    def _locked_queue(self):
+        # The queue keeps its head and tail positions in memory. Every gunicorn
+        # worker may stream events, so it is opened afresh for each operation
+        # under a lock they all share.
+        with self.processing_lock, file_lock(EVENT_QUEUE_LOCK):
+            event_queue = FifoDiskQueue(self._storage_path, maxsize=self._max_size)
+            try:
+                yield event_queue
+            finally:
+                event_queue.close()
+
+    def qsize(self) -> int:
+        with self._locked_queue() as event_queue:
+            return event_queue.qsize()
 
     def reset_queue(self) -> None:
-        self._event_queue.close()
-        shutil.rmtree(self._storage_path)
-        self._event_queue = FifoDiskQueue(self._storage_path, maxsize=self._max_size)
+        with self.processing_lock, file_lock(EVENT_QUEUE_LOCK):
+            shutil.rmtree(self._storage_path, ignore_errors=True)
 
     def clear_queued_events(self) -> None:
-        while not self._event_queue.empty():
-            self._event_queue.get()
-            self._event_queue.task_done()
+        with self._locked_queue() as event_queue:
+            while not event_queue.empty():
+                event_queue.get()
+                event_queue.task_done()
 
     def is_event_valid(self, event: dict) -> bool:
         try:
@@ -120,7 +138,8 @@ class EventStreamer(object):
             return
 
         try:
-            self._event_queue.put(event)
+            with self._locked_queue() as event_queue:
+                event_queue.put(event, block=False)
         except Full as e:
             logging.error(f"event queue is full, dropping event: {e}")
         except Exception as e:
@@ -141,18 +160,14 @@ class EventStreamer(object):
             self.reset_queue()
 
     def process_queued_events(self) -> None:
-        # even though event queue is thread safe
-        # we are doing multiple operations potentially from different threads
-        with self.processing_lock:
-            while not self._event_queue.empty():
-                # we don't need to worry about get blocking as we are not working with
-                # threads here.
-                event = self._event_queue.peek()
+        with self._locked_queue() as event_queue:
+            while not event_queue.empty():
+                event = event_queue.peek(block=False)
                 if not _upload_event(event):
                     return
                 # remove the event from the queue
-                self._event_queue.get()
-                self._event_queue.task_done()
+                event_queue.get()
+                event_queue.task_done()
 
 
 event_streamer = EventStreamer()
@@ -5,18 +5,20 @@ import string
 from typing import Union
 from urllib.parse import urlparse
 from hm_pyhelper.logger import get_logger
-from hm_pyhelper.miner_param import get_public_keys_rust, config_search_param, \
+from hm_pyhelper.miner_param import config_search_param, \
     parse_i2c_bus, parse_i2c_address, get_ecc_location
 from hm_pyhelper.hardware_definitions import variant_definitions, get_variant_attribute, \
     is_rockpi
 from hw_diag.constants import DIAG_JSON_KEYS
 from hw_diag.utilities import balena_cloud
-from retry import retry
+from hw_diag.utilities.hardware_inventory import hardware_inventory
+from hw_diag.utilities.ecc_broker import ecc_broker
 
 
 logging = get_logger(__name__)
 
 CPUINFO_SERIAL_KEY = "serial"
+SERIAL_NOT_FOUND = "Serial number not found"
 DBUS_PROPERTIES = 'org.freedesktop.DBus.Properties'
 DBUS_OBJECTMANAGER = 'org.freedesktop.DBus.ObjectManager'
 
@@ -30,31 +32,6 @@ DBUS_NM_OBJECT_PATH = '/org/freedesktop/NetworkManager'
 DBUS_NM_IFACE = 'org.freedesktop.NetworkManager'
 DBUS_NM_DEVICE_IFACE = 'org.freedesktop.NetworkManager.Device'
 
-NM_DEVICE_TYPES = {1: "Ethernet",
-                   2: "Wi-Fi",
-                   5: "Bluetooth",
-                   6: "OLPC",
-                   7: "WiMAX",
-                   8: "Modem",
-                   9: "InfiniBand",
-                   10: "Bond",
-                   11: "VLAN",
-                   12: "ADSL"}
-
-NM_DEVICE_STATES = {0: "Unknown",
-                    10: "Unmanaged",
-                    20: "Unavailable",
-                    30: "Disconnected",
-                    40: "Prepare",
-                    50: "Config",
-                    60: "Need Auth",
-                    70: "IP Config",
-                    80: "IP Check",
-                    90: "Secondaries",
-                    100: "Activated",
-                    110: "Deactivating",
-                    120: "Failed"}
-
 # ModemManager
 DBUS_MM1_SERVICE = 'org.freedesktop.ModemManager1'
 DBUS_MM1_PATH = '/org/freedesktop/ModemManager1'
@@ -64,16 +41,6 @@ DBUS_MM1_IF_MODEM_SIMPLE = 'org.freedesktop.ModemManager1.Modem.Simple'
 DBUS_MM1_IF_MODEM_3GPP = 'org.freedesktop.ModemManager1.Modem.Modem3gpp'
 DBUS_MM1_IF_MODEM_CDMA = 'org.freedesktop.ModemManager1.Modem.ModemCdma'
 
-MM_MODEM_CAPABILITY = {
-    'NONE': 0,
-    'POTS': 1 << 0,
-    'CDMA_EVDO': 1 << 1,
-    'GSM_UMTS': 1 << 2,
-    'LTE': 1 << 3,
-    'ADVANCED': 1 << 4,
-    'IRIDIUM': 1 << 5,
-    'ANY': 0xFFFFFFFF}
-
 EXT_ANT_DEVICE_TYPES = {'raspberrypicm4-ioboard'}
 DTPARAM_CONFIG_VAR_NAME = 'BALENA_HOST_CONFIG_dtparam'
 DTPARAM_CONFIG_VAR_NAMES = ['BALENA_HOST_CONFIG_dtparam', 'RESIN_HOST_CONFIG_dtparam']
@@ -98,7 +65,12 @@ def should_display_lte(diagnostics):
     variant = diagnostics.get('VA')
     variant_data = variant_definitions.get(variant)
     if not variant_data:
-        return False
+        # Unknown variant, go by the modems actually attached
+        try:
+            return any(hardware_inventory.lte_modems())
+        except Exception as e:
+            logging.debug(f"failed to look for LTE modems: {e}")
+            return False
     return variant_data.get('CELLULAR')
 
 
@@ -107,24 +79,10 @@ def get_ble_devices():
 
     ble_devices = []
     try:
-        bus = dbus.SystemBus()
-        if DBUS_BLUEZ_SERVICE_NAME not in dbus.SystemBus().list_names():
+        if not hardware_inventory.bluetooth_present():
             logging.info("Bluetooth support not present")
             return []
-        proxy_object = bus.get_object(DBUS_BLUEZ_SERVICE_NAME, "/")
-        dbus_obj_mgr = dbus.Interface(proxy_object, DBUS_OBJECTMANAGER)
-        dbus_objs = dbus_obj_mgr.GetManagedObjects()
-        for path, interfaces in dbus_objs.items():
-            adapter = interfaces.get(DBUS_ADAPTER_IFACE)
-            if adapter:
-                ble_devices.append({
-                    "Address": str(adapter.get("Address")),
-                    "Name": str(adapter.get("Name")),
-                    "Powered": str(adapter.get("Powered")),
-                    "Discoverable": str(adapter.get("Discoverable")),
-                    "Pairable": str(adapter.get("Pairable")),
-                    "Discovering": str(adapter.get("Discovering")),
-                })
+        ble_devices = [adapter.as_device() for adapter in hardware_inventory.bt_adapters()]
 
         logging.info(f"Found the following BLE Devices: {ble_devices}")
     except dbus.exceptions.DBusException as e:
@@ -140,27 +98,8 @@ def get_wifi_devices():
 
     wifi_devices = []
     try:
-        bus = dbus.SystemBus()
-        proxy = bus.get_object(DBUS_NM_SERVICE_NAME, DBUS_NM_OBJECT_PATH)
-        manager = dbus.Interface(proxy, DBUS_NM_IFACE)
-        devices = manager.GetDevices()
-
-        for device in devices:
-            device_proxy = bus.get_object(DBUS_NM_SERVICE_NAME, device)
-            props_iface = dbus.Interface(device_proxy, DBUS_PROPERTIES)
-            props = props_iface.GetAll(DBUS_NM_DEVICE_IFACE)
-
-            device_type = NM_DEVICE_TYPES.get(props.get("DeviceType"),
-                                              "Unknown")
-            device_state = NM_DEVICE_STATES.get(props.get("State"), "Unknown")
-
-            if device_type == "Wi-Fi":
-                wifi_devices.append({
-                    "Interface": str(props.get("Interface")),
-                    "Type": device_type,
-                    "Driver": str(props.get("Driver")),
-                    "State": device_state,
-                })
+        wifi_devices = [device.as_device() for device in hardware_inventory.network_devices()
+                        if device.device_type == "Wi-Fi"]
 
         logging.info(f"Found the following WiFi Devices: {wifi_devices}")
     except dbus.exceptions.DBusException as e:
@@ -176,28 +115,7 @@ def get_lte_devices():
 
     lte_devices = []
     try:
-        bus = dbus.SystemBus()
-        proxy = bus.get_object(DBUS_MM1_SERVICE, DBUS_MM1_PATH)
-        manager = dbus.Interface(proxy, DBUS_OBJECTMANAGER)
-        modems = manager.GetManagedObjects()
-
-        for modem in modems:
-            modem_proxy = bus.get_object(DBUS_MM1_SERVICE, modem)
-            props_iface = dbus.Interface(modem_proxy, DBUS_PROPERTIES)
-            props = props_iface.GetAll(DBUS_MM1_IF_MODEM)
-
-            model = props.get("Model")
-            manufacturer = props.get("Manufacturer")
-            capabilities = props.get("CurrentCapabilities")
-            equipment_id = props.get("EquipmentIdentifier")
-
-            if capabilities & MM_MODEM_CAPABILITY['LTE'] or \
-                    capabilities & MM_MODEM_CAPABILITY['LTE_ADVANCED']:
-                lte_devices.append({
-                    "Model": str(model),
-                    "Manufacturer": str(manufacturer),
-                    "EquipmentIdentifier": str(equipment_id),
-                })
+        lte_devices = [modem.as_device() for modem in hardware_inventory.lte_modems()]
 
         logging.info(f"Found the following LTE Devices: {lte_devices}")
     except dbus.exceptions.DBusException as e:
@@ -277,7 +195,7 @@ def get_serial_number(diagnostics):
         elif is_rockpi() and has_valid_serial(serial):
             serial_number = serial[CPUINFO_SERIAL_KEY]
         else:
-            serial_number = "Serial number not found"
+            serial_number = SERIAL_NOT_FOUND
     except FileNotFoundError as e:
         raise e
     except PermissionError as e:
@@ -349,37 +267,10 @@ def load_serial_number() -> dict:
     return serial
 
 
-@retry(Exception, tries=5, delay=5, max_delay=15, backoff=2, logger=logging)
-def lora_module_test():
-    """
-    Checks the status of the lore module.
-    Returns true or false.
-    """
-    result = None
-    pkt_fwd_diag_file = "/var/pktfwd/diagnostics"
-    while result is None:
-        try:
-            # The Pktfwder container creates this file
-            # to pass over the status.
-            with open(pkt_fwd_diag_file) as data:
-                lora_status = data.read()
-                if lora_status == "true":
-                    result = True
-                else:
-                    result = False
-        except FileNotFoundError as e:
-            # Packet forwarder container hasn't started
-            logging.error(f"File {pkt_fwd_diag_file} doesn't exit yet. "
-                          f"Most likely pktfwd container hasn't started yet")
-            raise e
-
-    return result
-
-
 def get_public_keys_and_ignore_errors():
     error_msg = None
     try:
-        public_keys = get_public_keys_rust()
+        public_keys = ecc_broker.get_public_keys()
         if not public_keys:
             public_keys = {
                 'name': error_msg,
@@ -0,0 +1,175 @@
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from hw_diag.utilities.dbus_proxy.connection import dbus_connection
+from hw_diag.utilities.dbus_proxy.dbus_ids import DBusIds
+from hw_diag.utilities.dbus_proxy.property_cache import dbus_property_cache
+
+
+NM_DEVICE_TYPES = {1: "Ethernet",
+                   2: "Wi-Fi",
+                   5: "Bluetooth",
+                   6: "OLPC",
+                   7: "WiMAX",
+                   8: "Modem",
+                   9: "InfiniBand",
+                   10: "Bond",
+                   11: "VLAN",
+                   12: "ADSL"}
+
+NM_DEVICE_STATES = {0: "Unknown",
+                    10: "Unmanaged",
+                    20: "Unavailable",
+                    30: "Disconnected",
+                    40: "Prepare",
+                    50: "Config",
+                    60: "Need Auth",
+                    70: "IP Config",
+                    80: "IP Check",
+                    90: "Secondaries",
+                    100: "Activated",
+                    110: "Deactivating",
+                    120: "Failed"}
+
+MM_MODEM_CAPABILITY = {
+    'NONE': 0,
+    'POTS': 1 << 0,
+    'CDMA_EVDO': 1 << 1,
+    'GSM_UMTS': 1 << 2,
+    'LTE': 1 << 3,
+    'ADVANCED': 1 << 4,
+    'IRIDIUM': 1 << 5,
+    'ANY': 0xFFFFFFFF}
+
+LTE_CAPABILITIES = MM_MODEM_CAPABILITY['LTE'] | MM_MODEM_CAPABILITY['ADVANCED']
+NO_SIM_PATH = '/'
+
+
+@dataclass(frozen=True)
+class ModemRecord:
+    path: str
+    model: str
+    manufacturer: str
+    revision: str
+    equipment_identifier: str
+    capabilities: int
+    sim_path: Optional[str]
+    properties: dict = field(default_factory=dict, repr=False, compare=False)
+
+    @classmethod
+    def from_properties(cls, path: str, props: dict) -> 'ModemRecord':
+        sim_path = props.get('Sim')
+        return cls(path=path,
+                   model=str(props.get('Model')),
+                   manufacturer=str(props.get('Manufacturer')),
+                   revision=str(props.get('Revision', '')).strip(),
+                   equipment_identifier=str(props.get('EquipmentIdentifier')),
+                   capabilities=int(props.get('CurrentCapabilities') or 0),
+                   sim_path=str(sim_path) if sim_path and str(sim_path) != NO_SIM_PATH else None,
+                   properties=props)
+
+    @property
+    def is_lte(self) -> bool:
+        return bool(self.capabilities & LTE_CAPABILITIES)
+
+    def as_device(self) -> dict:
+        '''the form the LTE diagnostic reports'''
+        return {
+            "Model": self.model,
+            "Manufacturer": self.manufacturer,
+            "EquipmentIdentifier": self.equipment_identifier,
+        }
+
+
+@dataclass(frozen=True)
+class BluetoothAdapterRecord:
+    path: str
+    address: str
+    name: str
+    powered: str
+    discoverable: str
+    pairable: str
+    discovering: str
+
+    @classmethod
+    def from_properties(cls, path: str, props: dict) -> 'BluetoothAdapterRecord':
+        return cls(path=path,
+                   address=str(props.get("Address")),
+                   name=str(props.get("Name")),
+                   powered=str(props.get("Powered")),
+                   discoverable=str(props.get("Discoverable")),
+                   pairable=str(props.get("Pairable")),
+                   discovering=str(props.get("Discovering")))
+
+    def as_device(self) -> dict:
+        '''the form the BT diagnostic reports'''
+        return {
+            "Address": self.address,
+            "Name": self.name,
+            "Powered": self.powered,
+            "Discoverable": self.discoverable,
+            "Pairable": self.pairable,
+            "Discovering": self.discovering,
+        }
+
+
+@dataclass(frozen=True)
+class NetworkDeviceRecord:
+    path: str
+    interface: str
+    device_type: str
+    driver: str
+    state: str
+
+    @classmethod
+    def from_properties(cls, path: str, props: dict) -> 'NetworkDeviceRecord':
+        return cls(path=path,
+                   interface=str(props.get("Interface")),
+                   device_type=NM_DEVICE_TYPES.get(props.get("DeviceType"), "Unknown"),
+                   driver=str(props.get("Driver")),
+                   state=NM_DEVICE_STATES.get(props.get("State"), "Unknown"))
+
+    def as_device(self) -> dict:
+        return {
+            "Interface": self.interface,
+            "Type": self.device_type,
+            "Driver": self.driver,
+            "State": self.state,
+        }
+
+
+class HardwareInventory(object):
+    '''
+    Modems, Bluetooth adapters and network devices as typed records,
+    built from the ObjectManager data of ModemManager, BlueZ and
+    NetworkManager. That is one GetManagedObjects per service at most, none
+    while the property cache is kept current by signals, however many
+    devices there are.
+    '''
+
+    def __init__(self, cache=dbus_property_cache) -> None:
+        self.cache = cache
+
+    def _records(self, service: str, interface: str, record_cls) -> list:
+        objects = self.cache.get_objects(service, interface)
+        return [record_cls.from_properties(path, props) for path, props in sorted(objects.items())]
+
+    def modems(self) -> List[ModemRecord]:
+        return self._records(DBusIds.DBUS_MM1_SERVICE, DBusIds.DBUS_MM1_MODEM_IF, ModemRecord)
+
+    def lte_modems(self) -> List[ModemRecord]:
+        return [modem for modem in self.modems() if modem.is_lte]
+
+    def bluetooth_present(self) -> bool:
+        return DBusIds.DBUS_BLUEZ_SERVICE in dbus_connection.list_names()
+
+    def bt_adapters(self) -> List[BluetoothAdapterRecord]:
+        return self._records(DBusIds.DBUS_BLUEZ_SERVICE, DBusIds.DBUS_BLUEZ_ADAPTER_IF,
+                             BluetoothAdapterRecord)
+
+    def network_devices(self) -> List[NetworkDeviceRecord]:
+        return self._records(DBusIds.DBUS_NM_SERVICE, DBusIds.DBUS_NM_DEVICE_IF,
+                             NetworkDeviceRecord)
+
+
+hardware_inventory = HardwareInventory()
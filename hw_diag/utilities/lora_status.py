@@ -0,0 +1,207 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Optional
+
+
+log = logging.getLogger()
+
+# The pktfwd container writes "true" or "false" to this file.
+PKTFWD_DIAGNOSTICS_FILE = '/var/pktfwd/diagnostics'
+LORA_STATUS_UNKNOWN = 'unknown (pktfwd not started)'
+LORA_STATUS_HISTORY_SIZE = 10
+# How often to look for the file when inotify is unavailable, or the
+# directory it lives in doesn't exist yet.
+LORA_STATUS_POLL_SECONDS = float(os.getenv('LORA_STATUS_POLL_SECONDS', 5))
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct('iIII')
+# Creation and partial writes are skipped, the file is read once it is closed.
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE | \
+    IN_DELETE_SELF | IN_MOVE_SELF
+
+
+class Inotify(object):
+    '''minimal inotify binding over libc, only what the watcher needs'''
+
+    def __init__(self) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+    def add_watch(self, path: str, mask: int) -> int:
+        wd = self._add_watch(self.fd, path.encode(), mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        return wd
+
+    def read_events(self, timeout: float) -> list:
+        '''returns (wd, mask, name) tuples, an empty list on timeout'''
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 4096)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + INOTIFY_EVENT.size <= len(data):
+            wd, mask, _, name_len = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = data[offset:offset + name_len].rstrip(b'\0').decode()
+            offset += name_len
+            events.append((wd, mask, name))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class LoraStatusWatcher(object):
+    '''
+    Keeps the concentrator status reported by pktfwd in memory.
+
+    A background thread watches the status file with inotify (or polls it if
+    inotify isn't available) so readers never touch the filesystem or wait
+    for pktfwd to start.
+    '''
+
+    def __init__(self, path: str = PKTFWD_DIAGNOSTICS_FILE) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._status = None
+        self._updated_at = None
+        self._history = deque(maxlen=LORA_STATUS_HISTORY_SIZE)
+        self._read_once = False
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def updated_at(self) -> Optional[datetime]:
+        return self._updated_at
+
+    def history(self) -> list:
+        '''status transitions, oldest first, as (utc time, status) tuples'''
+        with self._lock:
+            return list(self._history)
+
+    def _set_status(self, status: Optional[bool]) -> None:
+        with self._lock:
+            self._read_once = True
+            if status == self._status and self._updated_at is not None:
+                return
+            self._status = status
+            self._updated_at = datetime.utcnow()
+            self._history.append((self._updated_at, status))
+        log.info(f"lora concentrator status changed to {self.describe()}")
+
+    def read(self) -> Optional[bool]:
+        '''reads the status file, None if pktfwd hasn't written it yet'''
+        try:
+            with open(self.path) as data:
+                status = data.read().strip() == 'true'
+        except (FileNotFoundError, NotADirectoryError):
+            status = None
+        except OSError as e:
+            log.warning(f"failed to read {self.path}: {e}")
+            status = None
+        self._set_status(status)
+        return status
+
+    def get_status(self) -> Optional[bool]:
+        '''
+        True or False as last reported by pktfwd, None if it hasn't started.
+        Reads the file directly only if the watcher hasn't done so yet.
+        '''
+        if not self._read_once:
+            return self.read()
+        return self._status
+
+    def describe(self) -> str:
+        status = self._status
+        if status is None:
+            return LORA_STATUS_UNKNOWN
+        return 'ok' if status else 'failed'
+
+    def state(self) -> dict:
+        updated_at = self._updated_at
+        return {
+            'status': self.describe(),
+            'updated_at': updated_at.isoformat() if updated_at else None,
+            'history': [(at.isoformat(), status) for at, status in self.history()]
+        }
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='lora-status-watcher',
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        try:
+            inotify = Inotify()
+        except (OSError, AttributeError) as e:
+            log.warning(f"inotify unavailable, polling {self.path}: {e}")
+            self._poll()
+            return
+
+        try:
+            self._watch(inotify)
+        finally:
+            inotify.close()
+
+    def _poll(self) -> None:
+        while not self._stop.is_set():
+            self.read()
+            self._stop.wait(LORA_STATUS_POLL_SECONDS)
+
+    def _watch(self, inotify: Inotify) -> None:
+        directory, filename = os.path.split(self.path)
+        watching = False
+        while not self._stop.is_set():
+            if not watching:
+                try:
+                    inotify.add_watch(directory, WATCH_MASK)
+                    watching = True
+                except OSError:
+                    # pktfwd hasn't created the directory yet
+                    pass
+                # read after adding the watch so no write can slip in between
+                self.read()
+
+            timeout = 1 if watching else LORA_STATUS_POLL_SECONDS
+            for _, mask, name in inotify.read_events(timeout):
+                if mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+                    watching = False
+                elif name == filename:
+                    self.read()
+
+
+lora_status_watcher = LoraStatusWatcher()
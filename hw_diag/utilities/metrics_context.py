@@ -0,0 +1,41 @@
+from functools import cached_property
+from typing import Callable, Dict
+
+from hw_diag.utilities import system_metrics
+from hw_diag.utilities.event_streamer import DiagEvent
+
+
+class MetricsContext(object):
+    '''
+    Values a watchdog or heartbeat pass reports, each read at most once per
+    pass however many events the pass sends. A new context is made for
+    every pass, nothing is kept between them.
+    '''
+
+    def __init__(self, network_state_probe: Callable[[], DiagEvent]) -> None:
+        self._network_state_probe = network_state_probe
+
+    @cached_property
+    def network_state(self) -> DiagEvent:
+        return self._network_state_probe()
+
+    @cached_property
+    def network_statistics(self) -> Dict:
+        return system_metrics.get_network_statistics()
+
+    @cached_property
+    def balena_metrics(self) -> Dict:
+        return system_metrics.get_balena_metrics()
+
+    @cached_property
+    def serial_number(self) -> str:
+        return system_metrics.get_serial_number()
+
+    @cached_property
+    def identity(self) -> Dict:
+        return {
+            'serial': self.serial_number,
+            'variant': system_metrics.get_variant(),
+            'firmware_version': system_metrics.get_firmware_version(),
+            'region_override': system_metrics.get_region_override(),
+        }
@@ -2,7 +2,10 @@ from __future__ import annotations
 import logging
 import os
 import tempfile
-from typing import Dict
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
 from uptime import uptime
 from datetime import timedelta, datetime
 from logging.handlers import RotatingFileHandler
@@ -15,6 +18,9 @@ from hw_diag.utilities.dbus_proxy.systemd import Systemd
 from hw_diag.utilities.event_streamer import EVENT_TYPE_KEY, ACTION_TYPE_KEY, \
     DiagEvent, DiagAction, event_streamer, event_fingerprint
 from hw_diag.utilities import system_metrics
+from hw_diag.utilities.metrics_context import MetricsContext
+from hw_diag.utilities.passive_connectivity import passive_connectivity
+from hw_diag.utilities.ping_history import ping_history
 
 LOGLEVEL = os.environ.get("LOGLEVEL", "DEBUG")
 _log_format = "%(asctime)s - [%(levelname)s] - (%(filename)s:%(lineno)d) - %(message)s"
@@ -33,23 +39,42 @@ class NetworkWatchdog:
     FULL_FORCE_REBOOT_THRESHOLD = int(os.environ.get("FULL_FORCE_REBOOT_THRESHOLD", 3))
     # Full system reboot limited to once a day
     REBOOT_LIMIT_HOURS = int(os.environ.get("REBOOT_LIMIT_HOURS", 24))
+    # Failed checks count towards the thresholds above at most this often, however
+    # often the network is checked while disconnected
+    ESCALATION_INTERVAL_MINUTES = float(os.environ.get("ESCALATION_INTERVAL_MINUTES", 15))
 
     PUBLIC_SERVERS = ['8.8.8.8', '1.1.1.1']       # NOSONAR
 
+    # Classify from NetworkManager's state and local evidence before pinging
+    PASSIVE_DETECTION = os.environ.get("PASSIVE_CONNECTIVITY_DETECTION", "true").lower() == "true"
+
+    # Echo requests sent to a target before giving up on it, one at a time
+    PING_COUNT = int(os.environ.get("PING_COUNT", 2))
+    # Seconds to wait for each echo reply
+    PING_TIMEOUT = float(os.environ.get("PING_TIMEOUT", 1))
+    # Targets are pinged concurrently, pings outliving an early answer finish here
+    _ping_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='watchdog-ping')
+
     # Static variable for saving the lost connectivity count
     lost_count = 0
 
     # Static variable for saving the failed reboot count
     reboot_request_count = 0
 
+    # When the network was first found disconnected and when that last counted
+    # towards recovery, monotonic() values
+    disconnected_since = None
+    last_escalation = None
+
     last_network_event = DiagEvent.NETWORK_DISCONNECTED
     last_network_action = DiagAction.ACTION_NONE
     last_network_event_fingerprint = ""
 
-    def __init__(self):
+    def __init__(self, volume_path: str = None):
         # Prepare the log file location
-        if os.access(self.VOLUME_PATH, os.W_OK):
-            self.log_file_path = os.path.join(self.VOLUME_PATH, self.WATCHDOG_LOG_FILE_NAME)
+        volume_path = volume_path or self.VOLUME_PATH
+        if os.access(volume_path, os.W_OK):
+            self.log_file_path = os.path.join(volume_path, self.WATCHDOG_LOG_FILE_NAME)
         else:
             self.temp_dir = tempfile.TemporaryDirectory()
             self.log_file_path = os.path.join(self.temp_dir.name, self.WATCHDOG_LOG_FILE_NAME)
@@ -66,10 +91,38 @@ class NetworkWatchdog:
         if hasattr(self, 'temp_dir'):
             self.temp_dir.cleanup()
 
+    # The clock, uptime, reboots and event delivery go through these so the
+    # escalation policy can be replayed offline, see watchdog_simulation.
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def uptime_seconds(self) -> float:
+        return uptime()
+
+    def reboot(self, force: bool) -> None:
+        balena_supervisor = BalenaSupervisor.new_from_env()
+        balena_supervisor.reboot(force=force)
+
+    def publish_event(self, event: Dict, persistent: bool = False) -> None:
+        if persistent:
+            event_streamer.enqueue_persistent_event(event)
+        else:
+            event_streamer.enqueue_event(event)
+
     def is_ping_reachable(self, ip: str) -> bool:
         try:
-            ping_target = ping(ip)
-            reachable = ping_target and ping_target.address == ip and ping_target.is_alive
+            sent = 0
+            rtts = []
+            # one packet at a time so the first reply ends it
+            for _ in range(max(1, self.PING_COUNT)):
+                ping_target = ping(ip, count=1, timeout=self.PING_TIMEOUT)
+                sent += ping_target.packets_sent
+                rtts += ping_target.rtts
+                reachable = ping_target and ping_target.address == ip and ping_target.is_alive
+                if reachable:
+                    break
+            self._record_ping(ip, sent, rtts)
             if reachable:
                 self.LOGGER.info(f'{ip} is reachable.')
             else:
@@ -78,19 +131,72 @@ class NetworkWatchdog:
         except Exception:
             return False
 
+    def _record_ping(self, ip: str, sent: int, rtts: list) -> None:
+        try:
+            ping_history.record(ip, sent, rtts)
+        except Exception as e:
+            self.LOGGER.warning(f"failed to record ping to {ip}: {e}")
+
+    def _flush_ping_history(self) -> None:
+        try:
+            ping_history.flush()
+        except Exception as e:
+            self.LOGGER.warning(f"failed to store the ping history: {e}")
+
+    def _sample_ping(self, ip: str) -> None:
+        try:
+            ping_target = ping(ip, count=1, timeout=self.PING_TIMEOUT)
+        except Exception as e:
+            self.LOGGER.debug(f"failed to sample {ip}: {e}")
+            return
+        self._record_ping(ip, ping_target.packets_sent, ping_target.rtts)
+
+    def _sample_targets(self, targets: List[str]) -> None:
+        '''one echo request to every target at once, for the connectivity history only'''
+        wait([self._ping_executor.submit(self._sample_ping, ip) for ip in set(targets)])
+
+    def _first_reachable_tier(self, tiers: List[List[str]]) -> Optional[int]:
+        '''
+        pings the targets of all tiers at once and returns the index of the
+        first tier with a reachable target, or None. Returns as soon as that's
+        known, without waiting for the pings of the other targets.
+        '''
+        futures = {self._ping_executor.submit(self.is_ping_reachable, ip): index
+                   for index, targets in enumerate(tiers) for ip in set(targets)}
+        unanswered = Counter(futures.values())
+        reached = set()
+        pending = set(futures)
+
+        undecided = -1
+
+        def decided() -> Optional[int]:
+            # a tier wins once it got a reply and every tier before it failed
+            for index in range(len(tiers)):
+                if index in reached:
+                    return index
+                if unanswered[index]:
+                    return undecided
+            return None
+
+        try:
+            while decided() == undecided:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    unanswered[futures[future]] -= 1
+                    if future.result():
+                        reached.add(futures[future])
+            return decided()
+        finally:
+            for future in pending:
+                future.cancel()
+
     def is_local_network_connected(self) -> bool:
         network_manager = NetworkManager()
         gateways = network_manager.get_gateways()
-        for gateway in gateways:
-            if self.is_ping_reachable(gateway):
-                return True
-        return False
+        return self._first_reachable_tier([gateways]) is not None
 
     def is_internet_connected(self) -> bool:
-        for public_server in self.PUBLIC_SERVERS:
-            if self.is_ping_reachable(public_server):
-                return True
-        return False
+        return self._first_reachable_tier([self.PUBLIC_SERVERS]) is not None
 
     def is_connected(self) -> bool:
         is_local_network_connected = self.is_local_network_connected()
@@ -108,29 +214,33 @@ class NetworkWatchdog:
         nm_restarted = network_manager_unit.wait_restart()
         self.LOGGER.info(f"Network manager restarted: {nm_restarted}")
 
+    def new_metrics_context(self) -> MetricsContext:
+        '''context for one watchdog or heartbeat pass'''
+        return MetricsContext(self.get_current_network_state)
+
     def _prepare_event(self, event_type: DiagEvent,
-                       action_type: DiagAction, msg: str) -> Dict:
-        network_stats = system_metrics.get_network_statistics()
+                       action_type: DiagAction, msg: str,
+                       context: Optional[MetricsContext] = None) -> Dict:
+        if context is None:
+            context = self.new_metrics_context()
         event = {
             # using names instead of values as our models have enums as strings
             EVENT_TYPE_KEY: event_type.name,
             ACTION_TYPE_KEY: action_type.name,
             'msg': msg,
-            'serial': system_metrics.get_serial_number(),
-            'variant': system_metrics.get_variant(),
-            'firmware_version': system_metrics.get_firmware_version(),
-            'region_override': system_metrics.get_region_override(),
             # uptime in hours rounded to two decimal places
-            'uptime_hours': round(float(uptime())/3600, 2),
-            'packet_errors': system_metrics.total_packet_errors(network_stats),
+            'uptime_hours': round(float(self.uptime_seconds())/3600, 2),
+            'packet_errors': system_metrics.total_packet_errors(context.network_statistics),
             'generated_ts': datetime.utcnow().timestamp(),
-            'network_state': self.get_current_network_state().name
+            'network_state': context.network_state.name
         }
-        event.update(system_metrics.get_balena_metrics())
+        event.update(context.identity)
+        event.update(context.balena_metrics)
         return event
 
     def _send_network_event(self, event_type: DiagEvent,
-                            action_type: DiagAction, msg: str) -> None:
+                            action_type: DiagAction, msg: str,
+                            context: Optional[MetricsContext] = None) -> None:
         # don't repeat the events unnecessarily
         new_fingerprint = event_fingerprint(event_type, action_type, msg)
         if new_fingerprint == self.last_network_event_fingerprint:
@@ -141,41 +251,75 @@ class NetworkWatchdog:
         self.last_network_event = event_type
         self.last_network_action = action_type
 
-        event = self._prepare_event(event_type, action_type, msg)
-        event_streamer.enqueue_persistent_event(event)
+        event = self._prepare_event(event_type, action_type, msg, context)
+        self.publish_event(event, persistent=True)
 
     def get_current_network_state(self) -> DiagEvent:
-        if self.is_internet_connected():
-            return DiagEvent.NETWORK_INTERNET_CONNECTED
-        elif self.is_local_network_connected():
-            return DiagEvent.NETWORK_LOCAL_CONNECTED
-        else:
-            return DiagEvent.NETWORK_DISCONNECTED
+        gateways = NetworkManager().get_gateways()
+        try:
+            if self.PASSIVE_DETECTION:
+                passive_state = passive_connectivity.classify()
+                if passive_state is not None:
+                    self.LOGGER.info(f"Network state from NetworkManager: {passive_state.name}")
+                    # /connectivity_history still gets a sample of every target
+                    self._sample_targets(self.PUBLIC_SERVERS + gateways)
+                    return passive_state
+                self.LOGGER.info("Network state from NetworkManager is ambiguous, probing")
+
+            # public servers and gateways are probed together, an answer from a
+            # public server settles it right away
+            tier = self._first_reachable_tier([self.PUBLIC_SERVERS, gateways])
+            if tier == 0:
+                return DiagEvent.NETWORK_INTERNET_CONNECTED
+            elif tier == 1:
+                return DiagEvent.NETWORK_LOCAL_CONNECTED
+            else:
+                return DiagEvent.NETWORK_DISCONNECTED
+        finally:
+            # probes still running past an early answer are stored with the next check
+            self._flush_ping_history()
 
     def emit_heartbeat(self) -> None:
-        event = self._prepare_event(DiagEvent.HEARTBEAT, DiagAction.ACTION_NONE, "")
-        event_streamer.enqueue_event(event)
+        context = self.new_metrics_context()
+        event = self._prepare_event(DiagEvent.HEARTBEAT, DiagAction.ACTION_NONE, "", context)
+        self.publish_event(event)
 
     def ensure_network_connection(self) -> DiagEvent:
         self.LOGGER.info("Ensuring the network connection...")
 
-        up_time = timedelta(seconds=uptime())
+        up_time = timedelta(seconds=self.uptime_seconds())
         self.LOGGER.info(f"OS has been up for {up_time}")
 
-        network_state_event = self.get_current_network_state()
+        # the events of this pass report the state probed here
+        context = self.new_metrics_context()
+        network_state_event = context.network_state
 
         # If network is connected, nothing to do more
         if network_state_event != DiagEvent.NETWORK_DISCONNECTED:
             self.lost_count = 0
+            self.disconnected_since = None
+            self.last_escalation = None
             msg = "Network is working."
             self.LOGGER.info(msg)
-            self._send_network_event(network_state_event, DiagAction.ACTION_NONE, msg)
+            self._send_network_event(network_state_event, DiagAction.ACTION_NONE, msg, context)
+            return network_state_event
+
+        # If network is not working, take the next step once the last one had time to work
+        now = self.monotonic()
+        if self.disconnected_since is None:
+            self.disconnected_since = now
+        disconnected_for = timedelta(seconds=round(now - self.disconnected_since))
+        if self.last_escalation is not None and \
+                now - self.last_escalation < self.ESCALATION_INTERVAL_MINUTES * 60:
+            self.LOGGER.warning(f"Network is still not connected, for {disconnected_for}. "
+                                f"Lost connectivity count={self.lost_count}")
             return network_state_event
 
-        # If network is not working, take the next step
+        self.last_escalation = now
         self.lost_count += 1
         self.LOGGER.warning(
-            f"Network is not connected! Lost connectivity count={self.lost_count}")
+            f"Network is not connected! Lost connectivity count={self.lost_count}, "
+            f"disconnected for {disconnected_for}")
 
         if self.lost_count >= self.FULL_REBOOT_THRESHOLD:
             self.LOGGER.warning(
@@ -185,7 +329,7 @@ class NetworkWatchdog:
                 " Skip the rebooting."
                 self.LOGGER.info(msg)
                 self._send_network_event(network_state_event,
-                                         DiagAction.ACTION_NONE, msg)
+                                         DiagAction.ACTION_NONE, msg, context)
                 return network_state_event
 
             force_reboot = self.reboot_request_count >= self.FULL_FORCE_REBOOT_THRESHOLD
@@ -196,19 +340,18 @@ class NetworkWatchdog:
 
             msg = f"Rebooting the hotspot(force={force_reboot})."
             self.LOGGER.info(msg)
-            self._send_network_event(network_state_event, action, msg)
+            self._send_network_event(network_state_event, action, msg, context)
 
             self.reboot_request_count += 1
             self.LOGGER.info(f"Reboot request count={self.reboot_request_count}.")
 
-            balena_supervisor = BalenaSupervisor.new_from_env()
-            balena_supervisor.reboot(force=force_reboot)
+            self.reboot(force=force_reboot)
         elif self.lost_count >= self.NM_RESTART_THRESHOLD:
             msg = "Reached threshold for Network Manager restart to recover network."
             self.LOGGER.warning(msg)
             self._send_network_event(network_state_event,
                                      DiagAction.ACTION_NM_RESTART,
-                                     msg)
+                                     msg, context)
             self.restart_network_manager()
         return network_state_event
 
@@ -0,0 +1,83 @@
+import os
+from typing import Optional
+
+from hm_pyhelper.logger import get_logger
+
+from hw_diag.utilities.dbus_proxy.dbus_ids import DBusIds
+from hw_diag.utilities.dbus_proxy.property_cache import dbus_property_cache
+from hw_diag.utilities.event_streamer import DiagEvent
+
+
+LOGGER = get_logger(__name__)
+
+# NMState
+NM_STATE_ASLEEP = 10
+NM_STATE_DISCONNECTED = 20
+NM_STATE_CONNECTED_GLOBAL = 70
+# NMConnectivityState
+NM_CONNECTIVITY_FULL = 4
+
+
+class PassiveConnectivityTracker(object):
+    '''
+    Classifies the network state without sending anything, from what
+    NetworkManager reports and from local evidence. NetworkManager's State and
+    Connectivity come from the dbus property cache, so they are current as
+    soon as its PropertiesChanged signals arrive.
+
+    classify() only answers when the evidence agrees:
+    - internet: NetworkManager is globally connected and its own
+      connectivity check passed
+    - disconnected: NetworkManager has no connection and no interface has
+      carrier
+    and returns None otherwise, for the caller to probe actively. That
+    includes a network without internet: a gateway's ARP entry stays complete
+    while it goes STALE, so only a ping tells a dead gateway from a live one.
+    '''
+
+    SYS_NET_PATH = '/sys/class/net'
+
+    def __init__(self, cache=dbus_property_cache) -> None:
+        self.cache = cache
+
+    def _nm_property(self, name: str) -> Optional[int]:
+        value = self.cache.get_property(DBusIds.DBUS_NM_SERVICE, DBusIds.DBUS_NM_PATH,
+                                        DBusIds.DBUS_NM_IF, name)
+        return int(value) if value is not None else None
+
+    def has_carrier(self) -> bool:
+        '''true if any interface but loopback has its link up'''
+        try:
+            interfaces = os.listdir(self.SYS_NET_PATH)
+        except OSError:
+            return False
+        for interface in interfaces:
+            if interface == 'lo':
+                continue
+            try:
+                with open(os.path.join(self.SYS_NET_PATH, interface, 'carrier'), 'r') as f:
+                    if f.read().strip() == '1':
+                        return True
+            except OSError:
+                # reading carrier fails while the interface is down
+                continue
+        return False
+
+    def classify(self) -> Optional[DiagEvent]:
+        try:
+            state = self._nm_property('State')
+            connectivity = self._nm_property('Connectivity')
+        except Exception as e:
+            LOGGER.info(f"NetworkManager state not available: {e}")
+            return None
+
+        if state == NM_STATE_CONNECTED_GLOBAL and connectivity == NM_CONNECTIVITY_FULL:
+            return DiagEvent.NETWORK_INTERNET_CONNECTED
+
+        if state in (NM_STATE_ASLEEP, NM_STATE_DISCONNECTED) and not self.has_carrier():
+            return DiagEvent.NETWORK_DISCONNECTED
+
+        return None
+
+
+passive_connectivity = PassiveConnectivityTracker()
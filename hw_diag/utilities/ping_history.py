@@ -0,0 +1,150 @@
+import logging
+import math
+import os
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional
+
+from hw_diag.utilities.snapshot_store import SnapshotStore
+
+
+log = logging.getLogger()
+
+# Probes kept per target, at the watchdog's pace that's days to weeks
+PING_HISTORY_SIZE = int(os.getenv('PING_HISTORY_SIZE', 512))
+# Written by the worker running the watchdog, read by all of them
+PING_HISTORY_FILE = os.getenv('PING_HISTORY_FILE', '/tmp/hm_diag_ping_history.json')
+DEFAULT_PERCENTILES = (50, 90, 99)
+
+
+class RingBuffer(object):
+    '''
+    Fixed number of probe results, one array of doubles per field. Once full
+    the oldest result is overwritten. RTTs are in ms and NaN when no reply
+    came back, loss is the fraction of packets lost.
+    '''
+
+    FIELDS = ('ts', 'rtt_min', 'rtt_avg', 'rtt_max', 'jitter', 'loss')
+
+    def __init__(self, size: int = PING_HISTORY_SIZE) -> None:
+        self.size = size
+        self._columns = {field: array('d', [math.nan]) * size for field in self.FIELDS}
+        self._next = 0
+        self.count = 0
+
+    def append(self, **values) -> None:
+        for field in self.FIELDS:
+            self._columns[field][self._next] = values.get(field, math.nan)
+        self._next = (self._next + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def column(self, field: str) -> List[float]:
+        '''values of field, oldest first'''
+        values = self._columns[field]
+        start = (self._next - self.count) % self.size
+        return [values[(start + i) % self.size] for i in range(self.count)]
+
+    def percentile(self, field: str, q: float) -> Optional[float]:
+        '''nearest rank percentile of field over the probes that have a value'''
+        values = sorted(value for value in self.column(field) if not math.isnan(value))
+        if not values:
+            return None
+        rank = max(1, math.ceil(q / 100 * len(values)))
+        return values[rank - 1]
+
+    def samples(self) -> List[dict]:
+        columns = [self.column(field) for field in self.FIELDS]
+        return [{field: None if math.isnan(value) else value
+                 for field, value in zip(self.FIELDS, row)}
+                for row in zip(*columns)]
+
+    @classmethod
+    def from_samples(cls, samples: List[dict], size: int = PING_HISTORY_SIZE) -> 'RingBuffer':
+        ring = cls(size)
+        for sample in samples[-size:]:
+            ring.append(**{field: math.nan if value is None else value
+                           for field, value in sample.items()})
+        return ring
+
+
+def summarize(sent: int, rtts: List[float]) -> dict:
+    '''one probe's result as RingBuffer fields'''
+    sample = {'ts': time.time(), 'loss': 1 - len(rtts) / sent if sent else math.nan}
+    if rtts:
+        sample['rtt_min'] = min(rtts)
+        sample['rtt_avg'] = sum(rtts) / len(rtts)
+        sample['rtt_max'] = max(rtts)
+        # mean difference between consecutive rtts, as icmplib computes it
+        diffs = [abs(b - a) for a, b in zip(rtts, rtts[1:])]
+        sample['jitter'] = sum(diffs) / len(diffs) if diffs else 0.0
+    return sample
+
+
+class PingHistory(object):
+    '''
+    RTT and loss of every connectivity probe, in a RingBuffer per target.
+
+    The worker probing keeps the buffers in memory and flush() writes them
+    out, which the watchdog does once per check. The json endpoint reads that
+    file from whichever worker serves it and only rebuilds its buffers when
+    the file changed.
+    '''
+
+    def __init__(self, store: SnapshotStore = None, size: int = PING_HISTORY_SIZE) -> None:
+        self.store = store or SnapshotStore(PING_HISTORY_FILE)
+        self.size = size
+        self._lock = threading.Lock()
+        self._rings = None
+        self._dirty = False
+        self._read_rings = {}
+        self._read_mtime = None
+
+    def _load(self) -> Dict[str, RingBuffer]:
+        if self._rings is None:
+            # continue the history written before a restart
+            stored = self.store.read_or_none() or {}
+            self._rings = {target: RingBuffer.from_samples(samples, self.size)
+                           for target, samples in stored.get('targets', {}).items()}
+        return self._rings
+
+    def record(self, target: str, sent: int, rtts: List[float]) -> None:
+        with self._lock:
+            rings = self._load()
+            ring = rings.setdefault(target, RingBuffer(self.size))
+            ring.append(**summarize(sent, rtts))
+            self._dirty = True
+
+    def flush(self) -> bool:
+        '''writes the probes recorded since the last flush, returns false if there were none'''
+        with self._lock:
+            if not self._dirty:
+                return False
+            self.store.write({'targets': {target: ring.samples() for target, ring in self._rings.items()}})
+            self._dirty = False
+            return True
+
+    def _stored_rings(self) -> Dict[str, RingBuffer]:
+        '''buffers as last flushed, by whichever worker probes'''
+        mtime = self.store.mtime()
+        with self._lock:
+            if mtime != self._read_mtime:
+                stored = self.store.read_or_none() or {}
+                self._read_rings = {target: RingBuffer.from_samples(samples, self.size)
+                                    for target, samples in stored.get('targets', {}).items()}
+                self._read_mtime = mtime
+            return self._read_rings
+
+    def query(self, percentiles=DEFAULT_PERCENTILES) -> dict:
+        '''samples and rtt/loss percentiles per target'''
+        result = {}
+        for target, ring in self._stored_rings().items():
+            result[target] = {
+                'samples': ring.samples(),
+                'rtt_avg': {f'p{q:g}': ring.percentile('rtt_avg', q) for q in percentiles},
+                'loss': {f'p{q:g}': ring.percentile('loss', q) for q in percentiles},
+            }
+        return result
+
+
+ping_history = PingHistory()
@@ -0,0 +1,161 @@
+import contextlib
+import fcntl
+import logging
+import os
+import secrets
+import threading
+import time
+from typing import Callable
+
+
+log = logging.getLogger()
+
+LOCK_DIR = os.getenv('PROCESS_LOCK_DIR', '/tmp')
+LEADER_RETRY_SECONDS = float(os.getenv('LEADER_RETRY_SECONDS', 30))
+
+
+def lock_path(name: str, lock_dir: str = None) -> str:
+    return os.path.join(lock_dir or LOCK_DIR, 'hm_diag_%s.lock' % name)
+
+
+class InterProcessLock(object):
+    '''
+    flock based lock shared by all processes (gunicorn workers) using the same
+    name. Not reentrant, threads of one process still need their own lock.
+    The kernel releases it when the holding process dies.
+    '''
+
+    def __init__(self, name: str, lock_dir: str = None) -> None:
+        self.path = lock_path(name, lock_dir)
+        self._lock_file = None
+
+    @property
+    def locked(self) -> bool:
+        '''true if this process holds the lock'''
+        return self._lock_file is not None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        lock_file = open(self.path, 'a')
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def release(self) -> None:
+        lock_file, self._lock_file = self._lock_file, None
+        if lock_file is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            lock_file.close()
+
+
+@contextlib.contextmanager
+def file_lock(name: str, lock_dir: str = None):
+    '''holds the InterProcessLock name for the duration of the block'''
+    lock = InterProcessLock(name, lock_dir)
+    lock.acquire()
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+def shared_secret(name: str, lock_dir: str = None) -> str:
+    '''
+    random secret shared by all processes asking for name, created by the
+    first one. Call it holding file_lock('startup'). The file lives next to the
+    locks and start_diagnostics.sh removes it, so every start gets a new one.
+    '''
+    path = os.path.join(lock_dir or LOCK_DIR, 'hm_diag_%s.secret' % name)
+    try:
+        with open(path, 'r') as f:
+            secret = f.read().strip()
+        if secret:
+            return secret
+    except FileNotFoundError:
+        pass
+
+    secret = secrets.token_hex(32)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        f.write(secret)
+    return secret
+
+
+class SharedGeneration(object):
+    '''
+    Counter shared by all processes using the same name, kept as the mtime of
+    a marker file so reading it is a stat. Per process caches bump it when they
+    invalidate and drop their entries when they see it move.
+    '''
+
+    def __init__(self, name: str, lock_dir: str = None) -> None:
+        self.path = os.path.join(lock_dir or LOCK_DIR, 'hm_diag_%s.generation' % name)
+
+    def current(self) -> int:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def bump(self) -> int:
+        generation = max(time.time_ns(), self.current() + 1)
+        with open(self.path, 'a'):
+            pass
+        os.utime(self.path, ns=(generation, generation))
+        return generation
+
+
+class LeaderElection(object):
+    '''
+    Picks one process out of the gunicorn workers to run work that must only
+    run once per device, such as the scheduled tasks.
+
+    The leader holds its lock for as long as it lives. When it dies one of the
+    others, retrying every LEADER_RETRY_SECONDS, takes over.
+    '''
+
+    def __init__(self, name: str, lock_dir: str = None) -> None:
+        self._lock = InterProcessLock('leader_' + name, lock_dir)
+        self._thread = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._lock.locked
+
+    def try_acquire(self) -> bool:
+        if self.is_leader:
+            return True
+        if not self._lock.acquire(blocking=False):
+            return False
+        log.info(f"process {os.getpid()} was elected leader ({self._lock.path})")
+        return True
+
+    def release(self) -> None:
+        self._lock.release()
+
+    def _wait_for_leadership(self, on_elected: Callable[[], None], interval: float) -> None:
+        while not self.try_acquire():
+            time.sleep(interval)
+        on_elected()
+
+    def run_when_leader(self, on_elected: Callable[[], None],
+                        interval: float = LEADER_RETRY_SECONDS) -> bool:
+        '''
+        calls on_elected right away if this process is or becomes the leader,
+        otherwise from a background thread once it does. Returns is_leader.
+        '''
+        if self.try_acquire():
+            on_elected()
+            return True
+
+        self._thread = threading.Thread(target=self._wait_for_leadership,
+                                        args=(on_elected, interval),
+                                        name='leader-election', daemon=True)
+        self._thread.start()
+        return False
+
+
+scheduler_leader = LeaderElection('scheduler')
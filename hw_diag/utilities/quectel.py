@@ -12,6 +12,7 @@ from hm_pyhelper.logger import get_logger
 from hw_diag.utilities.dbus_proxy.dbus_ids import DBusIds
 from hw_diag.utilities.dbus_proxy.modem_manager import ModemManager
 from hw_diag.utilities.dbus_proxy.modem_manager import Modem
+from hw_diag.utilities.dbus_proxy.property_cache import dbus_property_cache
 from hw_diag.utilities.dbus_proxy.systemd import Systemd
 from hw_diag.utilities.keystore import KeyStore
 from hw_diag.utilities.download import download_with_resume
@@ -346,6 +347,8 @@ def ensure_modem_manager_health() -> None:
     mm_proxy = ModemManager()
     all_modems = []
     try:
+        # a mirror kept up by signals would hide a hung modem manager
+        dbus_property_cache.invalidate(DBusIds.DBUS_MM1_SERVICE)
         all_modems = mm_proxy.get_all_modems()
     except Exception as e:
         logging.error(f"failed to get modem list with error: {e}")
@@ -1,32 +1,36 @@
 import os
 
 
-def get_environment_var(diagnostics):
-    # The order of the values in the lists is important!
-    # It determines which value will be available for which key
-    env_var = [
-        'BALENA_DEVICE_NAME_AT_INIT',
-        'BALENA_DEVICE_UUID',
-        'BALENA_APP_NAME',
-        'FREQ',
-        'FIRMWARE_VERSION',
-        'VARIANT',
-        'FIRMWARE_SHORT_HASH',
-        'DIAGNOSTICS_VERSION',
-        'CONFIG_VERSION',
-        'PKTFWD_VERSION',
-        'GATEWAYRS_VERSION',
-        'MULTIPLEXER_VERSION'
-    ]
-    keys = ["BN", "ID", "BA", "FR", "FW", "VA", "firmware_short_hash", "diagnotics_version",
-            "config_version", "packet_forwarder_version", "gatewayrs_version", "multiplexer_version"
-    ]
+# The order of the values in the lists is important!
+# It determines which value will be available for which key
+ENVIRONMENT_VARS = [
+    'BALENA_DEVICE_NAME_AT_INIT',
+    'BALENA_DEVICE_UUID',
+    'BALENA_APP_NAME',
+    'FREQ',
+    'FIRMWARE_VERSION',
+    'VARIANT',
+    'FIRMWARE_SHORT_HASH',
+    'DIAGNOSTICS_VERSION',
+    'CONFIG_VERSION',
+    'PKTFWD_VERSION',
+    'GATEWAYRS_VERSION',
+    'MULTIPLEXER_VERSION'
+]
+ENVIRONMENT_KEYS = ["BN", "ID", "BA", "FR", "FW", "VA", "firmware_short_hash", "diagnotics_version",
+                    "config_version", "packet_forwarder_version", "gatewayrs_version", "multiplexer_version"
+                    ]
+# Only reported where set
+OPTIONAL_ENVIRONMENT_VARS = {
+    'MYST_VERSION': 'myst_version',
+    'THINGSIX_VERSION': 'thingsix_version',
+}
 
-    for (var, key) in zip(env_var, keys):
-        diagnostics[key] = os.getenv(var)
 
-    if "MYST_VERSION" in os.environ:
-        diagnostics["myst_version"] = os.getenv("MYST_VERSION")
+def get_environment_var(diagnostics):
+    for (var, key) in zip(ENVIRONMENT_VARS, ENVIRONMENT_KEYS):
+        diagnostics[key] = os.getenv(var)
 
-    if "THINGSIX_VERSION" in os.environ:
-        diagnostics["thingsix_version"] = os.getenv("THINGSIX_VERSION")
+    for var, key in OPTIONAL_ENVIRONMENT_VARS.items():
+        if var in os.environ:
+            diagnostics[key] = os.getenv(var)
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Optional
+
+
+log = logging.getLogger()
+
+# The container runs from /opt, which is where the relative path used to land.
+DIAGNOSTICS_SNAPSHOT_FILE = os.path.abspath(
+    os.getenv('DIAGNOSTICS_SNAPSHOT_FILE', '/opt/diagnostic_data.json'))
+
+# Keys that change on every run without saying anything about the hardware,
+# a report differing only in these is not written out again.
+UNHASHED_KEYS = ['last_updated']
+
+
+def content_hash(data: dict) -> str:
+    hashed = {key: value for key, value in data.items() if key not in UNHASHED_KEYS}
+    encoded = json.dumps(hashed, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class SnapshotStore(object):
+    '''
+    Diagnostics report persisted as json.
+
+    Writes go to a temporary file renamed over the target, so readers see
+    either the previous or the new report and never a truncated one, and are
+    skipped when the content did not change. The parsed report is mirrored in
+    memory and only read back from disk when the file's mtime or size changed.
+    '''
+
+    def __init__(self, path: str = DIAGNOSTICS_SNAPSHOT_FILE) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._hash = None
+        self._stat = None
+        self._data = None
+        self.writes = 0
+        self.skipped_writes = 0
+
+    def _file_stat(self) -> tuple:
+        stat = os.stat(self.path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _replace(self, data: dict) -> None:
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.%s.' % os.path.basename(self.path))
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def write(self, data: dict) -> bool:
+        '''
+        stores data, returns false if the file already holds the same content
+        '''
+        digest = content_hash(data)
+        with self._lock:
+            if digest == self._hash and self._stat is not None:
+                try:
+                    unchanged = self._file_stat() == self._stat
+                except FileNotFoundError:
+                    unchanged = False
+                if unchanged:
+                    # Other workers go by the mtime to tell the report is current
+                    os.utime(self.path)
+                    self._stat = self._file_stat()
+                    self.skipped_writes += 1
+                    return False
+
+            self._replace(data)
+            self.writes += 1
+            self._hash = digest
+            self._stat = self._file_stat()
+            self._data = json.loads(json.dumps(data))
+            return True
+
+    def read(self) -> dict:
+        '''
+        returns a copy of the stored report, raises FileNotFoundError if
+        diagnostics never ran
+        '''
+        with self._lock:
+            stat = self._file_stat()
+            if stat != self._stat:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                self._data = data
+                self._hash = content_hash(data)
+                self._stat = stat
+            return dict(self._data)
+
+    def mtime(self) -> Optional[float]:
+        '''time the report was last stored, None if diagnostics never ran'''
+        try:
+            return os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def read_or_none(self) -> Optional[dict]:
+        try:
+            return self.read()
+        except FileNotFoundError:
+            return None
+
+
+snapshot_store = SnapshotStore()
@@ -0,0 +1,103 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+from flask_caching.backends.base import BaseCache
+
+
+# Every gunicorn worker opens the same file, so a value cached by one of them
+# is served by all. The cache only needs to live as long as the container.
+DEFAULT_CACHE_PATH = os.getenv('CACHE_SQLITE_PATH', '/tmp/hm_diag_cache.sqlite')
+PRUNE_INTERVAL_SECONDS = 60
+
+
+class SQLiteCache(BaseCache):
+    '''
+    Flask-Caching backend storing pickled values in a sqlite file shared by
+    all processes of the container.
+
+    add() is atomic across processes, which makes it usable as a lock.
+    '''
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, default_timeout: int = 300) -> None:
+        super(SQLiteCache, self).__init__(default_timeout=default_timeout)
+        self.path = path
+        self._local = threading.local()
+        self._last_prune = 0
+        self._connection().execute('CREATE TABLE IF NOT EXISTS cache ('
+                                   'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)')
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        kwargs.setdefault('path', config.get('CACHE_SQLITE_PATH', DEFAULT_CACHE_PATH))
+        return cls(*args, **kwargs)
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite connections can't be shared between threads
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=OFF')
+            self._local.connection = connection
+        return connection
+
+    def _expires(self, timeout: Optional[int]) -> Optional[float]:
+        timeout = self._normalize_timeout(timeout)
+        if timeout == 0:
+            return None
+        return time.time() + timeout
+
+    def _prune(self, connection: sqlite3.Connection) -> None:
+        now = time.time()
+        if now - self._last_prune < PRUNE_INTERVAL_SECONDS:
+            return
+        self._last_prune = now
+        connection.execute('DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?', (now,))
+
+    def get(self, key: str) -> Any:
+        row = self._connection().execute(
+            'SELECT value FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time())).fetchone()
+        if row is None:
+            return None
+        try:
+            return pickle.loads(row[0])
+        except (pickle.PickleError, EOFError, AttributeError, ImportError):
+            return None
+
+    def set(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        connection = self._connection()
+        connection.execute('INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)',
+                           (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                            self._expires(timeout)))
+        self._prune(connection)
+        return True
+
+    def add(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        connection = self._connection()
+        # an expired entry doesn't count as present, the primary key makes
+        # sure only one of several concurrent callers gets to insert
+        connection.execute('DELETE FROM cache WHERE key = ? AND expires IS NOT NULL '
+                           'AND expires <= ?', (key, time.time()))
+        cursor = connection.execute(
+            'INSERT OR IGNORE INTO cache (key, value, expires) VALUES (?, ?, ?)',
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self._expires(timeout)))
+        return cursor.rowcount == 1
+
+    def delete(self, key: str) -> bool:
+        cursor = self._connection().execute('DELETE FROM cache WHERE key = ?', (key,))
+        return cursor.rowcount == 1
+
+    def has(self, key: str) -> bool:
+        row = self._connection().execute(
+            'SELECT 1 FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time())).fetchone()
+        return row is not None
+
+    def clear(self) -> bool:
+        self._connection().execute('DELETE FROM cache')
+        return True
@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from hw_diag.utilities.event_streamer import DiagEvent
+
+
+class AdaptiveSchedule(object):
+    '''
+    Interval until the next network watchdog check, from the state the last
+    one found.
+
+    While disconnected, and so while a Network Manager restart or reboot is
+    taking effect, checks run every recovery_interval to notice the
+    recovery quickly. Once connected the interval doubles with every
+    connected check, starting from recovery_interval, up to max_interval.
+    The first check after startup waits base_interval.
+    '''
+
+    BACKOFF_FACTOR = 2
+
+    def __init__(self, base_interval: timedelta, max_interval: timedelta,
+                 recovery_interval: timedelta) -> None:
+        self.base_interval = base_interval
+        self.max_interval = max(max_interval, base_interval)
+        self.recovery_interval = min(recovery_interval, base_interval)
+        self._connected_interval = base_interval
+
+    def next_interval(self, network_state: DiagEvent) -> timedelta:
+        if network_state == DiagEvent.NETWORK_DISCONNECTED:
+            # confirm the recovery soon, then back off again from there
+            self._connected_interval = self.recovery_interval
+            return self.recovery_interval
+
+        interval = self._connected_interval
+        self._connected_interval = min(interval * self.BACKOFF_FACTOR, self.max_interval)
+        return interval
@@ -0,0 +1,304 @@
+'''
+Replays connectivity traces through NetworkWatchdog.ensure_network_connection
+and the AdaptiveSchedule on a virtual clock, to see what an escalation policy
+would have done without waiting on hardware:
+
+    python -m hw_diag.utilities.watchdog_simulation trace.json \\
+        --policy FULL_REBOOT_THRESHOLD=4 --policy recovery_minutes=5
+
+A trace is json, connected except during its outages:
+
+    {"duration_hours": 336,
+     "outages": [{"start_hours": 20, "end_hours": 26, "fixed_by": "nm_restart"},
+                 {"start_hours": 100, "end_hours": 101}]}
+
+fixed_by says which recovery action ends the outage early, "nm_restart" or
+"reboot" (a reboot also fixes what an NM restart fixes). Without it the
+outage lasts until end_hours whatever the watchdog does.
+'''
+import argparse
+import json
+import logging
+import os
+import tempfile
+from dataclasses import asdict, dataclass, field
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from hw_diag.utilities import network_watchdog
+from hw_diag.utilities.event_streamer import DiagAction, DiagEvent
+from hw_diag.utilities.network_watchdog import NetworkWatchdog
+from hw_diag.utilities.watchdog_schedule import AdaptiveSchedule
+
+
+HOUR = 3600
+FIXED_BY_NM_RESTART = 'nm_restart'
+FIXED_BY_REBOOT = 'reboot'
+
+
+@dataclass
+class Outage:
+    start: float
+    end: float
+    fixed_by: Optional[str] = None
+    # when a recovery action ended it early, virtual seconds
+    fixed_at: Optional[float] = None
+
+    def is_down(self, t: float) -> bool:
+        end = self.end if self.fixed_at is None else min(self.end, self.fixed_at)
+        return self.start <= t < end
+
+
+class ConnectivityTrace(object):
+    '''connected except during the outages, times in virtual seconds'''
+
+    def __init__(self, duration: float, outages: List[Outage]) -> None:
+        self.duration = duration
+        self.outages = sorted(outages, key=lambda outage: outage.start)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ConnectivityTrace':
+        outages = [Outage(start=outage['start_hours'] * HOUR, end=outage['end_hours'] * HOUR,
+                          fixed_by=outage.get('fixed_by'))
+                   for outage in data.get('outages', [])]
+        return cls(data['duration_hours'] * HOUR, outages)
+
+    def state_at(self, t: float) -> DiagEvent:
+        if any(outage.is_down(t) for outage in self.outages):
+            return DiagEvent.NETWORK_DISCONNECTED
+        return DiagEvent.NETWORK_INTERNET_CONNECTED
+
+    def apply_action(self, t: float, action: str) -> None:
+        '''ends the outages at t that action fixes'''
+        fixes = {FIXED_BY_NM_RESTART} if action == FIXED_BY_NM_RESTART else \
+            {FIXED_BY_NM_RESTART, FIXED_BY_REBOOT}
+        for outage in self.outages:
+            if outage.is_down(t) and outage.fixed_by in fixes:
+                outage.fixed_at = t
+
+
+@dataclass
+class WatchdogPolicy:
+    '''the NetworkWatchdog thresholds and the schedule, defaults as deployed'''
+    NM_RESTART_THRESHOLD: int = NetworkWatchdog.NM_RESTART_THRESHOLD
+    FULL_REBOOT_THRESHOLD: int = NetworkWatchdog.FULL_REBOOT_THRESHOLD
+    FULL_FORCE_REBOOT_THRESHOLD: int = NetworkWatchdog.FULL_FORCE_REBOOT_THRESHOLD
+    REBOOT_LIMIT_HOURS: int = NetworkWatchdog.REBOOT_LIMIT_HOURS
+    ESCALATION_INTERVAL_MINUTES: float = NetworkWatchdog.ESCALATION_INTERVAL_MINUTES
+    base_interval_hours: float = float(os.getenv('NETWORK_WATCHDOG_INTERVAL_HOURS', 1))
+    max_interval_hours: float = float(os.getenv('NETWORK_WATCHDOG_MAX_INTERVAL_HOURS', 4))
+    recovery_minutes: float = float(os.getenv('NETWORK_WATCHDOG_RECOVERY_MINUTES', 2))
+    # seconds the unit is down while rebooting
+    boot_seconds: float = 120.0
+    # false if the supervisor ignores reboot requests until they are forced
+    graceful_reboot_works: bool = True
+    initial_uptime_hours: float = 48.0
+
+    def thresholds(self) -> dict:
+        return {name: value for name, value in asdict(self).items() if name.isupper()}
+
+    def schedule(self) -> AdaptiveSchedule:
+        return AdaptiveSchedule(base_interval=timedelta(hours=self.base_interval_hours),
+                                max_interval=timedelta(hours=self.max_interval_hours),
+                                recovery_interval=timedelta(minutes=self.recovery_minutes))
+
+
+@dataclass
+class SimulationReport:
+    checks: int = 0
+    nm_restarts: List[float] = field(default_factory=list)
+    reboots: List[float] = field(default_factory=list)
+    forced_reboots: int = 0
+    events: List[dict] = field(default_factory=list)
+    outages: List[dict] = field(default_factory=list)
+
+    def summary(self) -> dict:
+        def mean(values):
+            values = [value for value in values if value is not None]
+            return sum(values) / len(values) if values else None
+
+        return {
+            'checks': self.checks,
+            'nm_restarts': len(self.nm_restarts),
+            'reboots': len(self.reboots),
+            'forced_reboots': self.forced_reboots,
+            'events': len(self.events),
+            'outages': len(self.outages),
+            'undetected_outages': sum(1 for outage in self.outages if outage['detected_at'] is None),
+            'mean_time_to_detect_seconds': mean(outage['time_to_detect'] for outage in self.outages),
+            'mean_time_to_recovery_seconds': mean(outage['time_to_recovery'] for outage in self.outages),
+        }
+
+
+class VirtualClock(object):
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+class SimulatedWatchdog(NetworkWatchdog):
+    '''
+    NetworkWatchdog with the policy's thresholds whose clock, uptime, network
+    state, recovery actions and events come from a WatchdogSimulation, so
+    nothing touches the device.
+    '''
+
+    def __init__(self, simulation: 'WatchdogSimulation', volume_path: str) -> None:
+        super(SimulatedWatchdog, self).__init__(volume_path)
+        self.simulation = simulation
+        for name, value in simulation.policy.thresholds().items():
+            setattr(self, name, value)
+
+    def monotonic(self) -> float:
+        return self.simulation.clock.monotonic()
+
+    def uptime_seconds(self) -> float:
+        return self.simulation.uptime()
+
+    def get_current_network_state(self) -> DiagEvent:
+        return self.simulation.trace.state_at(self.simulation.clock.now)
+
+    def restart_network_manager(self) -> None:
+        self.simulation.restart_network_manager()
+
+    def reboot(self, force: bool) -> None:
+        self.simulation.reboot(force)
+
+    def _prepare_event(self, event_type: DiagEvent, action_type: DiagAction, msg: str,
+                       context=None) -> Dict:
+        return {'t': self.simulation.clock.now, 'type': event_type.name,
+                'action': action_type.name, 'msg': msg}
+
+    def publish_event(self, event: Dict, persistent: bool = False) -> None:
+        self.simulation.report.events.append(event)
+
+    def boot(self) -> None:
+        '''the watchdog's state as a fresh process has it'''
+        for name in ['lost_count', 'reboot_request_count', 'disconnected_since', 'last_escalation',
+                     'last_network_event', 'last_network_action', 'last_network_event_fingerprint']:
+            self.__dict__.pop(name, None)
+
+
+class WatchdogSimulation(object):
+    '''
+    Runs a SimulatedWatchdog over a trace, on a virtual clock and with the
+    escalation policy given.
+    '''
+
+    def __init__(self, trace: ConnectivityTrace, policy: WatchdogPolicy = None) -> None:
+        self.trace = trace
+        self.policy = policy or WatchdogPolicy()
+        self.clock = VirtualClock()
+        self.report = SimulationReport()
+        self._booted_at = -self.policy.initial_uptime_hours * HOUR
+        self._reboot_requested = False
+
+    def uptime(self) -> float:
+        return self.clock.now - self._booted_at
+
+    def restart_network_manager(self) -> None:
+        self.report.nm_restarts.append(self.clock.now)
+        self.trace.apply_action(self.clock.now, FIXED_BY_NM_RESTART)
+
+    def reboot(self, force: bool) -> None:
+        self.report.reboots.append(self.clock.now)
+        self.report.forced_reboots += int(force)
+        if force or self.policy.graceful_reboot_works:
+            self._reboot_requested = True
+
+    def run(self) -> SimulationReport:
+        logger = logging.getLogger(network_watchdog.__name__)
+        level, handlers = logger.level, list(logger.handlers)
+        # keep the device's watchdog log out of it
+        with tempfile.TemporaryDirectory() as log_dir:
+            try:
+                watchdog = SimulatedWatchdog(self, log_dir)
+                logger.setLevel(logging.ERROR)
+                self._run(watchdog)
+            finally:
+                # the watchdog adds handlers for its log
+                for handler in set(logger.handlers) - set(handlers):
+                    logger.removeHandler(handler)
+                    handler.close()
+                logger.setLevel(level)
+        self._measure_outages()
+        return self.report
+
+    def _run(self, watchdog: SimulatedWatchdog) -> None:
+        base_interval = self.policy.base_interval_hours * HOUR
+        schedule = self.policy.schedule()
+        next_check = base_interval
+        # (time, state the check found)
+        self._checks = []
+        while next_check <= self.trace.duration:
+            self.clock.now = next_check
+            self._reboot_requested = False
+            state = watchdog.ensure_network_connection()
+            self._checks.append((self.clock.now, state))
+            if self._reboot_requested:
+                self.trace.apply_action(self.clock.now, FIXED_BY_REBOOT)
+                self._booted_at = self.clock.now + self.policy.boot_seconds
+                watchdog.boot()
+                # the scheduler starts over once the unit is back up
+                schedule = self.policy.schedule()
+                next_check = self._booted_at + base_interval
+            else:
+                next_check = self.clock.now + schedule.next_interval(state).total_seconds()
+        self.report.checks = len(self._checks)
+
+    def _measure_outages(self) -> None:
+        for outage in self.trace.outages:
+            end = outage.end if outage.fixed_at is None else min(outage.end, outage.fixed_at)
+            # a check fixing the outage saw it too
+            detected_at = next((t for t, state in self._checks
+                                if outage.start <= t <= end and state == DiagEvent.NETWORK_DISCONNECTED), None)
+            recovered_at = next((t for t, state in self._checks
+                                 if t >= end and state != DiagEvent.NETWORK_DISCONNECTED), None)
+            self.report.outages.append({
+                'start': outage.start,
+                'end': end,
+                'fixed_early': outage.fixed_at is not None and outage.fixed_at < outage.end,
+                'detected_at': detected_at,
+                'time_to_detect': detected_at - outage.start if detected_at is not None else None,
+                'time_to_recovery': recovered_at - outage.start
+                if detected_at is not None and recovered_at is not None else None,
+            })
+
+
+def parse_policy(overrides: List[str]) -> WatchdogPolicy:
+    policy = WatchdogPolicy()
+    for override in overrides:
+        name, value = override.split('=', 1)
+        current = getattr(policy, name)
+        if isinstance(current, bool):
+            value = value.lower() == 'true'
+        setattr(policy, name, type(current)(value))
+    return policy
+
+
+def main(argv: List[str] = None) -> dict:
+    parser = argparse.ArgumentParser(description='Replay a connectivity trace through the network watchdog')
+    parser.add_argument('trace', help='json trace file')
+    parser.add_argument('--policy', action='append', default=[], metavar='NAME=VALUE',
+                        help='override a WatchdogPolicy field, can be repeated')
+    parser.add_argument('--details', action='store_true', help='include events and outages')
+    args = parser.parse_args(argv)
+
+    try:
+        policy = parse_policy(args.policy)
+    except (AttributeError, ValueError) as e:
+        parser.error(f'bad --policy: {e}')
+    with open(args.trace) as f:
+        trace = ConnectivityTrace.from_dict(json.load(f))
+    report = WatchdogSimulation(trace, policy).run()
+    result = report.summary()
+    if args.details:
+        result.update(events=report.events, outages=report.outages)
+    print(json.dumps(result, indent=2))
+    return result
+
+
+if __name__ == '__main__':
+    main()
@@ -1,35 +1,36 @@
 import json
 import base64
+import gzip
 import os
 import logging
 
-from flask import Blueprint, request
+from flask import Blueprint, request, current_app
 from flask import render_template, Response
 from flask import jsonify
-from datetime import datetime
+from datetime import datetime, timezone
 from hm_pyhelper.constants.shipping import DESTINATION_ADD_GATEWAY_TXN_KEY
 from hw_diag.diagnostics.shutdown_gateway_diagnostic import SHUTDOWN_GATEWAY_KEY
 from hw_diag.diagnostics.provision_key_diagnostic import KEY_PROVISIONING_KEY
-from hw_diag.cache import cache
+from hw_diag.cache import cache, cached_stale_while_revalidate
 from hm_pyhelper.diagnostics.diagnostics_report import DiagnosticsReport
 
 from hw_diag.diagnostics.add_gateway_txn_diagnostic import AddGatewayTxnDiagnostic
 from hw_diag.diagnostics.shutdown_gateway_diagnostic import ShutdownGatewayDiagnostic
 from hw_diag.diagnostics.provision_key_diagnostic import ProvisionKeyDiagnostic
 
-from hw_diag.diagnostics.ecc_diagnostic import EccDiagnostic
-from hw_diag.diagnostics.env_var_diagnostics import EnvVarDiagnostics
-from hw_diag.diagnostics.mac_diagnostics import MacDiagnostics
-from hw_diag.diagnostics.serial_number_diagnostic import SerialNumberDiagnostic
-from hw_diag.diagnostics.bt_diagnostic import BtDiagnostic
-from hw_diag.diagnostics.lte_diagnostic import LteDiagnostic
-from hw_diag.diagnostics.lora_diagnostic import LoraDiagnostic
-from hw_diag.diagnostics.pf_diagnostic import PfDiagnostic
-from hw_diag.diagnostics.key_diagnostics import KeyDiagnostics
-from hw_diag.diagnostics.device_status_diagnostic import DeviceStatusDiagnostic
+from hw_diag.diagnostics.registry import run_diagnostics, INIT_FILE, \
+    get_diagnostics_for_fields, run_diagnostics_for_fields
 from hw_diag.utilities.diagnostics import (
     compose_diagnostics_report_from_err_msg, get_device_info, read_diagnostics_file
 )
+from hw_diag.utilities.dbus_proxy.connection import dbus_connection
+from hw_diag.utilities.dbus_proxy.property_cache import dbus_property_cache
+from hw_diag.utilities.diagnostics_snapshot import diagnostics_snapshot
+from hw_diag.utilities.snapshot_store import content_hash
+from hw_diag.utilities.diagnostic_cache import diagnostic_cache
+from hw_diag.utilities.diagnostic_metrics import diagnostic_metrics
+from hw_diag.utilities.diagnostics_history import diagnostics_history
+from hw_diag.utilities.ping_history import ping_history, DEFAULT_PERCENTILES
 from hw_diag.utilities.hardware import (
     get_device_metrics,
     has_external_antenna_support,
@@ -52,15 +53,41 @@ logging.basicConfig(level=os.environ.get("LOGLEVEL", "DEBUG"))
 LOGGER = get_logger(__name__)
 DIAGNOSTICS = Blueprint('DIAGNOSTICS', __name__)
 
+# Smaller /json bodies are not worth compressing
+GZIP_MIN_SIZE = 512
+# How long an outdated /initFile.txt is still served while it is regenerated
+INIT_FILE_STALE_SECONDS = int(os.getenv('INIT_FILE_STALE_SECONDS', 300))
+
 
 @DIAGNOSTICS.route('/json')
 @authenticate
 def get_diagnostics_json():
     diagnostics = read_diagnostics_file()
-    response = jsonify(diagnostics)
+    body = current_app.json.dumps(diagnostics).encode('utf-8')
+
+    # Pollers over LTE revalidate with If-None-Match / If-Modified-Since and
+    # get a bodyless 304 as long as the snapshot content is unchanged, runs
+    # that only move last_updated don't count as a change.
+    use_gzip = len(body) >= GZIP_MIN_SIZE and bool(request.accept_encodings['gzip'])
+    etag = content_hash(diagnostics)
+    if use_gzip:
+        etag += '-gzip'
+
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    if diagnostics_snapshot.changed_at is not None:
+        response.last_modified = diagnostics_snapshot.changed_at.replace(microsecond=0,
+                                                                         tzinfo=timezone.utc)
+    response.cache_control.no_cache = True
+    response.vary.add('Accept-Encoding')
     response.headers.set('Content-Disposition',
                          'attachment;filename=nebra-diag.json'
                          )
+    response.make_conditional(request)
+
+    if use_gzip and response.status_code == 200:
+        response.set_data(gzip.compress(body))
+        response.content_encoding = 'gzip'
     return response
 
 
@@ -111,28 +138,15 @@ def get_helium_info():
 
 
 @DIAGNOSTICS.route('/initFile.txt')
-@cache.cached(timeout=15)
+@cached_stale_while_revalidate(timeout=15, stale_timeout=INIT_FILE_STALE_SECONDS)
 def get_initialisation_file():
     """
     This needs to be generated as quickly as possible,
-    so we bypass the regular timer.
+    so we bypass the regular timer. Once the report is older than
+    15 seconds callers get it while a refresh runs in the background.
     """
 
-    diagnostics = [
-        SerialNumberDiagnostic(),
-        EccDiagnostic(),
-        MacDiagnostics(),
-        EnvVarDiagnostics(),
-        BtDiagnostic(),
-        LteDiagnostic(),
-        LoraDiagnostic(),
-        KeyDiagnostics(),
-        DeviceStatusDiagnostic(),
-        # Must be last, it depends on previous results
-        PfDiagnostic()
-    ]
-    diagnostics_report = DiagnosticsReport(diagnostics)
-    diagnostics_report.perform_diagnostics()
+    diagnostics_report = run_diagnostics(INIT_FILE)
     LOGGER.debug("Full diagnostics report is: %s" % diagnostics_report)
 
     diagnostics_str = str(json.dumps(diagnostics_report))
@@ -340,6 +354,122 @@ def reboot():
         )
 
 
+@DIAGNOSTICS.route('/refresh_diagnostics')
+@authenticate
+def refresh_diagnostics():
+    # The refresh runs in the background, poll /diagnostics_snapshot
+    # to find out when the new report has landed. Cached values, even the
+    # ones that should not change during a boot, are read again.
+    diagnostic_cache.invalidate()
+    refresh_started = diagnostics_snapshot.request_refresh(force=True)
+    response = {"action_invoked": refresh_started}
+    response.update(diagnostics_snapshot.freshness())
+    return jsonify(response)
+
+
+@DIAGNOSTICS.route('/diagnostics_snapshot')
+@authenticate
+def get_diagnostics_snapshot_status():
+    return jsonify(diagnostics_snapshot.freshness())
+
+
+@DIAGNOSTICS.route('/diagnostics_metrics')
+@authenticate
+def get_diagnostics_metrics():
+    # Latency histograms and outcome counters per diagnostic since start, of
+    # the gunicorn worker serving the request
+    return jsonify({
+        'pid': os.getpid(),
+        'diagnostics': diagnostic_metrics.as_dict(),
+        'cache': {
+            'hits': diagnostic_cache.hits,
+            'misses': diagnostic_cache.misses
+        },
+        'dbus': dbus_connection.stats(),
+        'dbus_properties': dbus_property_cache.stats()
+    })
+
+
+def parse_selector(name):
+    value = request.args.get(name)
+    if not value:
+        return []
+    return [field.strip() for field in value.split(',') if field.strip()]
+
+
+@DIAGNOSTICS.route('/v2/diagnostics')
+@authenticate
+def get_selected_diagnostics():
+    """
+    ?only=LTE,BT runs just the diagnostics producing those fields (and what
+    they depend on), ?fields=serial_number,AN returns fields from the last
+    snapshot and only runs the diagnostics producing those it doesn't hold,
+    such as device_status. Both can be combined, without either the whole
+    snapshot is returned.
+    """
+    only = parse_selector('only')
+    fields = parse_selector('fields')
+    if not only and not fields:
+        return jsonify(read_diagnostics_file())
+
+    snapshot = read_diagnostics_file() if fields else {}
+    from_snapshot = [field for field in fields if field in snapshot]
+    to_run = list(dict.fromkeys(only + [field for field in fields if field not in snapshot]))
+
+    _, unknown = get_diagnostics_for_fields(to_run)
+    if unknown:
+        return 'Bad Request: no diagnostic produces %s' % ', '.join(unknown), 400
+
+    response = {field: snapshot[field] for field in from_snapshot}
+    errors = [field for field in snapshot.get('errors', []) if field in from_snapshot]
+    if to_run:
+        diagnostics_report = run_diagnostics_for_fields(to_run)
+        response.update({field: diagnostics_report.get(field) for field in to_run})
+        errors += [field for field in diagnostics_report.get('errors', []) if field in to_run]
+    response['errors'] = list(dict.fromkeys(errors))
+    return jsonify(response)
+
+
+@DIAGNOSTICS.route('/diagnostics_history')
+@authenticate
+def get_diagnostics_history():
+    # ?since=&until= as ISO 8601 utc times, ?keys=ECC,BT to restrict the snapshots
+    try:
+        since = request.args.get('since')
+        until = request.args.get('until')
+        since = datetime.fromisoformat(since) if since else None
+        until = datetime.fromisoformat(until) if until else None
+    except ValueError:
+        return 'Bad Request: invalid since or until', 400
+    keys = request.args.get('keys')
+    keys = keys.split(',') if keys else None
+
+    history = diagnostics_history.query(since, until, keys)
+    return jsonify([{'dt': entry['dt'].isoformat(), 'diagnostics': entry['diagnostics']}
+                    for entry in history])
+
+
+@DIAGNOSTICS.route('/connectivity_history')
+@authenticate
+def get_connectivity_history():
+    # RTT (ms) and loss of every watchdog probe per target, ?percentiles=50,95
+    try:
+        percentiles = [float(q) for q in parse_selector('percentiles')] or DEFAULT_PERCENTILES
+    except ValueError:
+        return 'Bad Request: invalid percentiles', 400
+    if any(q <= 0 or q > 100 for q in percentiles):
+        return 'Bad Request: percentiles must be in (0, 100]', 400
+    return jsonify(ping_history.query(percentiles))
+
+
+@DIAGNOSTICS.app_context_processor
+def inject_diagnostics_freshness():
+    return {
+        'snapshot_updated_at': diagnostics_snapshot.updated_at,
+        'snapshot_age_seconds': diagnostics_snapshot.age_seconds()
+    }
+
+
 @DIAGNOSTICS.route('/purge')
 @authenticate
 def purge():
@@ -18,4 +18,17 @@ if [ "$prevent_start" = 1 ]; then
     while true; do sleep 1000; done
 fi
 
-gunicorn --bind 0.0.0.0:80 --timeout 300 hw_diag.wsgi:wsgi_app
+# Scheduled tasks run in a single elected worker, the diagnostics snapshot and
+# the view cache are shared through files, see hw_diag.utilities.process_lock.
+# Each worker keeps its own diagnostic result cache, ECC broker and metrics,
+# invalidations and ECC access are coordinated through the same lock directory.
+workers="${DIAG_WORKERS:-2}"
+threads="${DIAG_THREADS:-4}"
+
+# The workers share a session key created by the first of them, a new one on
+# every start logs everyone out.
+rm -f "${PROCESS_LOCK_DIR:-/tmp}"/hm_diag_*.secret
+
+gunicorn --bind 0.0.0.0:80 --timeout 300 \
+    --worker-class gthread --workers "$workers" --threads "$threads" \
+    hw_diag.wsgi:wsgi_app